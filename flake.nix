@@ -34,6 +34,9 @@
           preInstall = ''
             mkdir -p $out/data
             cp ./data/options.json $out/data
+            if [ -e ./data/home-manager-options.json ]; then
+              cp ./data/home-manager-options.json $out/data
+            fi
           '';
 
           meta = {
@@ -2,7 +2,11 @@
 
 import argparse
 from pathlib import Path
+import sys
 
+from nix_tree.checker import check_files
+from nix_tree.format_composers import FORMAT_COMPOSERS, export_file
+from nix_tree.option_sets import find_option_sets
 from nix_tree.ui import start_ui
 from nix_tree.errors import ConfigurationFileNotFound
 
@@ -12,16 +16,62 @@ def main():
 
     parser = argparse.ArgumentParser(prog="nix-tree",
                                      description="A tool for viewing and editing your nix configuration as a tree")
-    parser.add_argument("file_location", type=str,
-                        help="The location of your nix configuration file")
+    parser.add_argument("file_locations", type=str, nargs="+", metavar="file_location",
+                        help="The location of your nix configuration file (more than one can be given with --check)")
     parser.add_argument("-w", "--writeover", default=False, action="store_true",
                         help="Write over the file that you are editing")
     parser.add_argument("-c", "--comments", default=False, action="store_true",
                         help="Whether you would like comments to be copied over from the original file")
+    parser.add_argument("-b", "--backups", default=0, type=int,
+                        help="How many backups of the file being written over to keep (default 0)")
+    parser.add_argument("-j", "--jobs", default=1, type=int,
+                        help="How many processes to compose the top level sections of the file (or check the files) with "
+                             "(default 1)")
+    parser.add_argument("-p", "--patch", default=False, action="store_true",
+                        help="Only rewrite the parts of the file that were changed instead of regrouping the whole file")
+    parser.add_argument("-d", "--dry-run", default=False, action="store_true",
+                        help="Print the changes to the file as a diff instead of writing them")
+    parser.add_argument("-e", "--export", choices=FORMAT_COMPOSERS.keys(),
+                        help="Write the configuration out in another format instead of opening the tree")
+    parser.add_argument("-o", "--output", type=str,
+                        help="The file to export to (default stdout)")
+    parser.add_argument("--from-json", default=False, action="store_true",
+                        help="Read evaluated configuration from a json file (e.g. from nix eval --json) to export")
+    parser.add_argument("--json-prefix", default="", type=str,
+                        help="The path the json was evaluated at, e.g. services for ...config.services")
+    parser.add_argument("--check", default=False, action="store_true",
+                        help="Check the files against the options instead of opening the tree, reporting unknown "
+                             "options and type mismatches (exits with 1 if there are any, 2 if a file can't be read)")
+    parser.add_argument("--check-format", choices=("text", "json"), default="text",
+                        help="How to report the problems found by --check (default text)")
+    parser.add_argument("--options", type=str,
+                        help="The NixOS options.json (default the one in the data directory), the same as "
+                             "--option-set nixos=<file>")
+    parser.add_argument("--option-set", action="append", default=[], metavar="NAME=FILE",
+                        help="Adds a named set of options, e.g. home-manager=hm-options.json or one of your own "
+                             "modules, which is checked against along with the NixOS or home-manager options")
+    parser.add_argument("--use-option-sets", type=str, metavar="NAME[,NAME...]",
+                        help="The option sets to check the file against, in the order they are looked in (default "
+                             "home-manager for a home.nix, nixos otherwise, and every set given with --option-set)")
     args = parser.parse_args()
-    configuration_file = Path(args.file_location)
-    if configuration_file.is_file():
-        start_ui(args.file_location, args.writeover, args.comments)
+    if args.from_json and not args.export:
+        parser.error("--from-json can only be used with --export")
+    try:
+        option_sets = find_option_sets(([f"nixos={args.options}"] if args.options else []) + args.option_set)
+    except ValueError as error:
+        parser.error(str(error))
+    layers = args.use_option_sets.split(",") if args.use_option_sets else None
+    if args.check:
+        sys.exit(check_files(args.file_locations, option_sets, args.check_format, args.jobs, layers=layers))
+    if len(args.file_locations) > 1:
+        parser.error("only one file can be given unless --check is used")
+    file_location = args.file_locations[0]
+    configuration_file = Path(file_location)
+    if configuration_file.is_file() and args.export:
+        export_file(file_location, args.export, args.output, args.from_json, args.json_prefix)
+    elif configuration_file.is_file():
+        start_ui(file_location, args.writeover, args.comments, args.backups, args.patch, args.jobs, args.dry_run,
+                 option_sets, layers)
     else:
         raise ConfigurationFileNotFound
 
@@ -0,0 +1,256 @@
+"""Checks configuration files against the options.json without opening the tree, for use in scripts and CI"""
+
+import bisect
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+import json
+from pathlib import Path
+import re
+import sys
+from typing import TextIO
+
+from nix_tree.decomposer import Decomposer, DecomposerTree
+from nix_tree.errors import ErrorHandlingComments
+from nix_tree.option_sets import OptionSets, choose_option_sets
+from nix_tree.parsing import ParsingOptions, Types, split_option_path
+from nix_tree.tree import Node, VariableNode
+from nix_tree.validators import compile_type
+
+# The attributes a module can have which are not options
+MODULE_ATTRIBUTES = ("imports", "disabledModules", "options", "meta", "_file", "key")
+
+# The exit codes of the check
+NO_PROBLEMS = 0
+PROBLEMS_FOUND = 1
+FILES_NOT_CHECKED = 2
+
+
+@dataclass
+class Problem:
+    """A problem found with a variable in a configuration file"""
+    file: str
+    line: int | None
+    path: str
+    kind: str  # "unknown option" or "type mismatch"
+    message: str
+
+
+def find_variables(node: Node) -> list[VariableNode]:
+    """Finds every variable below a node
+
+    Args:
+        node: Node - the node to search from
+
+    Returns:
+        list[VariableNode] - the variables, in the order they are in the tree
+    """
+
+    variables = []
+    stack = list(reversed(node.get_connected_nodes()))
+    while stack:
+        child = stack.pop()
+        if isinstance(child, VariableNode):
+            variables.append(child)
+        else:
+            stack.extend(reversed(child.get_connected_nodes()))
+    return variables
+
+
+def option_path_of(variable_path: str) -> str | None:
+    """Works out which option a variable sets
+
+    Args:
+        variable_path: str - the full path of the variable
+
+    Returns:
+        str | None - the option path, or None if the variable is not an option (e.g. the headers or imports)
+    """
+
+    if variable_path == "headers" or variable_path.split(".")[0] in MODULE_ATTRIBUTES:
+        return None
+    return variable_path.removeprefix("config.")
+
+
+def find_problem(path: str, value: str, option: tuple[str, Types | None, str] | None) -> tuple[str, str] | None:
+    """Works out what is wrong with a variable, if anything
+
+    Args:
+        path: str - the option path the variable sets
+        value: str - the value of the variable, in the form the decomposer stores values
+        option: tuple[str, Types | None, str] | None - what look_up_options found for the path, None if nothing
+
+    Returns:
+        tuple[str, str] | None - the kind of problem ("unknown option" or "type mismatch") and a message, or None if
+        the variable is fine (or it can not be told without evaluating its value, like pkgs.git)
+    """
+
+    if option is None:
+        return "unknown option", f"{path} is not an option"
+    option_path, _, type_as_string = option
+    if len(split_option_path(option_path)) < len(split_option_path(path)):
+        return None  # The variable is inside an option (e.g. an attribute set) so its type is not the options
+    if compile_type(type_as_string).validate(value) is not False:
+        return None
+    return "type mismatch", f"{path} is set to {value.strip()} but its type is {type_as_string}"
+
+
+class ConfigurationChecker:
+    """The class which checks configuration files against the options
+
+    Note:
+        The options are opened once for all the files, and each path is only looked up the first time it is seen, as
+        the same options are used across most files
+    """
+
+    def __init__(self, options: ParsingOptions | OptionSets) -> None:
+        """Stores the options to check against
+
+        Args:
+            options: ParsingOptions | OptionSets - the options
+        """
+
+        self.__options = options
+        self.__looked_up: dict[str, tuple[str, Types | None, str] | None] = {}
+
+    def check_file(self, file_location: str) -> list[Problem]:
+        """Decomposes a configuration file and checks each of its variables
+
+        Args:
+            file_location: str - the configuration file
+
+        Returns:
+            list[Problem] - the problems found, in the order the variables are in the tree
+
+        Note:
+            Where each line starts is found once for the file, so the line of each variable is found with a binary
+            search rather than by counting the lines before it
+        """
+
+        decomposer = Decomposer(file_path=Path(file_location), tree=DecomposerTree())
+        variables = []
+        paths = []
+        for variable in find_variables(decomposer.get_tree().get_root()):
+            if (path := option_path_of(variable.get_name())) is not None:
+                variables.append(variable)
+                paths.append(path)
+        new_paths = list(dict.fromkeys(path for path in paths if path not in self.__looked_up))
+        found = self.__options.look_up_options(new_paths)
+        for path in new_paths:
+            self.__looked_up[path] = found.get(path)
+
+        problems = []
+        source_spans = decomposer.get_source_spans()
+        line_starts = [newline.end() for newline in re.finditer("\n", source_spans.get_source())]
+        for variable, path in zip(variables, paths):
+            span = source_spans.get_variable_span(variable.get_name())
+            line = bisect.bisect_right(line_starts, span.start) + 1 if span else None
+            if problem := find_problem(path, variable.get_data(), self.__looked_up[path]):
+                problems.append(Problem(file_location, line, path, *problem))
+        return problems
+
+
+# The option sets each worker process checks against when the files are checked in parallel, and its checker for
+# each combination of sets, as the files may not all use the same ones
+worker_option_sets: dict[str, Path] = {}
+worker_layers: list[str] | None = None
+worker_checkers: dict[tuple[str, ...], ConfigurationChecker] = {}
+
+
+def start_check_worker(option_sets: dict[str, Path], layers: list[str] | None) -> None:
+    """Stores the option sets in a worker process, before it checks any files
+
+    Args:
+        option_sets: dict[str, Path] - the location of the options.json of each set, by name
+        layers: list[str] | None - the sets to check every file against, None to choose them from each files name
+    """
+
+    global worker_option_sets, worker_layers, worker_checkers
+    worker_option_sets = option_sets
+    worker_layers = layers
+    worker_checkers = {}
+
+
+def checker_for_file(file_location: str) -> ConfigurationChecker:
+    """Gets the checker of the worker process for the sets a file is checked against, opening them the first time
+
+    Args:
+        file_location: str - the configuration file
+
+    Returns:
+        ConfigurationChecker - the checker
+    """
+
+    layers = tuple(worker_layers if worker_layers else choose_option_sets(file_location, worker_option_sets))
+    if layers not in worker_checkers:
+        worker_checkers[layers] = ConfigurationChecker(OptionSets(worker_option_sets, list(layers)))
+    return worker_checkers[layers]
+
+
+def check_file_in_worker(file_location: str) -> tuple[list[Problem], dict[str, str] | None]:
+    """Checks a file with the checker of the worker process
+
+    Args:
+        file_location: str - the configuration file
+
+    Returns:
+        tuple[list[Problem], dict[str, str] | None] - the problems found, and why the file could not be checked if it
+        could not be
+    """
+
+    try:
+        return checker_for_file(file_location).check_file(file_location), None
+    except (OSError, ValueError, IndexError, ErrorHandlingComments) as error:
+        return [], {"file": file_location, "error": str(error) or type(error).__name__}
+
+
+def check_files(file_locations: list[str], option_sets: dict[str, Path], output_format: str = "text", jobs: int = 1,
+                output: TextIO | None = None, layers: list[str] | None = None) -> int:
+    """Checks configuration files against the options and reports the problems found
+
+    Args:
+        file_locations: list[str] - the configuration files
+        option_sets: dict[str, Path] - the location of the options.json of each set, by name
+        output_format: str - "text" for a line per problem, or "json"
+        jobs: int - how many worker processes to check the files with
+        output: TextIO | None - where to report the problems, by default stdout
+        layers: list[str] | None - the sets to check every file against, by default chosen from each files name
+
+    Returns:
+        int - the exit code, NO_PROBLEMS, PROBLEMS_FOUND or FILES_NOT_CHECKED if a file (or the options) could not be read
+
+    Note:
+        Most of the time is spent decomposing the files, so with more than one job the files are split between the
+        workers, each of which opens the options once
+    """
+
+    output = output if output else sys.stdout
+    start_check_worker(option_sets, layers)
+    try:
+        for file_location in file_locations:  # Checks the option sets can be opened before starting any workers
+            checker_for_file(file_location)
+    except FileNotFoundError as error:
+        print(error, file=sys.stderr)
+        return FILES_NOT_CHECKED
+    if jobs > 1 and len(file_locations) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=start_check_worker,
+                                 initargs=(option_sets, layers)) as executor:
+            results = list(executor.map(check_file_in_worker, file_locations,
+                                        chunksize=max(1, len(file_locations) // (jobs * 4))))
+    else:
+        results = [check_file_in_worker(file_location) for file_location in file_locations]
+    problems: list[Problem] = [problem for file_problems, _ in results for problem in file_problems]
+    errors: list[dict[str, str]] = [error for _, error in results if error]
+
+    if output_format == "json":
+        json.dump({"problems": [asdict(problem) for problem in problems], "errors": errors}, output, indent=2)
+        output.write("\n")
+    else:
+        for problem in problems:
+            output.write(f"{problem.file}:{problem.line if problem.line else '?'}: {problem.kind}: {problem.message}\n")
+        for error in errors:
+            output.write(f"{error['file']}: could not be checked: {error['error']}\n")
+        output.write(f"{len(problems)} problem(s) found in {len(file_locations) - len(errors)} file(s)\n")
+
+    if errors:
+        return FILES_NOT_CHECKED
+    return PROBLEMS_FOUND if problems else NO_PROBLEMS
@@ -0,0 +1,202 @@
+"""The screen which runs a command (like a rebuild) inside the app, showing its output as it runs"""
+
+import asyncio
+import shutil
+
+from textual import work
+from textual.app import ComposeResult
+from textual.containers import Horizontal, Vertical
+from textual.screen import ModalScreen
+from textual.widgets import Button, Input, Label, Log
+
+# How long a cancelled command has to stop before it is killed
+STOP_TIMEOUT = 5
+
+
+class CommandScreen(ModalScreen[int | None]):
+    """The screen which runs a command, streaming its output into a log, which can be cancelled while it runs
+
+    Note:
+        The screen is dismissed with the exit code of the command, or None if it was cancelled or could not be run.
+        As the command does not have the terminal to ask for a password on, commands run with sudo are run with
+        sudo -n if sudo already has the users credentials, and otherwise the password is asked for on this screen
+        and given to sudo -S
+    """
+
+    BINDINGS = [
+        ("escape", "quit_pressed")
+    ]
+
+    def __init__(self, command: list[str]) -> None:
+        """Stores the command to run
+
+        Args:
+            command: list[str] - the command
+        """
+
+        self.__command = command
+        self.__process: asyncio.subprocess.Process | None = None
+        self.__cancelled = False
+        self.__finished = False
+        self.__return_code: int | None = None
+        super().__init__()
+
+    def compose(self) -> ComposeResult:
+        """Defines what the command screen will look like
+
+        Returns:
+            ComposeResult - the screen in a form the library understands
+        """
+
+        with Vertical(id="command_screen"):
+            yield Label(f"Running {' '.join(self.__command)}")
+            yield Input(placeholder="The password for sudo", password=True, id="sudo_password")
+            yield Log(id="command_output")
+            with Horizontal(id="buttons"):
+                yield Button(label="Cancel", variant="error", id="cancel_command")
+
+    def on_mount(self) -> None:
+        """Hides the password input until it is needed and starts the command"""
+
+        self.query_one("#sudo_password", Input).display = False
+        self.__start()
+
+    @work(exclusive=True, group="command")
+    async def __start(self) -> None:
+        """Runs the command, asking for the password for sudo first if sudo does not already have it"""
+
+        if self.__command[0] != "sudo" or not shutil.which("sudo"):  # The log says if sudo is not installed
+            await self.__run(self.__command)
+        elif await self.__sudo_has_credentials():
+            await self.__run(["sudo", "-n"] + self.__command[1:])
+        else:
+            password_input = self.query_one("#sudo_password", Input)
+            password_input.display = True
+            password_input.focus()
+
+    def on_input_submitted(self, password: Input.Submitted) -> None:
+        """Runs the command with sudo once the password has been entered
+
+        Args:
+            password: Input.Submitted - the password
+        """
+
+        password.input.display = False
+        self.__run_with_password(password.value)
+
+    @work(exclusive=True, group="command")
+    async def __run_with_password(self, password: str) -> None:
+        """Runs the command with sudo reading the password from its input
+
+        Args:
+            password: str - the password
+        """
+
+        await self.__run(["sudo", "-S", "-p", ""] + self.__command[1:], password)
+
+    async def __run(self, command: list[str], password: str | None = None) -> None:
+        """Runs a command, writing its output and errors to the log as they come
+
+        Args:
+            command: list[str] - the command
+            password: str | None - the password to write to its input for sudo, if there is one
+        """
+
+        log = self.query_one("#command_output", Log)
+        try:
+            self.__process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.PIPE if password is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as error:
+            log.write_line(f"{command[0]} could not be run ({error.strerror})")
+            self.__finish(None)
+            return
+        try:
+            if password is not None and self.__process.stdin:
+                self.__process.stdin.write(password.encode() + b"\n")
+                await self.__process.stdin.drain()
+                self.__process.stdin.close()
+            await asyncio.gather(self.__stream(self.__process.stdout), self.__stream(self.__process.stderr))
+            return_code = await self.__process.wait()
+        except asyncio.CancelledError:  # The app is being quit
+            if self.__process.returncode is None:
+                self.__process.terminate()
+            raise
+        self.__finish(None if self.__cancelled else return_code)
+
+    async def __stream(self, stream: asyncio.StreamReader | None) -> None:
+        """Writes each line of an output of the command to the log as it comes
+
+        Args:
+            stream: asyncio.StreamReader | None - the output
+        """
+
+        if stream is None:
+            return
+        log = self.query_one("#command_output", Log)
+        async for line in stream:
+            log.write_line(line.decode(errors="replace").rstrip())
+
+    async def __sudo_has_credentials(self) -> bool:
+        """Checks if sudo can be run without a password
+
+        Returns:
+            bool - true if it can
+        """
+
+        check = await asyncio.create_subprocess_exec("sudo", "-n", "true", stdin=asyncio.subprocess.DEVNULL,
+                                                     stdout=asyncio.subprocess.DEVNULL,
+                                                     stderr=asyncio.subprocess.DEVNULL)
+        return await check.wait() == 0
+
+    def __finish(self, return_code: int | None) -> None:
+        """Tells the user how the command ended and turns the cancel button into a close button
+
+        Args:
+            return_code: int | None - the exit code of the command, None if it was cancelled or could not be run
+        """
+
+        self.__finished = True
+        self.__return_code = return_code
+        log = self.query_one("#command_output", Log)
+        if self.__cancelled:
+            log.write_line("Cancelled")
+        elif return_code == 0:
+            log.write_line("Command successful")
+        elif return_code is not None:
+            log.write_line(f"The command failed with exit code {return_code}")
+        button = self.query_one("#cancel_command", Button)
+        button.label = "Close"
+        button.variant = "primary"
+
+    def __cancel(self) -> None:
+        """Stops the command, killing it if it has not stopped after a few seconds"""
+
+        self.__cancelled = True
+        if self.__process is None:  # It is still waiting for the password
+            self.dismiss(None)
+        elif self.__process.returncode is None:
+            self.__process.terminate()
+            self.set_timer(STOP_TIMEOUT, self.__kill)
+
+    def __kill(self) -> None:
+        """Kills the command if it did not stop when it was cancelled"""
+
+        if self.__process and self.__process.returncode is None:
+            self.__process.kill()
+
+    def on_button_pressed(self, _: Button.Pressed) -> None:
+        """Cancels the command while it is running, and closes the screen once it has finished"""
+
+        self.action_quit_pressed()
+
+    def action_quit_pressed(self) -> None:
+        """Cancels the command while it is running, and closes the screen once it has finished"""
+
+        if self.__finished:
+            self.dismiss(self.__return_code)
+        elif not self.__cancelled:
+            self.__cancel()
@@ -1,8 +1,17 @@
 """The composer builds the output file if the user applies their changes"""
 
+import hashlib
 import re
 import os
-from dataclasses import dataclass
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from pathlib import Path
+import shutil
+import stat
+import tempfile
+from typing import Callable, TextIO
 
 from nix_tree.errors import NoValidHeadersNode, ErrorComposingFileFromTree
 from nix_tree.decomposer import DecomposerTree
@@ -10,55 +19,532 @@ from nix_tree.tree import VariableNode, ConnectorNode, Node
 from nix_tree.parsing import Types
 
 
+def compose_variable(node: VariableNode, prepend: str) -> str:
+    """Works out how a variable will look in the file, e.g. "enable = true"
+
+    Args:
+        node: VariableNode - the variable to compose
+        prepend: str - the indentation of the line the variable is on (for lists split over multiple lines)
+
+    Returns:
+        str - the variable in Nix, without the ending semicolon
+    """
+
+    # getting "x =" from "y.z.x = gosh" node
+    data = node.get_name().split(".")[-1] + " = "
+
+    if node.get_type() == Types.LIST:
+        if "'" not in node.get_data(): # If it isnt a list of strings
+            data_as_list = node.get_data().split(" ")
+            data_as_list = data_as_list[1:-1]
+            if len(data_as_list) >= 3: # Splitting the list to multiple lines if longer than 2 elements
+                data += "[\n"
+                for list_item in data_as_list:
+                    data += prepend + "  " + list_item + "\n"
+                data += prepend + "]"
+            else:
+                data += node.get_data()
+        else:
+            data_as_list = node.get_data().split("' '") # note the different splitting required
+            data_as_list = data_as_list[1:-1]
+            if len(data_as_list) >= 3:
+                data += "[\n"
+                for list_item in data_as_list:
+                    data += prepend + "  '" + list_item + "'\n"
+                data += prepend + "]"
+            else:
+                data += node.get_data()
+    else:
+        data += node.get_data()
+
+    #  to change ' back into "
+    if not re.search(r"^''.*''$", node.get_data()):
+        data = re.sub("'", "\"", data)
+
+    if node.get_type() == Types.LIST and "(" in data:  # needs to be handled with a with clause
+        with_clause = data[data.index("(") + 1:data.index(")")]
+        data = re.sub(rf"\({with_clause}\)\.", "", data)
+        data = data.split("=")[0] + "= with " + with_clause + ";" + data.split("=")[1]
+
+    return data
+
+
 @dataclass
 class ComposerIterator:
-    """An iterator that composer uses to build the file"""
+    """An iterator that composer uses to build the file
+
+    Note:
+        The output is stored as a list of finished chunks plus the line currently being built, so adding to the output
+        or placing a comment above the current line never has to copy what has already been generated.
+        If output is set, finished chunks are written straight to it instead of being kept in memory
+    """
 
     prepend: str = ""  # To store tabs
     previous_prepend: str = ""  # To store prev tabs
-    lines: str = ""  # To store current progress
+    chunks: list[str] = field(default_factory=list)  # To store the finished lines of the output
+    current_line: str = ""  # To store the line currently being built
+    last_character: str = ""  # To store the final character of the output
     previous_addition: str = ""  # To store what data was previously added (for comments)
+    output: TextIO | None = None  # To stream finished lines to a file
+    chunk_finished: bool = False  # To store whether any line has been finished yet
 
+    def add(self, addition: str) -> None:
+        """Appends a string to the end of the output
 
-class Composer:
-    """The class which contains the functionality to output the edited tree"""
+        Args:
+            addition: str - the string to append
+        """
 
-    def __init__(self, tree: DecomposerTree, file_location: str, write_over: bool, comments: bool):
-        """Defines the init function to take in the required variables
+        if not addition:
+            return
+        if "\n" in addition:
+            split_point = addition.rindex("\n") + 1
+            self.__finish_chunk(self.current_line + addition[:split_point])
+            self.current_line = addition[split_point:]
+        else:
+            self.current_line += addition
+        self.last_character = addition[-1]
+
+    def add_line_above(self, line: str) -> None:
+        """Inserts a line directly above the line currently being built
+
+        Args:
+            line: str - the line to insert (without the new line character)
+        """
+
+        if self.chunk_finished:
+            self.__finish_chunk(line + "\n")
+        else:  # Nothing has been finished yet so the line becomes the start of the file
+            self.__finish_chunk(line.strip() + "\n")
+
+    def finish(self, ending: str) -> None:
+        """Appends the ending of the file and writes everything left to the output
+
+        Args:
+            ending: str - the final string of the file
+        """
+
+        self.add(ending)
+        self.__finish_chunk(self.current_line)
+        self.current_line = ""
+
+    def get_lines(self) -> str:
+        """Returns everything that has been generated so far
+
+        Returns:
+            str - the output as one string (if streaming this is only what has not been written yet)
+        """
+
+        return "".join(self.chunks) + self.current_line
+
+    def __finish_chunk(self, chunk: str) -> None:
+        """Stores a finished chunk or writes it to the output if streaming
+
+        Args:
+            chunk: str - the finished chunk
+        """
+
+        if self.output:
+            self.output.write(chunk)
+        else:
+            self.chunks.append(chunk)
+        self.chunk_finished = True
+
+
+class RenderCache:
+    """A cache of how sections have been composed, so unchanged sections do not need composing again when the same
+    tree (or a tree with the same sections) is composed multiple times
+
+    Note:
+        Sections are looked up by the content hash of their node together with the state the composer was in when it
+        reached them, so a change to a variable only stops the sections containing it from being found.
+        The least recently used sections are forgotten once more than max_characters are stored
+    """
+
+    def __init__(self, max_characters: int = 1_000_000) -> None:
+        """Creates an empty cache
+
+        Args:
+            max_characters: int - the most characters of composed output to keep
+        """
+
+        self.__max_characters = max_characters
+        self.__characters = 0
+        self.__sections: OrderedDict[tuple, ComposerIterator] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__sections)
+
+    def get(self, key: tuple) -> ComposerIterator | None:
+        """Finds a composed section
+
+        Args:
+            key: tuple - the content hash of the section and the state of the composer before it
+
+        Returns:
+            ComposerIterator | None - the composed section and the state after it, or None if it is not stored
+        """
+
+        section = self.__sections.get(key)
+        if section is not None:
+            self.__sections.move_to_end(key)
+        return section
+
+    def put(self, key: tuple, section: ComposerIterator) -> None:
+        """Stores a composed section, forgetting the least recently used sections if there are too many characters
+
+        Args:
+            key: tuple - the content hash of the section and the state of the composer before it
+            section: ComposerIterator - the composed section and the state after it
+        """
+
+        size = len(section.get_lines())
+        if size > self.__max_characters:
+            return
+        if key in self.__sections:
+            self.__characters -= len(self.__sections.pop(key).get_lines())
+        self.__sections[key] = section
+        self.__characters += size
+        while self.__characters > self.__max_characters:
+            _, forgotten = self.__sections.popitem(last=False)
+            self.__characters -= len(forgotten.get_lines())
+
+
+def work_out_output_location(file_location: str, write_over: bool) -> str:
+    """Works out where the edited file should be written to
+
+    Args:
+        file_location: str - the location of the original file
+        write_over: bool - whether to write over the file or append .new to the file name
+
+    Returns:
+        str - the location to write to
+
+    Note:
+        The file is written into a temporary file next to it (which backups are also kept next to), so the directory
+        it is in has to be writable as well as the file
+    """
+
+    if os.access(file_location, os.W_OK) and os.access(Path(file_location).resolve().parent, os.W_OK):
+        if write_over:
+            return file_location
+        return file_location + ".new"
+    print("\033[93m No permission to write to the file/directory containing the original file, writing to current directory instead \033[91m")
+    return os.getcwd() + "/" + file_location.split("/")[-1:][0]
+
+
+def hash_file(file_location: Path) -> str:
+    """Works out the hash of the contents of a file
+
+    Args:
+        file_location: Path - the file to hash
+
+    Returns:
+        str - the sha256 hash as a hex string
+    """
+
+    with open(file_location, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+class AtomicFileWriter:
+    """Writes a file by streaming it into a temporary file next to it, which then replaces the file
+
+    Note:
+        The temporary file is in the same directory as the file being written to, so the final rename is atomic
+        and the file is never left half written if the program is stopped part way through.
+        If the new contents are the same as the file already there, the file is left alone (keeping its modification
+        time) and no backup is made
+    """
+
+    def __init__(self, file_location: str, original_location: str, backups: int = 0) -> None:
+        """Stores where to write to and how many backups to keep
 
         Args:
-            tree: DecomposerTree - the tree to build the file from
             file_location: str - the location of the file to write to
-            write_over: bool - whether to write over the file or append .new to the file name
+            original_location: str - the location of the original configuration file (used for the files mode if the
+            file being written to does not exist yet)
+            backups: int - how many backups of the file being written over to keep (0 to keep none)
+
+        Note:
+            If the file is a symlink (as configurations kept with dotfiles often are) the file it links to is written,
+            so the link is kept
+        """
+
+        self.__target = Path(file_location).resolve()
+        self.__original_location = Path(original_location)
+        self.__backups = backups
+
+    def write(self, write_contents: Callable[[TextIO], None]) -> bool:
+        """Streams the file into a temporary file and then renames it over the target
+
+        Args:
+            write_contents: Callable[[TextIO], None] - a function which writes the contents to the file it is given
+
+        Returns:
+            bool - true if the file was written, false if it already had the same contents
+        """
+
+        file_descriptor, temporary_location = tempfile.mkstemp(
+            prefix=f".{self.__target.name}.", suffix=".tmp", dir=self.__target.parent
+        )
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+                write_contents(file)
+                file.flush()
+                os.fsync(file.fileno())
+            if self.__target.is_file() and self.__target.stat().st_size == os.path.getsize(temporary_location) \
+                    and hash_file(self.__target) == hash_file(Path(temporary_location)):
+                Path(temporary_location).unlink()
+                return False
+            self.__copy_permissions(Path(temporary_location))
+            if self.__backups > 0 and self.__target.exists():
+                self.__rotate_backups()
+            os.replace(temporary_location, self.__target)
+        except BaseException:  # Including KeyboardInterrupt, so the temporary file is never left behind
+            Path(temporary_location).unlink(missing_ok=True)
+            raise
+        self.__sync_directory(self.__target.parent)
+        return True
+
+    def __copy_permissions(self, temporary_file: Path) -> None:
+        """Gives the temporary file the mode and ownership of the file it is replacing
+
+        Args:
+            temporary_file: Path - the temporary file that has been written
+
+        Note:
+            If the target does not exist yet (e.g. a .new file) the original configuration file is used instead, and if
+            that does not exist the default mode for a new file is used
+        """
+
+        for reference in (self.__target, self.__original_location):
+            if reference.is_file():
+                file_stat = reference.stat()
+                os.chmod(temporary_file, stat.S_IMODE(file_stat.st_mode))
+                try:
+                    os.chown(temporary_file, file_stat.st_uid, file_stat.st_gid)
+                except PermissionError:  # Only root can give files away, the mode is still kept
+                    pass
+                return
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temporary_file, 0o666 & ~umask)
+
+    def __rotate_backups(self) -> None:
+        """Keeps the file being written over as target.bak.1, moving older backups up by one and deleting the oldest"""
+
+        for backup_number in range(self.__backups - 1, 0, -1):
+            backup = self.__target.with_name(f"{self.__target.name}.bak.{backup_number}")
+            if backup.exists():
+                os.replace(backup, self.__target.with_name(f"{self.__target.name}.bak.{backup_number + 1}"))
+        newest_backup = self.__target.with_name(f"{self.__target.name}.bak.1")
+        newest_backup.unlink(missing_ok=True)
+        try:
+            os.link(self.__target, newest_backup)  # The target stays in place until it is atomically replaced
+        except OSError:  # If the file system does not support hard links
+            shutil.copy2(self.__target, newest_backup)
+
+    @staticmethod
+    def __sync_directory(directory: Path) -> None:
+        """Flushes the directory entry so the rename survives a crash
+
+        Args:
+            directory: Path - the directory containing the written file
+        """
+
+        try:
+            directory_descriptor = os.open(directory, os.O_RDONLY)
+        except OSError:  # Not every platform allows opening directories
+            return
+        try:
+            os.fsync(directory_descriptor)
+        except OSError:
+            pass
+        finally:
+            os.close(directory_descriptor)
+
+
+def compose_section(node: Node, comments: bool, prepend: str, previous_prepend: str) -> ComposerIterator:
+    """Composes one top level section on its own, this is what the worker processes run when composing in parallel
+
+    Args:
+        node: Node - the section to compose
+        comments: bool - whether to include comments from the original file
+        prepend: str - the indentation of the section
+        previous_prepend: str - the indentation of the section containing it
+
+    Returns:
+        ComposerIterator - the iterator containing the composed section and its state after composing it
+    """
+
+    composer_iterator = ComposerIterator(prepend=prepend, previous_prepend=previous_prepend, previous_addition="\n",
+                                         last_character="\n", chunk_finished=True)
+    SectionComposer(composer_iterator, comments).compose(node)
+    return composer_iterator
+
+
+class SectionComposer:
+    """The class which composes the tree (or part of it) into lines, using its own composer iterator"""
+
+    def __init__(self, composer_iterator: ComposerIterator, comments: bool, jobs: int = 1,
+                 parallel_node: ConnectorNode | None = None, render_cache: RenderCache | None = None) -> None:
+        """Stores the iterator to compose into and how to compose
+
+        Args:
+            composer_iterator: ComposerIterator - the iterator to add the lines to
             comments: bool - whether to include comments from the original file
+            jobs: int - how many worker processes to compose the sections of parallel_node with
+            parallel_node: ConnectorNode | None - the node whose sections are composed in parallel (usually the root)
+            render_cache: RenderCache | None - the cache to reuse composed sections from, None to not cache
         """
 
-        self.__tree = tree
-        if os.access(file_location, os.W_OK):
-            if write_over:
-                self.__file_location = file_location
-            else:
-                self.__file_location = file_location + ".new"
-        else:
-            print("\033[93m No permission to write to the file/directory containing the original file, writing to current directory instead \033[91m")
-            self.__file_location = os.getcwd() + "/" + file_location.split("/")[-1:][0]
-        self.__composer_iterator = ComposerIterator()
-        self.__write_to_file(comments)
+        self.__composer_iterator = composer_iterator
+        self.__comments = comments
+        self.__jobs = jobs
+        self.__parallel_node = parallel_node
+        self.__render_cache = render_cache
+
+    def compose(self, node: Node) -> None:
+        """Composes a node and everything below it, reusing the composed section from the cache if possible
+
+        Args:
+            node: Node - the node to compose
+        """
+
+        key = self.__cache_key(node)
+        if self.__render_cache is None or key is None:
+            self.__render(node)
+            return
+        section = self.__render_cache.get(key)
+        if section is None:
+            section = self.__render_alone(node)
+            self.__render_cache.put(key, section)
+        self.__add_section(section)
 
-    def __write_to_file(self, comments: bool):
-        """Performs the writing by calling the appropriate functions and writing to the file
+    def __render(self, node: Node) -> None:
+        """Composes a node and everything below it into the iterator
 
         Args:
-            comments: bool - whether comments should be included from the original file
+            node: Node - the node to compose
         """
 
-        self.__separate_and_add_headers()
-        if comments:
-            self.__work_out_lines_comments(self.__tree.get_root())
+        if self.__comments:
+            self.__work_out_lines_comments(node)
         else:
-            self.__work_out_lines_no_comments(self.__tree.get_root())
-        with open(self.__file_location, "w", encoding="utf-8") as file:
-            file.write(self.__composer_iterator.lines + "}\n")
+            self.__work_out_lines_no_comments(node)
+
+    def __cache_key(self, node: Node) -> tuple | None:
+        """Works out what a section is stored under in the render cache
+
+        Args:
+            node: Node - the section
+
+        Returns:
+            tuple | None - the key, or None if the section cannot be cached
+
+        Note:
+            Only sections starting on a new line are cached, as a section continuing a line (like the z in x.y.z)
+            can place comments above the part of the line before it
+        """
+
+        if not isinstance(node, ConnectorNode) or self.__composer_iterator.last_character != "\n" \
+                or not self.__composer_iterator.chunk_finished:
+            return None
+        return (node.get_content_hash(), self.__comments, self.__composer_iterator.prepend,
+                self.__composer_iterator.previous_prepend, self.__composer_iterator.previous_addition[-1:])
+
+    def __render_alone(self, node: Node) -> ComposerIterator:
+        """Composes a section into its own iterator, starting from the state of this iterator
+
+        Args:
+            node: Node - the section to compose
+
+        Returns:
+            ComposerIterator - the iterator containing the composed section and its state after composing it
+        """
+
+        section = ComposerIterator(prepend=self.__composer_iterator.prepend,
+                                   previous_prepend=self.__composer_iterator.previous_prepend,
+                                   previous_addition=self.__composer_iterator.previous_addition[-1:],
+                                   last_character="\n", chunk_finished=True)
+        SectionComposer(section, self.__comments, render_cache=self.__render_cache).__render(node)
+        section.chunks = [section.get_lines()]  # Joined once so it is cheap to add each time it is reused
+        section.current_line = ""
+        return section
+
+    def __add_section(self, section: ComposerIterator) -> None:
+        """Adds a section that was composed on its own to the iterator, and takes on the state after it
+
+        Args:
+            section: ComposerIterator - the composed section
+        """
+
+        self.__composer_iterator.add(section.get_lines())
+        self.__composer_iterator.previous_addition = section.previous_addition
+        self.__composer_iterator.prepend = section.prepend
+        self.__composer_iterator.previous_prepend = section.previous_prepend
+
+    def __compose_children(self, node: ConnectorNode) -> None:
+        """Composes the children of a connector node, in worker processes if it is the node to parallelise
+
+        Args:
+            node: ConnectorNode - the node whose children should be composed
+        """
+
+        children = node.get_connected_nodes()
+        if node is self.__parallel_node and self.__jobs > 1 and len(children) > 1:
+            sections = self.__compose_in_parallel(children)
+            if sections:
+                for section in sections:
+                    self.__add_section(section)
+                return
+        for child in children:
+            self.compose(child)
+
+    def __compose_in_parallel(self, children: list[Node]) -> list[ComposerIterator] | None:
+        """Composes the sections in worker processes
+
+        Args:
+            children: list[Node] - the sections to compose
+
+        Returns:
+            list[ComposerIterator] | None - the composed sections in order, or None if they need composing in order
+
+        Note:
+            Every section starts on a new line with the same indentation, so they can be composed on their own and
+            joined in order. If a section does not end on a new line the next one would depend on it, so None is
+            returned and everything is composed in order to keep the output the same.
+            Sections found in the render cache are not sent to the worker processes
+        """
+
+        keys: list[tuple | None] = [None] * len(children)
+        sections: list[ComposerIterator | None] = [None] * len(children)
+        if self.__render_cache is not None and self.__composer_iterator.previous_addition.endswith("\n"):
+            keys = [self.__cache_key(child) for child in children]
+            sections = [self.__render_cache.get(key) if key else None for key in keys]
+        missing = [i for i, section in enumerate(sections) if section is None]
+        if missing:
+            try:
+                with ProcessPoolExecutor(max_workers=self.__jobs) as executor:
+                    composed = list(executor.map(
+                        compose_section,
+                        [children[i] for i in missing],
+                        repeat(self.__comments),
+                        repeat(self.__composer_iterator.prepend),
+                        repeat(self.__composer_iterator.previous_prepend),
+                    ))
+            except Exception:  # Composing in order raises the error itself with the output so far
+                return None
+            for i, section in zip(missing, composed):
+                sections[i] = section
+                key = keys[i]
+                if self.__render_cache is not None and key is not None:
+                    self.__render_cache.put(key, section)
+        for section in sections[:-1]:
+            if section.last_character != "\n" or not section.previous_addition.endswith("\n"):
+                return None
+        return [section for section in sections if section is not None]
 
     def __work_out_lines_comments(self, node: Node) -> None:
         """Writes to the file if comments are to be attached
@@ -76,57 +562,53 @@ class Composer:
         if node.get_comments():
             for comment in node.get_comments():
                 if comment[1]:  # Need to insert above current line (the true false variable in the comment tuple)
-                    before_comment = self.__composer_iterator.lines.split("\n")[:-1]
-                    post_comment = self.__composer_iterator.lines.split("\n")[-1]
-                    before_comment_str = '\n'.join(before_comment) + "\n" + self.__composer_iterator.prepend + comment[0]
-                    self.__composer_iterator.lines = before_comment_str.strip() + "\n" + post_comment
+                    self.__composer_iterator.add_line_above(self.__composer_iterator.prepend + comment[0])
                 else:
                     comment_for_after = comment[0]
         if isinstance(node, ConnectorNode):
             if len(node.get_connected_nodes()) > 1:
                 if self.__composer_iterator.previous_addition[-1] != ":":
                     if self.__composer_iterator.previous_addition[-1] == ".":
-                        self.__composer_iterator.lines += node.get_name() + " = {\n" + comment_for_after
+                        self.__composer_iterator.add(node.get_name() + " = {\n" + comment_for_after)
                         self.__composer_iterator.previous_addition = node.get_name() + " = {\n"
                     elif self.__composer_iterator.previous_addition[-1] == "\n":
-                        self.__composer_iterator.lines += self.__composer_iterator.prepend + node.get_name() + " = {\n" + comment_for_after
+                        self.__composer_iterator.add(self.__composer_iterator.prepend + node.get_name() + " = {\n" + comment_for_after)
                         self.__composer_iterator.previous_addition = self.__composer_iterator.prepend + node.get_name() + " = {\n"
                     else:
                         raise ErrorComposingFileFromTree(
-                                f"There was an error composing the file from the tree, here is what has been generated already {self.__composer_iterator.lines}"
+                                f"There was an error composing the file from the tree, here is what has been generated already {self.__composer_iterator.get_lines()}"
                         )
                 else:
-                    self.__composer_iterator.lines += "\n\n{\n"
+                    self.__composer_iterator.add("\n\n{\n")
                     self.__composer_iterator.previous_addition = "\n\n{\n"
                 self.__composer_iterator.previous_prepend = self.__composer_iterator.prepend
                 self.__composer_iterator.prepend += "  "
-                for singular_node in node.get_connected_nodes():
-                    self.__work_out_lines_comments(singular_node)
+                self.__compose_children(node)
 
                 if self.__composer_iterator.previous_prepend != "":
-                    self.__composer_iterator.lines += self.__composer_iterator.previous_prepend + "};\n"
+                    self.__composer_iterator.add(self.__composer_iterator.previous_prepend + "};\n")
                     self.__composer_iterator.previous_addition = self.__composer_iterator.previous_addition + "};\n"
                 else:  # Then it is the end of the file
                     pass
                 self.__composer_iterator.prepend = self.__composer_iterator.previous_prepend
                 self.__composer_iterator.previous_prepend = self.__composer_iterator.previous_prepend[2:]
                 if len(self.__composer_iterator.prepend) == 2:
-                    self.__composer_iterator.lines += "\n"
+                    self.__composer_iterator.add("\n")
                     self.__composer_iterator.previous_addition += "\n"
             elif len(node.get_connected_nodes()) == 1:
                 if self.__composer_iterator.previous_addition[-1] != ":":
                     if self.__composer_iterator.previous_addition[-1] == ".":
-                        self.__composer_iterator.lines += node.get_name() + "."
+                        self.__composer_iterator.add(node.get_name() + ".")
                         self.__composer_iterator.previous_addition = node.get_name() + "."
-                    elif self.__composer_iterator.lines[-1] == "\n":
-                        self.__composer_iterator.lines += self.__composer_iterator.prepend + node.get_name() + "."
+                    elif self.__composer_iterator.last_character == "\n":
+                        self.__composer_iterator.add(self.__composer_iterator.prepend + node.get_name() + ".")
                         self.__composer_iterator.previous_addition = self.__composer_iterator.prepend + node.get_name() + "."
                     else:
                         raise ErrorComposingFileFromTree(
-                                f"There was an error composing the file from the tree, here is what has been generated already {self.__composer_iterator.lines}"
+                                f"There was an error composing the file from the tree, here is what has been generated already {self.__composer_iterator.get_lines()}"
                         )
                 else:
-                    self.__composer_iterator.lines += "\n\n{\n"
+                    self.__composer_iterator.add("\n\n{\n")
                     self.__composer_iterator.previous_addition += "\n\n{\n"
                     self.__composer_iterator.previous_prepend = self.__composer_iterator.prepend
                     self.__composer_iterator.prepend += "  "
@@ -134,59 +616,26 @@ class Composer:
             else:
                 pass
         elif isinstance(node, VariableNode):
-            data = node.get_name().split(".")[-1] + " = "
-
-            if node.get_type() == Types.LIST:
-                if "'" not in node.get_data():
-                    data_as_list = node.get_data().split(" ")
-                    data_as_list = data_as_list[1:-1]
-                    if len(data_as_list) >= 3:
-                        data += "[\n"
-                        for list_item in data_as_list:
-                            data += self.__composer_iterator.prepend + "  " + list_item + "\n"
-                        data += self.__composer_iterator.prepend + "]"
-                    else:
-                        data += node.get_data()
-                else:
-                    data_as_list = node.get_data().split("' '")
-                    data_as_list = data_as_list[1:-1]
-                    if len(data_as_list) >= 3:
-                        data += "[\n"
-                        for list_item in data_as_list:
-                            data += self.__composer_iterator.prepend + "  '" + list_item + "'\n"
-                        data += self.__composer_iterator.prepend + "]"
-                    else:
-                        data += node.get_data()
-            else:
-                data += node.get_data()
-
-            #  to change ' back into "
-            if not re.search(r"^''.*''$", node.get_data()):
-                data = re.sub("'", "\"", data)
-
-            if node.get_type() == Types.LIST and "(" in data:  # needs to be handled with a with clause
-                with_clause = data[data.index("(") + 1:data.index(")")]
-                data = re.sub(rf"\({with_clause}\)\.", "", data)
-                data = data.split("=")[0] + "= with " + with_clause + ";" + data.split("=")[1]
+            data = compose_variable(node, self.__composer_iterator.prepend)
 
             if self.__composer_iterator.previous_addition[-1] == ".":
                 if comment_for_after != "":
-                    self.__composer_iterator.lines += data + "; " + comment_for_after
+                    self.__composer_iterator.add(data + "; " + comment_for_after)
                 else:
-                    self.__composer_iterator.lines += data + ";\n"
+                    self.__composer_iterator.add(data + ";\n")
                 self.__composer_iterator.previous_addition = data + ";\n"
             elif self.__composer_iterator.previous_addition[-1] == "\n":
                 if comment_for_after != "":
-                    self.__composer_iterator.lines += self.__composer_iterator.prepend + data + "; " + comment_for_after
+                    self.__composer_iterator.add(self.__composer_iterator.prepend + data + "; " + comment_for_after)
                 else:
-                    self.__composer_iterator.lines += self.__composer_iterator.prepend + data + ";\n"
+                    self.__composer_iterator.add(self.__composer_iterator.prepend + data + ";\n")
                 self.__composer_iterator.previous_addition = self.__composer_iterator.prepend + data + ";\n"
             else:
                 raise ErrorComposingFileFromTree(
-                    f"There was an error composing the file from the tree, the previous character was unexpected, here is what there is currently: {self.__composer_iterator.lines}"
+                    f"There was an error composing the file from the tree, the previous character was unexpected, here is what there is currently: {self.__composer_iterator.get_lines()}"
                 )
             if len(self.__composer_iterator.prepend) == 2:
-                self.__composer_iterator.lines += "\n"
+                self.__composer_iterator.add("\n")
                 self.__composer_iterator.previous_addition += "\n"
 
     def __work_out_lines_no_comments(self, node: Node) -> None:
@@ -200,17 +649,17 @@ class Composer:
             if len(node.get_connected_nodes()) > 1: # To check if we should split it with curly braecs or not
 
                 # Managing the placing of the start of the group
-                if self.__composer_iterator.lines[-1] != ":":
-                    if self.__composer_iterator.lines[-1] == ".": # if this is already part of a path like x. already exists
-                        self.__composer_iterator.lines += node.get_name() + " = {\n"
-                    elif self.__composer_iterator.lines[-1] == "\n": # new line so not part of path - means that the for tabs needs to be added
-                        self.__composer_iterator.lines += self.__composer_iterator.prepend + node.get_name() + " = {\n"
+                if self.__composer_iterator.last_character != ":":
+                    if self.__composer_iterator.last_character == ".": # if this is already part of a path like x. already exists
+                        self.__composer_iterator.add(node.get_name() + " = {\n")
+                    elif self.__composer_iterator.last_character == "\n": # new line so not part of path - means that the for tabs needs to be added
+                        self.__composer_iterator.add(self.__composer_iterator.prepend + node.get_name() + " = {\n")
                     else:
                         raise ErrorComposingFileFromTree(
-                                f"There was an error composing the file from the tree, here is what has been generated already {self.__composer_iterator.lines}"
+                                f"There was an error composing the file from the tree, here is what has been generated already {self.__composer_iterator.get_lines()}"
                         )
                 else:
-                    self.__composer_iterator.lines += "\n\n{\n" # If it is a new file! (only run on first iteration)
+                    self.__composer_iterator.add("\n\n{\n") # If it is a new file! (only run on first iteration)
                     self.__composer_iterator.previous_prepend = self.__composer_iterator.prepend # need to indent in
                     self.__composer_iterator.prepend += "  "
 
@@ -218,13 +667,12 @@ class Composer:
                 self.__composer_iterator.previous_prepend = self.__composer_iterator.prepend # Updating the prepend (to go down indent later)
                 self.__composer_iterator.prepend += "  " # indenting a bit more - we just opened curly braces!
 
-                for singular_node in node.get_connected_nodes():
-                    # Recursive calling!
-                    self.__work_out_lines_no_comments(singular_node)
+                # Recursive calling!
+                self.__compose_children(node)
 
 
                 if self.__composer_iterator.previous_prepend != "":
-                    self.__composer_iterator.lines += self.__composer_iterator.previous_prepend + "};\n" # Need to shut the group
+                    self.__composer_iterator.add(self.__composer_iterator.previous_prepend + "};\n") # Need to shut the group
                 else:  # Then it is the end of the file as we have shut the final group (the large {})
                     pass
 
@@ -234,22 +682,22 @@ class Composer:
 
                 # This is to make the base indent level more spaced out
                 if len(self.__composer_iterator.prepend) == 2:
-                    self.__composer_iterator.lines += "\n"
+                    self.__composer_iterator.add("\n")
 
             elif len(node.get_connected_nodes()) == 1: # If there is only one child
 
                 # Slightly different to above - no curly brace
-                if self.__composer_iterator.lines[-1] != ":":
-                    if self.__composer_iterator.lines[-1] == ".":
-                        self.__composer_iterator.lines += node.get_name() + "."
-                    elif self.__composer_iterator.lines[-1] == "\n":
-                        self.__composer_iterator.lines += self.__composer_iterator.prepend + node.get_name() + "."
+                if self.__composer_iterator.last_character != ":":
+                    if self.__composer_iterator.last_character == ".":
+                        self.__composer_iterator.add(node.get_name() + ".")
+                    elif self.__composer_iterator.last_character == "\n":
+                        self.__composer_iterator.add(self.__composer_iterator.prepend + node.get_name() + ".")
                     else:
                         raise ErrorComposingFileFromTree(
-                                f"There was an error composing the file from the tree, here is what has been generated already {self.__composer_iterator.lines}"
+                                f"There was an error composing the file from the tree, here is what has been generated already {self.__composer_iterator.get_lines()}"
                         )
                 else:
-                    self.__composer_iterator.lines += "\n\n{\n"
+                    self.__composer_iterator.add("\n\n{\n")
                     self.__composer_iterator.previous_prepend = self.__composer_iterator.prepend # need to indent in
                     self.__composer_iterator.prepend += "  "
 
@@ -258,79 +706,110 @@ class Composer:
             else:
                 pass
         elif isinstance(node, VariableNode):
-            # getting "x =" from "y.z.x = gosh" node
-            data = node.get_name().split(".")[-1] + " = "
-
-            if node.get_type() == Types.LIST:
-                if "'" not in node.get_data(): # If it isnt a list of strings
-                    data_as_list = node.get_data().split(" ")
-                    data_as_list = data_as_list[1:-1]
-                    if len(data_as_list) >= 3: # Splitting the list to multiple lines if longer than 2 elements
-                        data += "[\n"
-                        for list_item in data_as_list:
-                            data += self.__composer_iterator.prepend + "  " + list_item + "\n"
-                        data += self.__composer_iterator.prepend + "]"
-                    else:
-                        data += node.get_data()
-                else:
-                    data_as_list = node.get_data().split("' '") # note the different splitting required
-                    data_as_list = data_as_list[1:-1]
-                    if len(data_as_list) >= 3:
-                        data += "[\n"
-                        for list_item in data_as_list:
-                            data += self.__composer_iterator.prepend + "  '" + list_item + "'\n"
-                        data += self.__composer_iterator.prepend + "]"
-                    else:
-                        data += node.get_data()
-            else:
-                data += node.get_data()
-
-            #  to change ' back into "
-            if not re.search(r"^''.*''$", node.get_data()):
-                data = re.sub("'", "\"", data)
-
-            if node.get_type() == Types.LIST and "(" in data:  # needs to be handled with a with clause
-                with_clause = data[data.index("(") + 1:data.index(")")]
-                data = re.sub(rf"\({with_clause}\)\.", "", data)
-                data = data.split("=")[0] + "= with " + with_clause + ";" + data.split("=")[1]
+            data = compose_variable(node, self.__composer_iterator.prepend)
 
             # handling adding it in
-            if self.__composer_iterator.lines[-1] == ".": # end of a connector like x.y now adding z = enable
-                self.__composer_iterator.lines += data + ";\n"
-            elif self.__composer_iterator.lines[-1] == "\n":
-                self.__composer_iterator.lines += self.__composer_iterator.prepend + data + ";\n" # indenting!!!!
+            if self.__composer_iterator.last_character == ".": # end of a connector like x.y now adding z = enable
+                self.__composer_iterator.add(data + ";\n")
+            elif self.__composer_iterator.last_character == "\n":
+                self.__composer_iterator.add(self.__composer_iterator.prepend + data + ";\n") # indenting!!!!
             else:
                 raise ErrorComposingFileFromTree(
-                    f"There was an error composing the file from the tree, the previous character was unexpected, here is what there is currently: {self.__composer_iterator.lines}"
+                    f"There was an error composing the file from the tree, the previous character was unexpected, here is what there is currently: {self.__composer_iterator.get_lines()}"
                 )
 
-    def __separate_and_add_headers(self) -> None:
+
+class Composer:
+    """The class which contains the functionality to output the edited tree"""
+
+    def __init__(self, tree: DecomposerTree, file_location: str, write_over: bool, comments: bool, backups: int = 0,
+                 jobs: int = 1, render_cache: RenderCache | None = None, output: TextIO | None = None):
+        """Defines the init function to take in the required variables
+
+        Args:
+            tree: DecomposerTree - the tree to build the file from
+            file_location: str - the location of the file to write to
+            write_over: bool - whether to write over the file or append .new to the file name
+            comments: bool - whether to include comments from the original file
+            backups: int - how many backups of the file being written over to keep (0 to keep none)
+            jobs: int - how many worker processes to compose the top level sections with
+            render_cache: RenderCache | None - a cache shared between compositions, so sections that have not
+            changed since the last time are not composed again
+            output: TextIO | None - if given the file is written to this instead of to disk (e.g. for previewing)
+        """
+
+        self.__tree = tree
+        self.__composer_iterator = ComposerIterator()
+        self.__comments = comments
+        self.__jobs = jobs
+        self.__render_cache = render_cache
+        self.__written = False
+        if output is not None:
+            self.__write_to_file(output)
+        else:
+            self.__written = AtomicFileWriter(work_out_output_location(file_location, write_over), file_location,
+                                              backups).write(self.__write_to_file)
+
+    def get_written(self) -> bool:
+        """Returns whether the file was written, it is not if it already contained exactly the composed output
+
+        Returns:
+            bool - true if the file was written
+        """
+
+        return self.__written
+
+    def __write_to_file(self, file: TextIO) -> None:
+        """Performs the writing by calling the appropriate functions, streaming finished lines to the file
+
+        Args:
+            file: TextIO - the file to write to
+
+        Note:
+            The headers node is put back into the tree afterwards, so the same tree can be composed again
+        """
+
+        self.__composer_iterator.output = file
+        headers_position, headers_node = self.__separate_and_add_headers()
+        try:
+            SectionComposer(self.__composer_iterator, self.__comments, self.__jobs, self.__tree.get_root(),
+                            self.__render_cache).compose(self.__tree.get_root())
+        finally:
+            self.__tree.get_root().add_node(headers_node, headers_position)
+        self.__composer_iterator.finish("}\n")
+
+    def __separate_and_add_headers(self) -> tuple[int, VariableNode]:
         """Separates the headers from the tree and adds them to the file
 
+        Returns:
+            tuple[int, VariableNode] - where the headers node was in the children of the root, and the headers node
+
         Note:
             This is required due to the unique syntax of headers in a Nix file
         """
 
         headers_node = None
-        for singular_node in self.__tree.get_root().get_connected_nodes():
+        headers_position = 0
+        for i, singular_node in enumerate(self.__tree.get_root().get_connected_nodes()):
             if singular_node.get_name() == "headers":
                 headers_node = singular_node
+                headers_position = i
         if isinstance(headers_node, VariableNode):
             headers: str = headers_node.get_data()
             headers = re.sub(r"\[|]", "", headers)
             headers_as_list = headers.split(", ")
             if len(headers_as_list) >= 4:
-                self.__composer_iterator.lines += "{ "
+                self.__composer_iterator.add("{ ")
                 for header in headers_as_list:
                     if header != headers_as_list[-1]:  # to avoid putting a comma on the final header
-                        self.__composer_iterator.lines += header.strip() + ",\n"
+                        self.__composer_iterator.add(header.strip() + ",\n")
                     else:
-                        self.__composer_iterator.lines += header.strip() + "\n"
-                self.__composer_iterator.lines += "}:"
+                        self.__composer_iterator.add(header.strip() + "\n")
+                self.__composer_iterator.add("}:")
                 self.__composer_iterator.previous_addition = "}:"
             else:
-                self.__composer_iterator.lines += "{" + headers + "}:"
+                self.__composer_iterator.add("{" + headers + "}:")
                 self.__composer_iterator.previous_addition = "}:"
             self.__tree.get_root().remove_child_variable_node(headers_node.get_name() + "=" + headers_node.get_data())
-        else:
-            raise NoValidHeadersNode
+            return headers_position, headers_node
+        raise NoValidHeadersNode
@@ -3,6 +3,7 @@
 from dataclasses import dataclass
 from pathlib import Path
 import re
+from typing import Callable
 
 from nix_tree.stacks import GroupsStack
 from nix_tree.tree import DecomposerTree, Node, VariableNode
@@ -119,25 +120,331 @@ class CommentHandling:
         return self.__comments
 
 
+@dataclass
+class SourceSpan:
+    """Where a variable or section is in the original file, as character offsets
+
+    Note:
+        For a variable the value is what comes after the equals, for a section it is from the opening curly brace to
+        the closing curly brace. The end is just after the semicolon
+    """
+    start: int
+    value_start: int
+    value_end: int
+    end: int
+
+
+class SourceSpans:
+    """Class to record where every variable and section is in the original file, so it can be patched instead of
+    being composed again from the tree"""
+
+    IDENTIFIER = re.compile(r"[a-zA-Z_][a-zA-Z0-9_'-]*")
+
+    def __init__(self, file_path: Path) -> None:
+        """Reads the file and records the spans of the variables and sections in it
+
+        Args:
+            file_path: Path - The file path for the Nix configuration file
+
+        Note:
+            If the file uses syntax this does not understand no spans are stored and is_valid returns false, the
+            decomposer itself is unaffected
+        """
+
+        self.__source: str = file_path.read_text(encoding="utf-8")
+        self.__variable_spans: dict[str, SourceSpan] = {}
+        self.__section_spans: dict[str, SourceSpan] = {}
+        try:
+            self.__scan_file()
+            self.__valid = True
+        except (IndexError, ValueError):
+            self.__variable_spans = {}
+            self.__section_spans = {}
+            self.__valid = False
+
+    def is_valid(self) -> bool:
+        """Returns whether the spans could be recorded for the file
+
+        Returns:
+            bool - true if the spans were recorded
+        """
+
+        return self.__valid
+
+    def get_source(self) -> str:
+        """Returns the original file
+
+        Returns:
+            str - the original file as a string
+        """
+
+        return self.__source
+
+    def get_variable_span(self, path: str) -> SourceSpan | None:
+        """Returns the span of a variable
+
+        Args:
+            path: str - the full path of the variable, as it is named in the tree
+
+        Returns:
+            SourceSpan | None - the span, or None if the variable is not in the original file
+        """
+
+        return self.__variable_spans.get(path)
+
+    def get_section_span(self, path: str) -> SourceSpan | None:
+        """Returns the span of a section, only sections with their own curly braces have spans
+
+        Args:
+            path: str - the full path of the section, the root of the file is ""
+
+        Returns:
+            SourceSpan | None - the span, or None if the section does not have its own curly braces
+        """
+
+        return self.__section_spans.get(path)
+
+    def __scan_file(self) -> None:
+        """Skips the headers and scans the main body of the file
+
+        Raises:
+            ValueError - if the file does not look as expected
+        """
+
+        i = self.__skip_whitespace_and_comments(0)
+        if self.__source[i] != "{":
+            raise ValueError("Expected the headers")
+        i = self.__skip_whitespace_and_comments(self.__skip_brackets(i) + 1)
+        if self.__source[i] != ":":
+            raise ValueError("Expected a colon after the headers")
+        i = self.__skip_whitespace_and_comments(i + 1)
+        if self.__source[i] != "{":
+            raise ValueError("Expected the start of the configuration")
+        closing_bracket = self.__scan_attribute_set(i + 1, [])
+        self.__section_spans[""] = SourceSpan(i, i, closing_bracket, closing_bracket + 1)
+
+    def __scan_attribute_set(self, i: int, path: list[str]) -> int:
+        """Records the spans of everything in an attribute set (the inside of a set of curly braces)
+
+        Args:
+            i: int - the position just after the opening curly brace
+            path: list[str] - the path of the section the attribute set belongs to
+
+        Returns:
+            int - the position of the closing curly brace
+        """
+
+        while True:
+            i = self.__skip_whitespace_and_comments(i)
+            if self.__source[i] == "}":
+                return i
+            if re.match(r"inherit\b", self.__source[i:i + 8]):
+                i = self.__skip_value(i + 7) + 1
+                continue
+            start = i
+            attribute_path, i = self.__read_attribute_path(i)
+            i = self.__skip_whitespace_and_comments(i)
+            if self.__source[i] != "=":
+                raise ValueError("Expected an equals sign")
+            i = self.__skip_whitespace_and_comments(i + 1)
+            full_path = path + attribute_path
+            if self.__source[i] == "{":
+                closing_bracket = self.__scan_attribute_set(i + 1, full_path)
+                semicolon = self.__skip_whitespace_and_comments(closing_bracket + 1)
+                if self.__source[semicolon] != ";":
+                    raise ValueError("Expected a semicolon after a section")
+                self.__section_spans[".".join(full_path)] = SourceSpan(start, i, closing_bracket, semicolon + 1)
+            else:
+                semicolon = self.__skip_value(i)
+                value_end = semicolon
+                while self.__source[value_end - 1].isspace():
+                    value_end -= 1
+                self.__variable_spans[".".join(full_path)] = SourceSpan(start, i, value_end, semicolon + 1)
+            i = semicolon + 1
+
+    def __read_attribute_path(self, i: int) -> tuple[list[str], int]:
+        """Reads an attribute path like a.b."c d"
+
+        Args:
+            i: int - the position of the start of the path
+
+        Returns:
+            tuple[list[str], int] - the parts of the path (with " replaced by ' like the decomposer does) and the
+            position just after the path
+        """
+
+        attribute_path: list[str] = []
+        while True:
+            if self.__source[i] == '"':
+                end = self.__skip_string(i)
+                attribute_path.append(re.sub('"', "'", self.__source[i:end]))
+                i = end
+            elif match := self.IDENTIFIER.match(self.__source, i):
+                attribute_path.append(match.group(0))
+                i = match.end()
+            else:
+                raise ValueError("Expected an attribute name")
+            if self.__source[i] != ".":
+                return attribute_path, i
+            i += 1
+
+    def __skip_value(self, i: int) -> int:
+        """Skips over a value to the semicolon that ends it
+
+        Args:
+            i: int - the position of the start of the value
+
+        Returns:
+            int - the position of the semicolon
+
+        Note:
+            with and assert clauses have their own semicolon, and let clauses contain semicolons until their in,
+            so these are counted to avoid stopping early
+        """
+
+        own_semicolons = 0
+        open_lets = 0
+        while True:
+            i = self.__skip_whitespace_and_comments(i)
+            character = self.__source[i]
+            if character == ";":
+                if own_semicolons == 0 and open_lets == 0:
+                    return i
+                if own_semicolons > 0:
+                    own_semicolons -= 1
+                i += 1
+            elif character in "([{":
+                i = self.__skip_brackets(i) + 1
+            elif character in ")]}":
+                raise ValueError("Unexpected closing bracket")
+            elif character == '"' or self.__source.startswith("''", i):
+                i = self.__skip_string(i)
+            elif match := self.IDENTIFIER.match(self.__source, i):
+                match match.group(0):
+                    case "with" | "assert":
+                        own_semicolons += 1
+                    case "let":
+                        open_lets += 1
+                    case "in":
+                        open_lets -= 1
+                i = match.end()
+            else:
+                i += 1
+
+    def __skip_brackets(self, i: int) -> int:
+        """Skips to the bracket matching the one at position i
+
+        Args:
+            i: int - the position of the opening bracket
+
+        Returns:
+            int - the position of the matching closing bracket
+        """
+
+        depth = 0
+        while True:
+            i = self.__skip_whitespace_and_comments(i)
+            character = self.__source[i]
+            if character in "([{":
+                depth += 1
+            elif character in ")]}":
+                depth -= 1
+                if depth == 0:
+                    return i
+            elif character == '"' or self.__source.startswith("''", i):
+                i = self.__skip_string(i)
+                continue
+            i += 1
+
+    def __skip_string(self, i: int) -> int:
+        """Skips over a string, either "..." or ''...''
+
+        Args:
+            i: int - the position of the start of the string
+
+        Returns:
+            int - the position just after the string
+        """
+
+        if self.__source[i] == '"':
+            i += 1
+            while self.__source[i] != '"':
+                if self.__source[i] == "\\":
+                    i += 2
+                elif self.__source.startswith("${", i):
+                    i = self.__skip_brackets(i + 1) + 1
+                else:
+                    i += 1
+            return i + 1
+        i += 2
+        while True:
+            if self.__source.startswith("''", i):
+                if self.__source.startswith("'''", i) or self.__source.startswith("''$", i):
+                    i += 3
+                elif self.__source.startswith("''\\", i):
+                    i += 4
+                else:
+                    return i + 2
+            elif self.__source.startswith("${", i):
+                i = self.__skip_brackets(i + 1) + 1
+            else:
+                i += 1
+
+    def __skip_whitespace_and_comments(self, i: int) -> int:
+        """Skips over any whitespace and comments
+
+        Args:
+            i: int - the current position
+
+        Returns:
+            int - the position of the next character which is not whitespace or in a comment
+        """
+
+        while True:
+            if self.__source[i].isspace():
+                i += 1
+            elif self.__source[i] == "#":
+                end_of_line = self.__source.find("\n", i)
+                if end_of_line == -1:
+                    raise ValueError("Reached the end of the file in a comment")
+                i = end_of_line + 1
+            elif self.__source.startswith("/*", i):
+                end_of_comment = self.__source.find("*/", i + 2)
+                if end_of_comment == -1:
+                    raise ValueError("Reached the end of the file in a comment")
+                i = end_of_comment + 2
+            else:
+                return i
+
+
 class Decomposer:
     """Class to handle the decomposition of the Nix file and addition of tokens to the tree"""
 
-    def __init__(self, file_path: Path, tree: DecomposerTree) -> None:
+    def __init__(self, file_path: Path, tree: DecomposerTree,
+                 progress: Callable[[int, int], None] | None = None) -> None:
         """Takes in file path and stores it for the main decomposition function
 
         Args:
             file_path: Path - The file path for the Nix configuration file
             tree: DecomposerTree - The tree that decomposer should add to
+            progress: Callable[[int, int], None] | None - called with how many of the assignments in the file have
+            been added to the tree and how many there are, after each one
 
         Raises:
             FileNotFoundError: If the file does not exist or is a directory and thus is unreadable
+
+        Note:
+            The tree is added to as the file is read, so it can be shown while it is being decomposed. The progress
+            callback can raise DecompositionCancelled to stop part way through
         """
 
         self.__file_path: Path = file_path
         self.__tree: DecomposerTree = tree
+        self.__progress = progress
         if (not self.__file_path.exists()) or (self.__file_path.is_dir()):
             raise FileNotFoundError(f"The configuration file: {str(file_path)} does not exist")
         self.__comment_handling = CommentHandling(file_path)
+        self.__source_spans = SourceSpans(file_path)
         self.__reading_the_full_file()
         self.__managing_headers()
         self.__managing_the_rest_of_the_file()
@@ -150,6 +457,14 @@ class Decomposer:
         """
         return self.__tree
 
+    def get_source_spans(self) -> SourceSpans:
+        """Get the spans of the variables and sections in the original file
+
+        Returns:
+            SourceSpans - the spans
+        """
+        return self.__source_spans
+
     def set_tree(self, new_tree: DecomposerTree) -> None:
         """Set the tree in the decomposer
 
@@ -169,10 +484,8 @@ class Decomposer:
         Note:
             This is done to make the file easier to interpret
         """
-        self.__full_file: str = ""
-        lines = self.__comment_handling.get_file_without_comments()
-        for line in lines:
-            self.__full_file += line
+        # Adding it on a character at a time copied the whole file each time
+        self.__full_file: str = self.__comment_handling.get_file_without_comments()
 
     def __managing_headers(self) -> None:
         """Adds headers to the tree
@@ -343,6 +656,8 @@ class Decomposer:
                         iterator.prepend + rest_of_file_split[equals_locations[iterator.equals_number][1] + place_to_check])
                     iterator.prepend = iterator.previous_prepend
             iterator.equals_number += 1
+            if self.__progress:
+                self.__progress(iterator.equals_number, len(equals_locations))
         self.__add_comments_to_nodes(self.__tree.get_root(), "", comments_attached_to_id)
 
     def __checking_group(self, groups: dict[str, tuple[int, int]], location: int) -> str:
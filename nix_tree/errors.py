@@ -45,3 +45,13 @@ class ErrorHandlingComments(Exception):
     """
     def __init__(self, line: str, message: str = "There was an error attempting to parse comments on line: {LINE}, \n check all the comments in your config are valid") -> None:
         super().__init__(message.format(LINE=line))
+
+
+class DecompositionCancelled(Exception):
+    """Raised to stop decomposing a file before it has finished, e.g. if the app is quit while it is loading
+
+    Args:
+        message: str - the message to print out with this exception
+    """
+    def __init__(self, message: str = "The decomposition of the file was cancelled") -> None:
+        super().__init__(message)
@@ -0,0 +1,315 @@
+"""Composers which stream the tree out in formats other than Nix, for use by other tools"""
+
+from abc import ABC, abstractmethod
+import json
+from pathlib import Path
+import re
+import sys
+from typing import Any, TextIO
+
+from nix_tree.composer import AtomicFileWriter, compose_variable
+from nix_tree.decomposer import Decomposer, DecomposerTree
+from nix_tree.json_loader import JsonLoader
+from nix_tree.parsing import Types, split_option_path
+from nix_tree.tree import ConnectorNode, VariableNode, Node
+
+
+def variable_value(node: VariableNode) -> str:
+    """Works out the value of a variable as it is written in Nix, on a single line
+
+    Args:
+        node: VariableNode - the variable
+
+    Returns:
+        str - the value, e.g. "true" or "[ \"a\" \"b\" ]"
+    """
+
+    value = compose_variable(node, "")[len(split_option_path(node.get_name())[-1]) + 3:]
+    if node.get_type() == Types.LIST:  # Lists are split over multiple lines by compose_variable
+        value = " ".join(part.strip() for part in value.split("\n"))
+    return value
+
+
+# A string as the tree stores it, either quoted with '' (escaped with ''' ''$ and ''\) or with ' (escaped with \)
+NIX_STRING = re.compile(r"''(?:'''|''\$|''\\.|(?!'').)*''|'(?:\\.|[^'\\])*'", re.DOTALL)
+
+# What the escape sequences in Nix strings stand for, any other escaped character stands for itself
+NIX_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+
+# The decomposer replaces every " in a value with ', so in the strings it quotes with ' an escaped ' was an escaped "
+QUOTED_STRING_ESCAPES = {**NIX_ESCAPES, "'": '"'}
+
+
+def nix_string_value(data: str) -> str:
+    """Works out the text of a Nix string, undoing its escape sequences
+
+    Args:
+        data: str - the string as the tree stores it, quoted with ' or ''
+
+    Returns:
+        str - the text
+
+    Note:
+        The decomposer stores double quoted strings quoted with ' and escaped with backslashes, and nix_data only uses
+        '' strings for text containing quotes, so both kinds are undone here
+    """
+
+    if len(data) >= 4 and data.startswith("''") and data.endswith("''"):
+        pattern, text, escapes = r"''(')|''(\$)|''\\(.)", data[2:-2], NIX_ESCAPES
+    else:
+        pattern, text, escapes = r"()()\\(.)", data[1:-1], QUOTED_STRING_ESCAPES
+
+    def unescape(escape: re.Match) -> str:
+        """Works out what an escape sequence stands for
+
+        Args:
+            escape: re.Match - the escape sequence, with the quote, dollar or escaped character it was
+
+        Returns:
+            str - the text
+        """
+
+        quote, dollar, character = escape.groups()
+        if quote:
+            return "''"
+        if dollar:
+            return "$"
+        return escapes.get(character, character)
+
+    return re.sub(pattern, unescape, text, flags=re.DOTALL)
+
+
+def list_elements(inside: str) -> list[str]:
+    """Splits what is inside a Nix list into its elements, keeping strings, lists and attribute sets whole
+
+    Args:
+        inside: str - what is between the brackets of the list
+
+    Returns:
+        list[str] - the elements as they are written in Nix
+    """
+
+    elements = []
+    position = 0
+    while position < len(inside):
+        if inside[position].isspace():
+            position += 1
+            continue
+        start = position
+        depth = 0
+        while position < len(inside) and (depth > 0 or not inside[position].isspace()):
+            if string := NIX_STRING.match(inside, position):
+                position = string.end()
+                continue
+            if inside[position] in "[{(":
+                depth += 1
+            elif inside[position] in "]})":
+                depth -= 1
+            position += 1
+        elements.append(inside[start:position])
+    return elements
+
+
+def json_list(data: str) -> list | None:
+    """Works out a Nix list as a json list, if everything in it has a json equivalent
+
+    Args:
+        data: str - the list as it is written in Nix
+
+    Returns:
+        list | None - the list, or None if any element is not a bool, int, string or list of them (e.g. an attribute
+        set or pkgs.git)
+    """
+
+    values = []
+    for element in list_elements(data.strip()[1:-1]):
+        if element in ("true", "false"):
+            values.append(element == "true")
+        elif re.fullmatch(r"-?[0-9]+", element):
+            values.append(int(element))
+        elif NIX_STRING.fullmatch(element):
+            values.append(nix_string_value(element))
+        elif element.startswith("[") and (inner := json_list(element)) is not None:
+            values.append(inner)
+        else:
+            return None
+    return values
+
+
+def json_value(node: VariableNode) -> Any:
+    """Works out the value of a variable as a json value
+
+    Args:
+        node: VariableNode - the variable
+
+    Returns:
+        Any - a bool, int, str or list of them
+
+    Note:
+        Values which have no json equivalent (like pkgs.git or lib.mkDefault true) are kept as their Nix expression
+        in a string. So is a whole list if any of its elements is like this, so nothing in it is lost
+    """
+
+    data = node.get_data().strip()
+    match node.get_type():
+        case Types.BOOL:
+            return data == "true"
+        case Types.INT:
+            return int(data)
+        case Types.STRING:
+            return nix_string_value(data)
+        case Types.LIST:
+            if (values := json_list(data)) is not None:
+                return values
+    return variable_value(node)
+
+
+def json_key(name: str) -> str:
+    """Works out the json key for a part of a path, removing the quotes from quoted names
+
+    Args:
+        name: str - the part of the path, e.g. enable or 'foo.bar'
+
+    Returns:
+        str - the key
+    """
+
+    if len(name) >= 2 and name[0] == name[-1] == "'":
+        return name[1:-1]
+    return name
+
+
+class FormatComposer(ABC):
+    """The base class for the composers which stream the tree out in other formats
+
+    Note:
+        Each line is written to the output as soon as it is worked out, so only the path currently being written is
+        kept in memory no matter how large the tree is
+    """
+
+    def __init__(self, tree: DecomposerTree, output: TextIO) -> None:
+        """Streams the tree to the output
+
+        Args:
+            tree: DecomposerTree - the tree to write out
+            output: TextIO - the file (or stdout) to write to
+        """
+
+        self._output = output
+        self._write_tree(tree)
+
+    @abstractmethod
+    def _write_tree(self, tree: DecomposerTree) -> None:
+        """Writes the whole tree, each format defines this
+
+        Args:
+            tree: DecomposerTree - the tree to write out
+        """
+
+    @staticmethod
+    def _children(node: Node) -> list[Node]:
+        """Returns the children of a node which are part of the configuration (leaving out the headers)
+
+        Args:
+            node: Node - the node
+
+        Returns:
+            list[Node] - the children
+        """
+
+        return [child for child in node.get_connected_nodes() if child.get_name() != "headers"]
+
+
+class FlatComposer(FormatComposer):
+    """Writes every variable on its own line with its full path, e.g. boot.loader.grub.enable = true;"""
+
+    def _write_tree(self, tree: DecomposerTree) -> None:
+        """Writes a line for each variable in the order they are in the tree
+
+        Args:
+            tree: DecomposerTree - the tree to write out
+        """
+
+        for child in self._children(tree.get_root()):
+            self.__write_node(child)
+
+    def __write_node(self, node: Node) -> None:
+        """Writes a variable, or all the variables below a section
+
+        Args:
+            node: Node - the node to write
+        """
+
+        if isinstance(node, VariableNode):
+            self._output.write(f"{node.get_name()} = {variable_value(node)};\n")
+        else:
+            for child in node.get_connected_nodes():
+                self.__write_node(child)
+
+
+class JsonComposer(FormatComposer):
+    """Writes the tree as nested json objects, with sections as objects and variables as values"""
+
+    def _write_tree(self, tree: DecomposerTree) -> None:
+        """Writes the tree as one json object
+
+        Args:
+            tree: DecomposerTree - the tree to write out
+        """
+
+        self.__write_section(tree.get_root(), "")
+        self._output.write("\n")
+
+    def __write_section(self, node: Node, indentation: str) -> None:
+        """Writes a section as a json object, one member at a time
+
+        Args:
+            node: Node - the section
+            indentation: str - the indentation of the line the section starts on
+        """
+
+        children = self._children(node)
+        if not children:
+            self._output.write("{}")
+            return
+        self._output.write("{")
+        for i, child in enumerate(children):
+            self._output.write(("," if i > 0 else "") + f"\n{indentation}  ")
+            if isinstance(child, VariableNode):  # Variables are named by their full path, sections by only their part
+                self._output.write(json.dumps(json_key(split_option_path(child.get_name())[-1])) + ": ")
+                self._output.write(json.dumps(json_value(child)))
+            elif isinstance(child, ConnectorNode):
+                self._output.write(json.dumps(json_key(child.get_name())) + ": ")
+                self.__write_section(child, indentation + "  ")
+        self._output.write(f"\n{indentation}}}")
+
+
+# The formats which can be chosen on the command line
+FORMAT_COMPOSERS: dict[str, type[FormatComposer]] = {
+    "json": JsonComposer,
+    "flat": FlatComposer,
+}
+
+
+def export_file(file_location: str, output_format: str, output_location: str | None, from_json: bool = False,
+                json_prefix: str = "") -> None:
+    """Decomposes a configuration file and streams it out in another format
+
+    Args:
+        file_location: str - the configuration file
+        output_format: str - the name of the format in FORMAT_COMPOSERS
+        output_location: str | None - the file to write to, or None to write to stdout
+        from_json: bool - whether the file is evaluated configuration as json instead of a Nix file
+        json_prefix: str - the path the json was evaluated at, if it is json
+    """
+
+    tree = DecomposerTree()
+    if from_json:
+        JsonLoader(Path(file_location), tree, json_prefix)
+    else:
+        Decomposer(file_path=Path(file_location), tree=tree)
+    format_composer = FORMAT_COMPOSERS[output_format]
+    if output_location:
+        AtomicFileWriter(output_location, file_location).write(lambda file: format_composer(tree, file))
+    else:
+        format_composer(tree, sys.stdout)
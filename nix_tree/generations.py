@@ -0,0 +1,83 @@
+"""Lists the home-manager generations, keeping the list until the profile changes so it is not run on every launch"""
+
+import json
+import os
+import subprocess
+from pathlib import Path
+
+
+class GenerationsCache:
+    """The class which lists the home-manager generations, caching the list in the users cache directory
+
+    Note:
+        Each generation (and the current one) is a link in the home-manager profile directory, so making, switching to
+        or removing a generation changes when the directory was last modified. The list is only read again from
+        home-manager generations when that has changed
+    """
+
+    def __init__(self, cache_location: Path | None = None, profile_directories: list[Path] | None = None) -> None:
+        """Works out where the cache and the profile directories are
+
+        Args:
+            cache_location: Path | None - where the list is kept, by default
+            $XDG_CACHE_HOME/nix-tree/home-manager-generations.json
+            profile_directories: list[Path] | None - the directories the home-manager profile can be in, by default
+            the one in $XDG_STATE_HOME and the one in /nix/var/nix/profiles/per-user
+        """
+
+        if cache_location is None:
+            cache_directory = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "nix-tree"
+            cache_location = cache_directory / "home-manager-generations.json"
+        if profile_directories is None:
+            state_directory = Path(os.environ.get("XDG_STATE_HOME") or Path.home() / ".local" / "state")
+            profile_directories = [state_directory / "nix" / "profiles"]
+            if user := os.environ.get("USER"):
+                profile_directories.append(Path("/nix/var/nix/profiles/per-user") / user)
+        self.__cache_location = cache_location
+        self.__profile_directories = profile_directories
+
+    def get_generations(self) -> list[str]:
+        """Returns the home-manager generations, from the cache if the profile has not changed since they were listed
+
+        Returns:
+            list[str] - a line for each generation, as home-manager generations shows them
+
+        Raises:
+            FileNotFoundError() - if home-manager is not installed
+            subprocess.CalledProcessError() - if home-manager could not list the generations
+        """
+
+        profile_state = self.__work_out_profile_state()
+        try:
+            cached = json.loads(self.__cache_location.read_text(encoding="utf-8"))
+            if profile_state is not None and cached["profile_state"] == profile_state:
+                return cached["generations"]
+        except (OSError, ValueError, KeyError, TypeError):  # There is no cache yet, or it could not be read
+            pass
+        generation_command = subprocess.run("home-manager generations".split(), capture_output=True, text=True,
+                                            check=True)
+        generations = generation_command.stdout.split("\n")[:-1]
+        if profile_state is not None:
+            try:
+                self.__cache_location.parent.mkdir(parents=True, exist_ok=True)
+                self.__cache_location.write_text(json.dumps({"profile_state": profile_state,
+                                                             "generations": generations}), encoding="utf-8")
+            except OSError:
+                pass
+        return generations
+
+    def __work_out_profile_state(self) -> str | None:
+        """Works out when each profile directory was last modified
+
+        Returns:
+            str | None - the directories and when they were modified, or None if none of them exist (so the list is
+            not cached, as there is nothing to tell when it changes)
+        """
+
+        states = []
+        for directory in self.__profile_directories:
+            try:
+                states.append(f"{directory}:{directory.stat().st_mtime_ns}")
+            except OSError:
+                continue
+        return ";".join(states) if states else None
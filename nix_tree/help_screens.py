@@ -10,6 +10,7 @@ MAINHELPTEXT = """\
 
 - Tab: To switch from tabs to the window
 - Enter: To modify a variable or fold an indent
+- v: To show or hide the preview of the generated file
 - q/Esc : To close this help dialog
 
 Note: if in a list there it looks like (xy).z,
@@ -37,6 +38,7 @@ SECTIONOPTIONSHELPTEXT = """\
 - q/Esc: To close this help dialog or the options dialog
 - Delete: To delete that section
 - Add: To add a variable/section
+- Search (or /): To search the options by parts of their names or descriptions
 - Exit: To close the options dialog
 """
 
@@ -0,0 +1,126 @@
+"""The json loader fills the tree from evaluated configuration, e.g. the output of nix eval --json"""
+
+import json
+from pathlib import Path
+import re
+from typing import Any
+
+from nix_tree.parsing import Types
+from nix_tree.tree import DecomposerTree, ConnectorNode, VariableNode
+
+
+def nix_name(key: str) -> str:
+    """Works out how a json key is written as part of a path, quoting it if it is not a plain identifier
+
+    Args:
+        key: str - the json key
+
+    Returns:
+        str - the part of the path, quoted with ' like the decomposer does
+    """
+
+    if re.fullmatch(r"[a-zA-Z_][a-zA-Z0-9_'-]*", key):
+        return key
+    return "'" + key + "'"
+
+
+def nix_data(value: Any) -> tuple[str, Types]:
+    """Works out the data and type of a variable from a json value, in the form the decomposer stores them
+
+    Args:
+        value: Any - the json value
+
+    Returns:
+        tuple[str, Types] - the data (with strings quoted with ') and its type
+    """
+
+    if isinstance(value, bool):  # Before int, as bools are ints in python
+        return ("true" if value else "false"), Types.BOOL
+    if isinstance(value, int):
+        return str(value), Types.INT
+    if isinstance(value, str):
+        if "'" not in value and '"' not in value:
+            escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace("\t", "\\t").replace("${", "\\${")
+            return "'" + escaped + "'", Types.STRING
+        return "''" + value.replace("''", "'''").replace("${", "''${") + "''", Types.STRING
+    if isinstance(value, list):
+        if not value:
+            return "[ ]", Types.LIST
+        return "[ " + " ".join(nix_data(item)[0] for item in value) + " ]", Types.LIST
+    if isinstance(value, dict):  # Only reached for attribute sets inside lists or empty attribute sets
+        members = " ".join(f"{nix_name(key)} = {nix_data(item)[0]};" for key, item in value.items())
+        return ("{ " + members + " }" if members else "{ }"), Types.UNIQUE
+    if value is None:
+        return "null", Types.UNIQUE
+    return json.dumps(value), Types.UNIQUE  # Floats
+
+
+class JsonLoader:
+    """The class which loads a json file of evaluated configuration into the tree"""
+
+    def __init__(self, file_path: Path, tree: DecomposerTree, prefix: str = "",
+                 headers: str = "[ config, pkgs, ... ]") -> None:
+        """Reads the json file and adds every value in it to the tree
+
+        Args:
+            file_path: Path - the json file, its top level must be an object
+            tree: DecomposerTree - the tree to fill
+            prefix: str - the path the json was evaluated at, e.g. services for .#nixosConfigurations.host.config.services
+            headers: str - the headers to give the tree, so it can be composed into a Nix file
+
+        Raises:
+            ValueError - if the file is not json or its top level is not an object
+        """
+
+        with open(file_path, encoding="utf-8") as file:
+            values = json.load(file)
+        if not isinstance(values, dict):
+            raise ValueError("The top level of the json file must be an object")
+        self.__tree = tree
+        self.__tree.get_root().add_node(VariableNode("headers", headers, Types.LIST))
+        section = self.__tree.get_root()
+        path: list[str] = []
+        for part in prefix.split(".") if prefix else []:
+            new_section = ConnectorNode(part)
+            section.add_node(new_section)
+            section = new_section
+            path.append(part)
+        self.__add_values(section, path, values)
+
+    def get_tree(self) -> DecomposerTree:
+        """Returns the tree
+
+        Returns:
+            DecomposerTree - the tree filled from the json file
+        """
+
+        return self.__tree
+
+    @staticmethod
+    def __add_values(section: ConnectorNode, path: list[str], values: dict) -> None:
+        """Adds the json objects values to the tree, creating the nodes directly instead of working out their paths
+        from strings one at a time
+
+        Args:
+            section: ConnectorNode - the section the object belongs in
+            path: list[str] - the path of the section
+            values: dict - the json object
+
+        Note:
+            A stack is used instead of recursion so deeply nested json does not reach the recursion limit
+        """
+
+        stack = [(section, path, iter(values.items()))]
+        while stack:
+            section, path, items = stack[-1]
+            for key, value in items:
+                name = nix_name(key)
+                if isinstance(value, dict) and value:
+                    child_section = ConnectorNode(name)
+                    section.add_node(child_section)
+                    stack.append((child_section, path + [name], iter(value.items())))
+                    break
+                data, data_type = nix_data(value)
+                section.add_node(VariableNode(".".join(path + [name]), data, data_type))
+            else:  # Every value in the object has been added
+                stack.pop()
@@ -0,0 +1,372 @@
+"""The ui tree, which only creates the nodes of a section once it is opened so large files are shown straight away"""
+
+from typing import Callable
+
+from textual.widgets import Tree
+from textual.widgets._tree import NodeID, UnknownNodeID
+
+from nix_tree.custom_types import UIConnectorNode, UIVariableNode
+from nix_tree.parsing import Types
+from nix_tree.tree import ConnectorNode, DecomposerTree, Node
+
+
+class LazyTree(Tree[dict]):
+    """A tree widget which adds the children of each section the first time it is expanded
+
+    Note:
+        Each section which has not been filled in yet is linked to its section in the decomposer tree, so anything
+        which looks through the ui tree (like undoing or adding a variable) fills in the sections it goes through with
+        ui_children instead of reading their children directly. Every node added is also bound to its path, so
+        sections and variables are found without comparing labels.
+
+        While the file is still being decomposed, the top level is shown as it is read with show_loaded but no
+        section is filled in (as more of it may be further down the file) until finish_loading is called
+    """
+
+    def __init__(self, label: str, model: DecomposerTree,
+                 variable_added: Callable[[UIVariableNode], None] | None = None, loading: bool = False) -> None:
+        """Creates the tree with only the top level of the decomposer tree in it
+
+        Args:
+            label: str - the label of the root, the file name
+            model: DecomposerTree - the decomposer tree to show
+            variable_added: Callable[[UIVariableNode], None] | None - called with each variable as it is added, e.g.
+            to mark it if it does not fit the options
+            loading: bool - whether the decomposer tree is still being filled in by a background worker
+        """
+
+        super().__init__(label)
+        self.__model = model
+        self.__variable_added = variable_added
+        self.__unfilled: dict[NodeID, ConnectorNode] = {self.root.id: model.get_root()}
+        self.__shown: set[int] = {id(model.get_root())}
+        self.__section_paths: dict[NodeID, str] = {self.root.id: ""}
+        self.__sections: dict[str, UIConnectorNode] = {"": self.root}
+        self.__variables: dict[str, UIVariableNode] = {}
+        self.__loading = loading
+        if loading:
+            del self.__unfilled[self.root.id]  # The top level is added with show_loaded instead
+        self.fill(self.root)
+
+    def fill(self, node: UIConnectorNode) -> None:
+        """Adds the children of a section if they have not been added yet
+
+        Args:
+            node: UIConnectorNode - the section in the ui tree
+        """
+
+        if self.__loading:
+            return
+        section = self.__unfilled.pop(node.id, None)
+        if section is None:
+            return
+        for ui_node, child in self.__model.add_children_to_ui(section, node):
+            self.__bind(ui_node, child)
+            if isinstance(child, ConnectorNode):
+                self.__unfilled[ui_node.id] = child
+        if self.__variable_added:
+            for child in node.children:
+                if child.data:
+                    self.__variable_added(child)
+
+    def is_filled(self, node: UIConnectorNode) -> bool:
+        """Returns whether the children of a section have been added
+
+        Args:
+            node: UIConnectorNode - the section in the ui tree
+
+        Returns:
+            bool - true if they have
+        """
+
+        return node.id not in self.__unfilled
+
+    def is_loading(self) -> bool:
+        """Returns whether the decomposer tree is still being filled in
+
+        Returns:
+            bool - true if it is
+        """
+
+        return self.__loading
+
+    def show_loaded(self) -> int:
+        """Adds the top level sections and variables which have been decomposed since this was last called
+
+        Returns:
+            int - how many were added
+
+        Note:
+            The decomposer only ever adds to the end of the top level while it reads the file, so anything not bound
+            yet is new
+        """
+
+        added = 0
+        for child in list(self.__model.get_root().get_connected_nodes()):
+            if id(child) in self.__shown:
+                continue
+            if isinstance(child, ConnectorNode):
+                ui_node = self.root.add(child.get_name())
+                self.__unfilled[ui_node.id] = child
+            else:
+                self.__model.add_to_ui(child, self.root)
+                ui_node = self.root.children[-1]
+            self.__bind(ui_node, child)
+            if ui_node.data and self.__variable_added:
+                self.__variable_added(ui_node)
+            added += 1
+        return added
+
+    def finish_loading(self) -> None:
+        """Adds the rest of the top level once the decomposer tree is complete, and fills in any sections which were
+        opened while it was loading"""
+
+        self.show_loaded()
+        self.__loading = False
+        stack = list(self.root.children)  # The top level is already complete
+        while stack:
+            node = stack.pop()
+            if node.is_expanded:
+                self.fill(node)
+                stack.extend(node.children)
+
+    def add_section(self, parent: UIConnectorNode, label: str, after: int | None = None) -> UIConnectorNode:
+        """Adds a new section to the tree and binds it to its path
+
+        Args:
+            parent: UIConnectorNode - the section to add it to
+            label: str - the name of the section
+            after: int | None - where in the children of the parent to add it, at the end if this is None
+
+        Returns:
+            UIConnectorNode - the new section
+        """
+
+        self.fill(parent)
+        section = parent.add(label, after=after)
+        self.__bind(section)
+        return section
+
+    def add_variable(self, parent: UIConnectorNode, path: str, value: str, data_type: Types,
+                     after: int | None = None) -> UIVariableNode:
+        """Adds a new variable to the tree and binds it to its path
+
+        Args:
+            parent: UIConnectorNode - the section to add it to
+            path: str - the full path of the variable
+            value: str - its value
+            data_type: Types - its type
+            after: int | None - where in the children of the parent to add it, at the end if this is None
+
+        Returns:
+            UIVariableNode - the new variable
+        """
+
+        self.fill(parent)
+        variable = parent.add_leaf(f"{path.split('.')[-1]}={value}", data={path: value, "type": data_type},
+                                   after=after)
+        self.__bind(variable)
+        if self.__variable_added:
+            self.__variable_added(variable)
+        return variable
+
+    def find_section(self, path: str) -> UIConnectorNode | None:
+        """Finds a section from its full path
+
+        Args:
+            path: str - the full path of the section, "" for the root
+
+        Returns:
+            UIConnectorNode | None - the section, or None if there is no section with that path
+
+        Note:
+            If the section has not been added yet, the sections leading up to it are filled in, shortest first
+        """
+
+        if section := self.__alive(self.__sections.get(path)):
+            return section
+        self.__fill_towards(path)
+        return self.__alive(self.__sections.get(path))
+
+    def find_variable(self, path: str, value: str | None = None, fill: bool = True) -> UIVariableNode | None:
+        """Finds a variable from its full path
+
+        Args:
+            path: str - the full path of the variable
+            value: str | None - its value, if the variable should only be returned when it has this value
+            fill: bool - whether to fill in the sections leading up to it if it has not been added yet
+
+        Returns:
+            UIVariableNode | None - the variable, or None if there is no variable with that path (and value)
+        """
+
+        variable = self.__alive(self.__variables.get(path))
+        if variable is None and fill:
+            self.__fill_towards(path)
+            variable = self.__alive(self.__variables.get(path))
+        if variable is None or not variable.data or path not in variable.data:
+            return None
+        if value is not None and variable.data[path] != value:
+            return None
+        return variable
+
+    def path_of(self, node: UIConnectorNode | UIVariableNode) -> str | None:
+        """Returns the full path of a node in the tree
+
+        Args:
+            node: UIConnectorNode | UIVariableNode - the node
+
+        Returns:
+            str | None - its path, "" for the root, or None if it was not added through this tree
+        """
+
+        if node.data:
+            return next(iter(node.data))
+        return self.__section_paths.get(node.id)
+
+    def on_tree_node_expanded(self, expanded: Tree.NodeExpanded) -> None:
+        """Adds the children of a section when it is opened
+
+        Args:
+            expanded: Tree.NodeExpanded - the section which was opened
+        """
+
+        self.fill(expanded.node)
+
+    def __bind(self, node: UIConnectorNode | UIVariableNode, model_node: Node | None = None) -> None:
+        """Binds a node which has just been added to its path, and records which decomposer node it was made from
+
+        Args:
+            node: UIConnectorNode | UIVariableNode - the ui node
+            model_node: Node | None - the decomposer node, None if it was added while editing
+        """
+
+        if node.data:
+            self.__variables[next(iter(node.data))] = node
+        else:
+            parent_path = self.__section_paths.get(node.parent.id, "") if node.parent else ""
+            path = f"{parent_path}.{node.label}" if parent_path else str(node.label)
+            self.__section_paths[node.id] = path
+            self.__sections[path] = node
+        if model_node is not None:
+            self.__shown.add(id(model_node))
+
+    def __fill_towards(self, path: str) -> None:
+        """Fills in the sections a path goes through, so the node at the end of it is bound
+
+        Args:
+            path: str - the full path of a section or variable
+        """
+
+        parts = path.split(".")
+        for i in range(len(parts)):
+            if section := self.__alive(self.__sections.get(".".join(parts[:i]))):
+                self.fill(section)
+
+    def __alive(self, node: UIConnectorNode | None) -> UIConnectorNode | None:
+        """Checks a bound node is still in the tree, as removing a node does not unbind it
+
+        Args:
+            node: UIConnectorNode | None - the node
+
+        Returns:
+            UIConnectorNode | None - the node, or None if it has been removed
+        """
+
+        if node is None:
+            return None
+        try:
+            return node if self.get_node_by_id(node.id) is node else None
+        except UnknownNodeID:
+            return None
+
+
+def ui_children(node: UIConnectorNode) -> list[UIConnectorNode]:
+    """Returns the children of a node in the ui tree, adding them first if its section has not been opened yet
+
+    Args:
+        node: UIConnectorNode - the node
+
+    Returns:
+        list[UIConnectorNode] - its children
+    """
+
+    if isinstance(node.tree, LazyTree):
+        node.tree.fill(node)
+    return list(node.children)
+
+
+def find_child(parent: UIConnectorNode, name: str) -> UIConnectorNode | UIVariableNode | None:
+    """Finds the section or variable with a name directly in a section, by its path if the tree is a LazyTree
+
+    Args:
+        parent: UIConnectorNode - the section to look in
+        name: str - the name of the section or variable, without its value
+
+    Returns:
+        UIConnectorNode | UIVariableNode | None - the section or variable, or None if there is not one with that name
+    """
+
+    if isinstance(parent.tree, LazyTree) and (parent_path := parent.tree.path_of(parent)) is not None:
+        path = f"{parent_path}.{name}" if parent_path else name
+        return parent.tree.find_section(path) or parent.tree.find_variable(path)
+    for child in ui_children(parent):
+        if str(child.label).split("=")[0] == name:
+            return child
+    return None
+
+
+def add_section(parent: UIConnectorNode, label: str, after: int | None = None) -> UIConnectorNode:
+    """Adds a section to the ui tree, binding it to its path if the tree is a LazyTree
+
+    Args:
+        parent: UIConnectorNode - the section to add it to
+        label: str - the name of the section
+        after: int | None - where in the children of the parent to add it, at the end if this is None
+
+    Returns:
+        UIConnectorNode - the new section
+    """
+
+    if isinstance(parent.tree, LazyTree):
+        return parent.tree.add_section(parent, label, after)
+    return parent.add(label, after=after)
+
+
+def add_variable(parent: UIConnectorNode, path: str, value: str, data_type: Types,
+                 after: int | None = None) -> UIVariableNode:
+    """Adds a variable to the ui tree, binding it to its path if the tree is a LazyTree
+
+    Args:
+        parent: UIConnectorNode - the section to add it to
+        path: str - the full path of the variable
+        value: str - its value
+        data_type: Types - its type
+        after: int | None - where in the children of the parent to add it, at the end if this is None
+
+    Returns:
+        UIVariableNode - the new variable
+    """
+
+    if isinstance(parent.tree, LazyTree):
+        return parent.tree.add_variable(parent, path, value, data_type, after)
+    return parent.add_leaf(f"{path.split('.')[-1]}={value}", data={path: value, "type": data_type}, after=after)
+
+
+def section_path(node: UIConnectorNode) -> str:
+    """Returns the full path of a section in the ui tree, from its binding if the tree is a LazyTree
+
+    Args:
+        node: UIConnectorNode - the section
+
+    Returns:
+        str - its full path, "" for the root
+    """
+
+    if isinstance(node.tree, LazyTree) and (path := node.tree.path_of(node)) is not None:
+        return path
+    labels = []
+    while node.parent is not None:
+        labels.insert(0, str(node.label))
+        node = node.parent
+    return ".".join(labels)
@@ -0,0 +1,91 @@
+"""Checks the variables in the tree against the options as they are edited, so the ones which do not fit are marked"""
+
+import threading
+
+from rich.text import Text
+
+from nix_tree.checker import find_problem, option_path_of
+from nix_tree.custom_types import UIConnectorNode, UIVariableNode
+from nix_tree.option_sets import OptionSets
+from nix_tree.parsing import BackgroundOptions, ParsingOptions, Types
+
+# How the variables which do not fit the options are shown in the tree
+PROBLEM_STYLE = "bold red"
+
+
+class LiveValidator:
+    """The class which checks the variables which have changed, run in a background worker
+
+    Note:
+        Only the variables an edit changes are checked, and each option path is only looked up the first time it is
+        seen, so the work for an edit does not depend on the size of the file
+    """
+
+    def __init__(self, options: ParsingOptions | OptionSets | BackgroundOptions) -> None:
+        """Stores the options to check against
+
+        Args:
+            options: ParsingOptions | OptionSets | BackgroundOptions - the options
+        """
+
+        self.__options = options
+        self.__looked_up: dict[str, tuple[str, Types | None, str] | None] = {}
+        self.__lock = threading.Lock()  # Edits made quickly one after another are checked in more than one worker
+
+    def check(self, variables: list[tuple[str, str]]) -> dict[tuple[str, str], str | None]:
+        """Checks some variables against the options
+
+        Args:
+            variables: list[tuple[str, str]] - the full path and value of each variable
+
+        Returns:
+            dict[tuple[str, str], str | None] - for each variable, what is wrong with it or None if nothing is
+        """
+
+        with self.__lock:
+            paths = {variable: option_path_of(variable[0]) for variable in variables}
+            new_paths = list(dict.fromkeys(path for path in paths.values()
+                                           if path is not None and path not in self.__looked_up))
+            if new_paths:
+                found = self.__options.look_up_options(new_paths)
+                for path in new_paths:
+                    self.__looked_up[path] = found.get(path)
+            results: dict[tuple[str, str], str | None] = {}
+            for (full_path, value), path in paths.items():
+                problem = find_problem(path, value, self.__looked_up[path]) if path is not None else None
+                results[(full_path, value)] = problem[1] if problem else None
+            return results
+
+
+def tree_variables(root: UIConnectorNode) -> list[tuple[str, str]]:
+    """Finds every variable which has been added to the ui tree
+
+    Args:
+        root: UIConnectorNode - the root of the ui tree
+
+    Returns:
+        list[tuple[str, str]] - the full path and value of each variable
+
+    Note:
+        The variables in sections which have not been opened yet are not in the ui tree, so are not found
+    """
+
+    variables = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.data:
+            variables.extend((path, value) for path, value in node.data.items() if path != "type")
+        stack.extend(node.children)
+    return variables
+
+
+def mark_node(node: UIVariableNode, problem: str | None) -> None:
+    """Shows whether a variable fits the options in its label
+
+    Args:
+        node: UIVariableNode - the variable
+        problem: str | None - what is wrong with it, or None if nothing is
+    """
+
+    node.label = Text(str(node.label), style=PROBLEM_STYLE if problem else "")
@@ -0,0 +1,275 @@
+"""Manages several named sets of options (e.g. NixOS, home-manager and in-house modules), choosing which set a file
+and each subtree of it is checked against"""
+
+from pathlib import Path
+
+from nix_tree.parsing import ParsingOptions, Types, find_options_location, is_wildcard, split_option_path
+from nix_tree.validators import Validator
+
+# The option sets which are looked for in the data directory, next to the NixOS options.json
+OPTION_SET_FILES: dict[str, str] = {
+    "nixos": "options.json",
+    "home-manager": "home-manager-options.json",
+}
+
+# The subtrees of a set which are set with the options of another set, relative to that subtree, e.g. the
+# home-manager NixOS module puts each users home-manager configuration under home-manager.users.<name>
+OPTION_SET_MOUNTS: dict[str, dict[str, str]] = {
+    "nixos": {"home-manager.users.<name>": "home-manager"},
+}
+
+
+def find_option_sets(extra_sets: list[str] | None = None) -> dict[str, Path]:
+    """Works out where each option set is, from the data directory and the sets given on the command line
+
+    Args:
+        extra_sets: list[str] | None - sets given as name=options.json, which are added to (or replace) the sets in
+        the data directory
+
+    Returns:
+        dict[str, Path] - the location of the options.json of each set, by name
+
+    Raises:
+        ValueError - if an extra set is not given as name=options.json
+    """
+
+    data_directory = find_options_location().parent
+    locations = {name: data_directory / file_name for name, file_name in OPTION_SET_FILES.items()}
+    for extra_set in extra_sets if extra_sets else []:
+        name, separator, location = extra_set.partition("=")
+        if not separator or not name or not location:
+            raise ValueError(f"The option set {extra_set} is not given as name=options.json")
+        locations[name] = Path(location)
+    return locations
+
+
+def choose_option_sets(file_location: str, locations: dict[str, Path]) -> list[str]:
+    """Works out which sets a file is checked against, from its name
+
+    Args:
+        file_location: str - the configuration file
+        locations: dict[str, Path] - the known option sets
+
+    Returns:
+        list[str] - the names of the sets, with the one found first used for paths which are in more than one
+
+    Note:
+        A home.nix (or any file in a home-manager directory) is a home-manager configuration, and anything else is a
+        NixOS configuration. If the home-manager options are not installed, home-manager configurations are checked
+        against the NixOS options instead so they are still checked at all. Sets which are not in the data directory
+        are in-house modules, which add to either
+    """
+
+    path = Path(file_location)
+    is_home_manager = path.name == "home.nix" or "home-manager" in path.parts
+    home_manager_location = locations.get("home-manager")
+    base_set = "home-manager" if is_home_manager and home_manager_location and home_manager_location.exists() \
+        else "nixos"
+    return [base_set] + [name for name in locations if name not in OPTION_SET_FILES]
+
+
+class OptionSets:
+    """Looks options up in several option sets at once, as if they were one set
+
+    Note:
+        The sets a file is checked against are layered, so a path is looked up in each in turn until one has it.
+        Subtrees mounted from another set (like home-manager.users.<name>) are looked up in that set with the part of
+        the path leading up to the subtree taken off, and it is put back on the option paths found. Each set is its
+        own index on disk, so only the strings which are looked up are held in memory, and those are interned by
+        ParsingOptions so the sets share them
+    """
+
+    def __init__(self, locations: dict[str, Path], layers: list[str], cache_directory: Path | None = None) -> None:
+        """Opens the sets which are used, and the sets mounted in them
+
+        Args:
+            locations: dict[str, Path] - the location of the options.json of each set, by name
+            layers: list[str] - the sets to check against, in the order they are looked in
+            cache_directory: Path | None - where to keep the indexes, by default $XDG_CACHE_HOME/nix-tree
+
+        Raises:
+            FileNotFoundError() - if the first set does not exist, the others are left out if they do not
+        """
+
+        self.__opened: dict[str, ParsingOptions] = {}
+        self.__layers = [self.__open(name, locations, cache_directory, i == 0) for i, name in enumerate(layers)]
+        self.__layers = [layer for layer in self.__layers if layer]
+        self.__mounts: list[tuple[list[str], list[ParsingOptions]]] = []
+        for name in layers:
+            for mount_path, mounted_name in OPTION_SET_MOUNTS.get(name, {}).items():
+                if mounted := self.__open(mounted_name, locations, cache_directory, False):
+                    self.__mounts.append((split_option_path(mount_path), [mounted]))
+        self.__mounts.sort(key=lambda mount: len(mount[0]), reverse=True)  # The deepest subtree is matched first
+
+    def check_type(self, option_path: str) -> tuple[Types, str] | None:
+        """Finds the type of an option in the first set which has it
+
+        Args:
+            option_path: str - the path of the option
+
+        Returns:
+            tuple[Types, str] | None - the type and the type string, or None if no set has the option
+        """
+
+        layers, _, path = self.__route(option_path)
+        for layer in layers:
+            if found := layer.check_type(path):
+                return found
+        return None
+
+    def get_description(self, option_path: str) -> str | None:
+        """Finds the description of an option in the first set which has it
+
+        Args:
+            option_path: str - the path of the option
+
+        Returns:
+            str | None - the description, or None if no set has the option or it has no description
+        """
+
+        layers, _, path = self.__route(option_path)
+        for layer in layers:
+            if description := layer.get_description(path):
+                return description
+        return None
+
+    def get_children(self, section_path: str, prefix: str = "", limit: int = 50) -> list[str]:
+        """Finds the parts of option paths which can come next in a section, from every set
+
+        Args:
+            section_path: str - the path of the section, "" for the top level
+            prefix: str - what has been typed of the next part so far
+            limit: int - the most parts to return
+
+        Returns:
+            list[str] - the next parts which start with the prefix, in alphabetical order
+        """
+
+        layers, _, path = self.__route(section_path, section=True)
+        children = {child for layer in layers for child in layer.get_children(path, prefix, limit)}
+        return sorted(children)[:limit]
+
+    def search(self, query: str, section_path: str = "", limit: int = 50) -> list[str]:
+        """Finds the options whose paths best match a half remembered name, in every set
+
+        Args:
+            query: str - the words to search for
+            section_path: str - only search the options in this section, "" for every option
+            limit: int - the most options to return
+
+        Returns:
+            list[str] - the option paths, the best matches of the first set first
+        """
+
+        layers, mount_prefix, path = self.__route(section_path, section=True)
+        found = [mount_prefix + option for layer in layers for option in layer.search(query, path, limit)]
+        return list(dict.fromkeys(found))[:limit]
+
+    def search_descriptions(self, query: str, section_path: str = "", limit: int = 50) -> list[str]:
+        """Finds the options whose descriptions best match some words, in every set
+
+        Args:
+            query: str - the words to search for
+            section_path: str - only search the options in this section, "" for every option
+            limit: int - the most options to return
+
+        Returns:
+            list[str] - the option paths, the best matches of the first set first
+        """
+
+        layers, mount_prefix, path = self.__route(section_path, section=True)
+        found = [mount_prefix + option for layer in layers
+                 for option in layer.search_descriptions(query, path, limit)]
+        return list(dict.fromkeys(found))[:limit]
+
+    def look_up_options(self, option_paths: list[str]) -> dict[str, tuple[str, Types | None, str]]:
+        """Looks up many option paths at once, each in the sets of the subtree it is in
+
+        Args:
+            option_paths: list[str] - the paths to look up
+
+        Returns:
+            dict[str, tuple[str, Types | None, str]] - for each path which is, or is inside, an option: the path of
+            the option (including the part leading up to a mounted subtree), its type and its type string
+        """
+
+        routes: dict[int, tuple[list[ParsingOptions], dict[str, tuple[str, str]]]] = {}
+        for option_path in option_paths:
+            layers, mount_prefix, path = self.__route(option_path)
+            routes.setdefault(id(layers), (layers, {}))[1][option_path] = (mount_prefix, path)
+        found: dict[str, tuple[str, Types | None, str]] = {}
+        for layers, paths in routes.values():
+            for layer in layers:
+                remaining = [option_path for option_path in paths if option_path not in found]
+                if not remaining:
+                    break
+                layer_found = layer.look_up_options([paths[option_path][1] for option_path in remaining])
+                for option_path in remaining:
+                    mount_prefix, path = paths[option_path]
+                    if option := layer_found.get(path):
+                        found[option_path] = (mount_prefix + option[0], option[1], option[2])
+        return found
+
+    def get_validator(self, option_path: str) -> Validator | None:
+        """Gets the validator for the values of an option, from the first set which has it
+
+        Args:
+            option_path: str - the path of the option
+
+        Returns:
+            Validator | None - the validator, or None if no set has the option
+        """
+
+        layers, _, path = self.__route(option_path)
+        for layer in layers:
+            if validator := layer.get_validator(path):
+                return validator
+        return None
+
+    def __route(self, path: str, section: bool = False) -> tuple[list[ParsingOptions], str, str]:
+        """Works out which sets a path is looked up in
+
+        Args:
+            path: str - the path of an option (or section)
+            section: bool - whether the path is a section, so the top of a mounted subtree is in the mounted set
+
+        Returns:
+            tuple[list[ParsingOptions], str, str] - the sets, the part of the path leading up to the subtree they are
+            mounted at (with a dot on the end, "" if they are not mounted) and the rest of the path
+        """
+
+        parts = split_option_path(path) if path else []
+        for mount_parts, layers in self.__mounts:
+            if len(parts) < len(mount_parts) + (0 if section else 1):
+                continue
+            if all(part == mount_part or is_wildcard(mount_part) for part, mount_part in zip(parts, mount_parts)):
+                return layers, ".".join(parts[:len(mount_parts)]) + ".", ".".join(parts[len(mount_parts):])
+        return self.__layers, "", path
+
+    def __open(self, name: str, locations: dict[str, Path], cache_directory: Path | None,
+               required: bool) -> ParsingOptions | None:
+        """Opens a set, only once however many times it is used
+
+        Args:
+            name: str - the name of the set
+            locations: dict[str, Path] - the location of the options.json of each set, by name
+            cache_directory: Path | None - where to keep the indexes
+            required: bool - whether to raise an error if the set does not exist
+
+        Returns:
+            ParsingOptions | None - the set, or None if it does not exist and is not required
+
+        Raises:
+            FileNotFoundError() - if the set is required and does not exist
+        """
+
+        if name not in self.__opened:
+            try:
+                if name not in locations:
+                    raise FileNotFoundError(f"There is no option set called {name}")
+                self.__opened[name] = ParsingOptions(locations[name], cache_directory)
+            except FileNotFoundError:
+                if required:
+                    raise
+                return None
+        return self.__opened[name]
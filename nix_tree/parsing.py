@@ -1,8 +1,19 @@
 """Stores the parsing class to operate upon the options.json"""
 
+from concurrent.futures import Future
+import hashlib
 import json
+import math
+import os
 from enum import Enum
 from pathlib import Path
+import re
+import sqlite3
+import sys
+import tempfile
+from typing import Any, Callable
+
+from nix_tree.validators import Validator, compile_type
 
 
 class Types(Enum):
@@ -14,27 +25,158 @@ class Types(Enum):
     LIST = 4
 
 
+def type_from_string(type_as_string: str) -> Types | None:
+    """Works out the type of an option from the type string in the options.json
+
+    Args:
+        type_as_string: str - the type string, e.g. "list of string"
+
+    Returns:
+        Types | None - the type, or None if it is not one the program can check
+    """
+
+    if "boolean" in type_as_string:
+        return Types.BOOL
+    if "list" in type_as_string:
+        return Types.LIST
+    if "string" in type_as_string:
+        return Types.STRING
+    if "integer" in type_as_string:
+        return Types.INT
+    return None
+
+
+def split_option_path(option_path: str) -> list[str]:
+    """Splits an option path into its parts, keeping quoted parts which contain dots together
+
+    Args:
+        option_path: str - the option path, e.g. boot.kernel.sysctl."net.ipv4.ip_forward"
+
+    Returns:
+        list[str] - the parts of the path
+    """
+
+    return re.findall(r'"[^"]*"|\'[^\']*\'|[^.]+', option_path)
+
+
+def is_wildcard(part: str) -> bool:
+    """Checks if a part of an option path is a placeholder which any name can go in, e.g. <name> or *
+
+    Args:
+        part: str - the part of the option path
+
+    Returns:
+        bool - true if the part is a placeholder
+    """
+
+    return part == "*" or (part.startswith("<") and part.endswith(">"))
+
+
+def trigrams(text: str) -> set[str]:
+    """Splits text into the overlapping groups of three characters it contains, for fuzzy searching
+
+    Args:
+        text: str - the text, e.g. opensh
+
+    Returns:
+        set[str] - the groups of three characters, e.g. {"ope", "pen", "ens", "nsh"}
+    """
+
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def description_words(description: str) -> set[str]:
+    """Splits a description into the words it contains, for searching the descriptions
+
+    Args:
+        description: str - the description, or the words being searched for
+
+    Returns:
+        set[str] - the lowercase words
+    """
+
+    return set(re.findall(r"[a-z0-9]+", description.lower()))
+
+
+def find_options_location() -> Path:
+    """Works out where the options.json is, which is in the data directory of the program
+
+    Returns:
+        Path - the location of the options.json
+
+    Note:
+        This allows for the program to run without a constant options location
+        It was an issue as it wouldn't allow the program to be installed without hardcoding
+        the location of the options file.
+    """
+
+    path_of_executable = Path(__file__).parts
+    options_location = Path()
+    if 'store' in path_of_executable:  # If it is being run as a flake
+        for i in path_of_executable:
+            if i == "lib":
+                break
+            options_location = options_location / i
+    else:  # If it is not being run as a flake
+        for i in path_of_executable:
+            if i == "nix-tree":
+                options_location = options_location / i
+                break
+            options_location = options_location / i
+    return options_location / "data/options.json"
+
+
 class ParsingOptions:
-    """This class manages the parsing of the options.json file"""
+    """This class manages the parsing of the options.json file
 
-    def __init__(self, file_path: Path) -> None:
+    Note:
+        The options.json is converted once into an indexed sqlite database in the cache directory, named after the
+        hash of the options.json, so starting up only opens the database instead of reading every option.
+        Descriptions are only read from the database when they are asked for.
+        The index also stores a trie of the option paths, as a table of the children of each part of a path, so the
+        options in a section starting with some letters can be found without looking through every option.
+        The placeholder edges of the trie (e.g. the <name> in users.users.<name>.extraGroups) are kept in their own
+        table, so a path like users.users.max.extraGroups is matched to its option one part at a time.
+        For searching there is a table of the trigrams (groups of three characters) in each option path, so options
+        can be found from parts of their names, and a table of the options each word is in the description of.
+        The part names and type strings handed out are interned, as the same ones are used by many options (and by
+        every option set which is open)
+    """
+
+    INDEX_VERSION = 5  # Increased whenever what is stored in the index changes, so old indexes are not used
+    LOOKUP_BATCH_SIZE = 500  # Kept below the most parameters older versions of sqlite allow in one query
+    SEARCH_CANDIDATES = 10  # How many times more options than are asked for are ranked when searching
+    PREFIX_LENGTH = 4  # How long a word has to be to match the words in descriptions which start with it
+
+    def __init__(self, file_path: Path, cache_directory: Path | None = None) -> None:
         """The init function takes in the files location and checks if it exists
-        before reading it into a string
+        before opening its index, building the index first if there is not one for this options.json
 
         Args:
             file_path: Path - a path object containing the file path of the options.json
+            cache_directory: Path | None - where to keep the index, by default $XDG_CACHE_HOME/nix-tree
 
         Raises:
             FileNotFoundError() - if the file does not exist (or it is a directory)
         """
 
         if (not file_path.exists()) or (file_path.is_dir()):
-            raise FileNotFoundError("The options file does not exist")
-        self.__options = json.loads(file_path.read_text())
+            raise FileNotFoundError(f"The options file {file_path} does not exist")
+        if cache_directory is None:
+            cache_directory = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "nix-tree"
+        try:
+            index_location = cache_directory / (f"options-{self.__hash_options(file_path, cache_directory)}"
+                                                f".v{self.INDEX_VERSION}.sqlite")
+            if not index_location.exists():
+                self.__build_index(file_path, index_location)
+            # check_same_thread is off as the options may be loaded and used from different threads
+            self.__database = sqlite3.connect(f"file:{index_location}?mode=ro", uri=True, check_same_thread=False)
+        except (OSError, sqlite3.Error):  # If the cache can not be written the index is kept in memory instead
+            self.__database = sqlite3.connect(":memory:", check_same_thread=False)
+            self.__fill_index(self.__database, file_path)
 
     def check_type(self, option_path: str) -> tuple[Types, str] | None:
-        """Searches the options dictionary (generated in init) and returns the type and
-        the string found
+        """Searches the options index and returns the type and the string found
 
         Args:
             option_path: str - the path of the option that is being looked for
@@ -43,17 +185,465 @@ class ParsingOptions:
             tuple(Types, str) - the type found in the string and the full string
         """
 
-        try:
-            type_as_string: str = self.__options[option_path]["type"]
-        except KeyError:
+        row = self.__database.execute("SELECT type_code, type FROM options WHERE path = ?", (option_path,)).fetchone()
+        if row is None and (template := self.find_template(option_path)):
+            row = self.__database.execute("SELECT type_code, type FROM options WHERE path = ?", (template,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return Types(row[0]), sys.intern(row[1])
+
+    def get_description(self, option_path: str) -> str | None:
+        """Returns the description of an option
+
+        Args:
+            option_path: str - the path of the option
+
+        Returns:
+            str | None - the description, or None if the option does not exist or has no description
+        """
+
+        row = self.__database.execute("SELECT description FROM options WHERE path = ?", (option_path,)).fetchone()
+        if row is None and (template := self.find_template(option_path)):
+            row = self.__database.execute("SELECT description FROM options WHERE path = ?", (template,)).fetchone()
+        return row[0] if row else None
+
+    def get_children(self, section_path: str, prefix: str = "", limit: int = 50) -> list[str]:
+        """Finds the parts of option paths which can come next in a section, for completing paths as they are typed
+
+        Args:
+            section_path: str - the path of the section, "" for the top level
+            prefix: str - what has been typed of the next part so far
+            limit: int - the most parts to return
+
+        Returns:
+            list[str] - the next parts which start with the prefix, in alphabetical order
+        """
+
+        if section_path and not self.__is_section(section_path):
+            section_path = self.find_template(section_path, section=True) or section_path
+        return [sys.intern(row[0]) for row in self.__database.execute(
+            "SELECT child FROM children WHERE parent = ? AND child >= ? AND child < ? ORDER BY child LIMIT ?",
+            (section_path, prefix, prefix + "\U0010ffff", limit)
+        )]
+
+    def search(self, query: str, section_path: str = "", limit: int = 50) -> list[str]:
+        """Finds the options whose paths best match a half remembered name, e.g. "opensh passwordauth" finds
+        services.openssh.settings.PasswordAuthentication
+
+        Args:
+            query: str - the words to search for, separated by spaces or dots
+            section_path: str - only options in this section are found, "" for all the options
+            limit: int - the most options to return
+
+        Returns:
+            list[str] - the option paths, best matches first
+
+        Note:
+            The options sharing the most trigrams with the query are found by the index, then those are ranked by how
+            many of the words they contain exactly and how short they are
+        """
+
+        words = [word for word in re.split(r"[\s.]+", query.lower()) if word]
+        query_trigrams = set().union(*(trigrams(word) for word in words)) if words else set()
+        if not query_trigrams:  # Only words shorter than three characters
+            return []
+        lowest, highest = (section_path + ".", section_path + "/") if section_path else ("", "\U0010ffff")
+        candidates = self.__database.execute(
+            "SELECT paths.path, COUNT(*) AS hits FROM trigrams JOIN paths ON paths.id = trigrams.id "
+            f"WHERE trigrams.trigram IN ({', '.join('?' * len(query_trigrams))}) AND paths.path >= ? AND paths.path < ?"
+            " GROUP BY trigrams.id ORDER BY hits DESC LIMIT ?",
+            (*query_trigrams, lowest, highest, limit * self.SEARCH_CANDIDATES)
+        ).fetchall()
+
+        def rank(candidate: tuple[str, int]) -> tuple[int, int]:
+            path, hits = candidate
+            path_lower = path.lower()
+            return -(hits + len(query_trigrams) * sum(word in path_lower for word in words)), len(path)
+
+        return [path for path, _ in sorted(candidates, key=rank)[:limit]]
+
+    def search_descriptions(self, query: str, section_path: str = "", limit: int = 50) -> list[str]:
+        """Finds the options whose descriptions best match some words, e.g. "enable TRIM"
+
+        Args:
+            query: str - the words to search for
+            section_path: str - only options in this section are found, "" for all the options
+            limit: int - the most options to return
+
+        Returns:
+            list[str] - the option paths, best matches first
+
+        Note:
+            Each word matches the words in the descriptions which start with it, and counts for more the fewer
+            descriptions it is in, so rare words like trim count for more than common words like enable
+        """
+
+        weighted_words = []
+        option_count = self.__database.execute("SELECT COUNT(*) FROM paths").fetchone()[0]
+        for word in sorted(description_words(query)):
+            # Short words only match themselves, as too many words start with them
+            word_range = (word, word + "\U0010ffff") if len(word) >= self.PREFIX_LENGTH else (word, word + "\0")
+            matches = self.__database.execute("SELECT COUNT(DISTINCT id) FROM postings WHERE word >= ? AND word < ?",
+                                              word_range).fetchone()[0]
+            if matches:
+                weighted_words.append((math.log(1 + option_count / matches), *word_range))
+        if len(weighted_words) > 1:  # Words in most descriptions (like "the") barely change the order but are slow
+            weighted_words = [word for word in weighted_words if word[0] > math.log(3)] or weighted_words
+        if not weighted_words:
+            return []
+        lowest, highest = (section_path + ".", section_path + "/") if section_path else ("", "\U0010ffff")
+        matches_of_each_word = " UNION ALL ".join(
+            ["SELECT DISTINCT id, ? AS weight FROM postings WHERE word >= ? AND word < ?"] * len(weighted_words)
+        )
+        return [row[0] for row in self.__database.execute(
+            f"SELECT paths.path FROM ({matches_of_each_word}) AS matches JOIN paths ON paths.id = matches.id "
+            "WHERE paths.path >= ? AND paths.path < ? GROUP BY matches.id "
+            "ORDER BY SUM(matches.weight) DESC, LENGTH(paths.path) LIMIT ?",
+            (*(value for weighted_word in weighted_words for value in weighted_word), lowest, highest, limit)
+        )]
+
+    def look_up_options(self, option_paths: list[str]) -> dict[str, tuple[str, Types | None, str]]:
+        """Looks up many option paths at once, e.g. every variable in a configuration file
+
+        Args:
+            option_paths: list[str] - the paths to look up
+
+        Returns:
+            dict[str, tuple[str, Types | None, str]] - for each path which is an option, or is inside one (like
+            boot.kernel.sysctl.'vm.swappiness' is inside boot.kernel.sysctl), the path of the option in the
+            options.json, its type (None if it cannot be checked) and its type string. Other paths are left out
+
+        Note:
+            The paths which are options exactly are found with a few queries of many paths each, only the rest are
+            looked up one at a time
+        """
+
+        found: dict[str, tuple[str, Types | None, str]] = {}
+        for i in range(0, len(option_paths), self.LOOKUP_BATCH_SIZE):
+            batch = option_paths[i:i + self.LOOKUP_BATCH_SIZE]
+            for path, type_code, type_as_string in self.__database.execute(
+                    f"SELECT path, type_code, type FROM options WHERE path IN ({', '.join('?' * len(batch))})", batch):
+                found[path] = (path, Types(type_code) if type_code is not None else None, sys.intern(type_as_string))
+        for path in option_paths:
+            if path in found:
+                continue
+            parts = split_option_path(path)
+            for end in range(len(parts), 0, -1):  # The whole path, then the options it could be inside
+                option_path = self.find_template(".".join(parts[:end]))
+                if option_path:
+                    type_code, type_as_string = self.__database.execute(
+                        "SELECT type_code, type FROM options WHERE path = ?", (option_path,)).fetchone()
+                    found[path] = (sys.intern(option_path), Types(type_code) if type_code is not None else None,
+                                   sys.intern(type_as_string))
+                    break
+        return found
+
+    def get_validator(self, option_path: str) -> Validator | None:
+        """Gets the validator for the values of an option, compiled from its type string
+
+        Args:
+            option_path: str - the path of the option, which may have names in place of placeholders
+
+        Returns:
+            Validator | None - the validator, or None if the path is not an option (or is inside one, like an
+            attribute in an attribute set, where the options type is not the type of the value)
+        """
+
+        option = self.look_up_options([option_path]).get(option_path)
+        if option is None or len(split_option_path(option[0])) < len(split_option_path(option_path)):
             return None
+        return compile_type(option[2])
+
+    def find_template(self, path: str, section: bool = False) -> str | None:
+        """Finds the option (or section) a path with names in place of placeholders belongs to, e.g.
+        services.nginx.virtualHosts.<name>.root for services.nginx.virtualHosts.'example.org'.root
+
+        Args:
+            path: str - the path, with quoted parts quoted with either ' or "
+            section: bool - whether to look for a section instead of an option
 
-        if "boolean" in type_as_string:
-            return Types.BOOL, type_as_string
-        if "list" in type_as_string:
-            return Types.LIST, type_as_string
-        if "string" in type_as_string:
-            return Types.STRING, type_as_string
-        if "integer" in type_as_string:
-            return Types.INT, type_as_string
+        Returns:
+            str | None - the path as it is in the options.json, or None if it does not match any option
+
+        Note:
+            The trie is walked one part at a time, trying the part itself before any placeholder at that point, so
+            only a few lookups are made for each part of the path. Going back is only needed when a name which is an
+            option itself leads nowhere, e.g. a virtual host called locations
+        """
+
+        parts = [f'"{part[1:-1]}"' if len(part) >= 2 and part[0] == part[-1] == "'" else part
+                 for part in split_option_path(path)]
+        stack: list[tuple[int, str]] = [(0, "")]
+        while stack:
+            position, template = stack.pop()
+            if position == len(parts):
+                if section and self.__is_section(template):
+                    return template
+                if not section and self.__database.execute("SELECT 1 FROM options WHERE path = ?",
+                                                           (template,)).fetchone():
+                    return template
+                continue
+            prefix = template + "." if template else ""
+            for (wildcard,) in self.__database.execute("SELECT child FROM wildcards WHERE parent = ?", (template,)):
+                stack.append((position + 1, prefix + wildcard))
+            if self.__database.execute("SELECT 1 FROM children WHERE parent = ? AND child = ?",
+                                       (template, parts[position])).fetchone():
+                stack.append((position + 1, prefix + parts[position]))  # Added last so it is tried first
         return None
+
+    def __is_section(self, section_path: str) -> bool:
+        """Checks if a path is a section in the options.json, i.e. there are options below it
+
+        Args:
+            section_path: str - the path of the section
+
+        Returns:
+            bool - true if there are options below it
+        """
+
+        return self.__database.execute("SELECT 1 FROM children WHERE parent = ? LIMIT 1",
+                                       (section_path,)).fetchone() is not None
+
+    @staticmethod
+    def __hash_options(file_path: Path, cache_directory: Path) -> str:
+        """Works out the hash of the options.json, which is stored along with its size and modification time so it is
+        only worked out again if the file changes
+
+        Args:
+            file_path: Path - the options.json
+            cache_directory: Path - where the stored hashes are kept
+
+        Returns:
+            str - the sha256 hash of the options.json
+        """
+
+        hashes_location = cache_directory / "options-hashes.json"
+        file_stat = file_path.stat()
+        key = str(file_path.resolve())
+        try:
+            hashes: dict[str, list] = json.loads(hashes_location.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            hashes = {}
+        if hashes.get(key, [None, None, None])[:2] == [file_stat.st_size, file_stat.st_mtime_ns]:
+            return hashes[key][2]
+        with open(file_path, "rb") as file:
+            options_hash = hashlib.file_digest(file, "sha256").hexdigest()
+        hashes[key] = [file_stat.st_size, file_stat.st_mtime_ns, options_hash]
+        cache_directory.mkdir(parents=True, exist_ok=True)
+        hashes_location.write_text(json.dumps(hashes), encoding="utf-8")
+        return options_hash
+
+    def __build_index(self, file_path: Path, index_location: Path) -> None:
+        """Builds the index into a temporary file which is renamed into place once it is complete
+
+        Args:
+            file_path: Path - the options.json
+            index_location: Path - where the index should be
+        """
+
+        file_descriptor, temporary_location = tempfile.mkstemp(suffix=".tmp", dir=index_location.parent)
+        os.close(file_descriptor)
+        try:
+            with sqlite3.connect(temporary_location) as database:
+                self.__fill_index(database, file_path)
+            database.close()
+            os.replace(temporary_location, index_location)
+        except BaseException:
+            Path(temporary_location).unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def __fill_index(database: sqlite3.Connection, file_path: Path) -> None:
+        """Reads the options.json into the index, working out the type of every option
+
+        Args:
+            database: sqlite3.Connection - the database to fill
+            file_path: Path - the options.json
+        """
+
+        database.execute("CREATE TABLE options (path TEXT PRIMARY KEY, type_code INTEGER, type TEXT, description TEXT)"
+                         " WITHOUT ROWID")
+        database.execute("CREATE TABLE children (parent TEXT, child TEXT, PRIMARY KEY (parent, child)) WITHOUT ROWID")
+        database.execute("CREATE TABLE wildcards (parent TEXT, child TEXT, PRIMARY KEY (parent, child)) WITHOUT ROWID")
+        database.execute("CREATE TABLE paths (id INTEGER PRIMARY KEY, path TEXT)")
+        database.execute("CREATE TABLE trigrams (trigram TEXT, id INTEGER, PRIMARY KEY (trigram, id)) WITHOUT ROWID")
+        database.execute("CREATE TABLE postings (word TEXT, id INTEGER, PRIMARY KEY (word, id)) WITHOUT ROWID")
+        rows = []
+        children: set[tuple[str, str]] = set()
+        for option_path, option in json.loads(file_path.read_text()).items():
+            parts = split_option_path(option_path)
+            for i, part in enumerate(parts):
+                children.add((".".join(parts[:i]), part))
+            type_as_string = option.get("type", "")
+            option_type = type_from_string(type_as_string)
+            description = option.get("description")
+            if isinstance(description, dict):  # Some descriptions are stored as {"_type": "mdDoc", "text": ...}
+                description = description.get("text")
+            rows.append((option_path, option_type.value if option_type else None, type_as_string, description))
+        database.executemany("INSERT OR REPLACE INTO options VALUES (?, ?, ?, ?)", rows)
+        database.executemany("INSERT INTO children VALUES (?, ?)", children)
+        database.executemany("INSERT INTO wildcards VALUES (?, ?)",
+                             [(parent, child) for parent, child in children if is_wildcard(child)])
+        database.executemany("INSERT INTO paths VALUES (?, ?)", enumerate(row[0] for row in rows))
+        database.executemany("INSERT INTO trigrams VALUES (?, ?)", (
+            (trigram, i) for i, row in enumerate(rows) for trigram in trigrams(row[0].lower())
+        ))
+        database.executemany("INSERT INTO postings VALUES (?, ?)", (
+            (word, i) for i, row in enumerate(rows) if row[3] for word in description_words(row[3])
+        ))
+        database.execute("CREATE INDEX paths_by_path ON paths (path)")
+        database.commit()
+
+
+class BackgroundOptions:
+    """Holds the options while they are loaded in the background, so the UI does not have to wait for them to start
+
+    Note:
+        Anything which uses the options before they have loaded waits for them to finish loading. If they could not be
+        loaded then no types, descriptions or completions are found
+    """
+
+    def __init__(self) -> None:
+        """Creates the future the loaded options will be stored in"""
+
+        self.__future: Future[ParsingOptions] = Future()
+
+    def load(self, file_path: Path | Callable[[], Any]) -> None:
+        """Loads the options, this is run in a background thread
+
+        Args:
+            file_path: Path | Callable[[], Any] - the file path of the options.json, or a function which opens the
+            options some other way (e.g. several option sets, which are looked up the same way)
+        """
+
+        try:
+            self.__future.set_result(ParsingOptions(file_path) if isinstance(file_path, Path) else file_path())
+        except Exception as error:  # Anything waiting for the options would wait forever if this was not set
+            self.__future.set_exception(error)
+
+    def is_ready(self) -> bool:
+        """Returns whether the options have finished loading (or failed to)
+
+        Returns:
+            bool - true if they have finished loading
+        """
+
+        return self.__future.done()
+
+    def get_error(self) -> BaseException | None:
+        """Waits for the options to load and returns why they could not be loaded
+
+        Returns:
+            BaseException | None - the error, or None if they loaded
+        """
+
+        return self.__future.exception()
+
+    def check_type(self, option_path: str) -> tuple[Types, str] | None:
+        """Waits for the options to load and returns the type of an option
+
+        Args:
+            option_path: str - the path of the option that is being looked for
+
+        Returns:
+            tuple(Types, str) - the type found in the string and the full string
+        """
+
+        options = self.__wait()
+        return options.check_type(option_path) if options else None
+
+    def get_description(self, option_path: str) -> str | None:
+        """Waits for the options to load and returns the description of an option
+
+        Args:
+            option_path: str - the path of the option
+
+        Returns:
+            str | None - the description, or None if the option does not exist or has no description
+        """
+
+        options = self.__wait()
+        return options.get_description(option_path) if options else None
+
+    def get_children(self, section_path: str, prefix: str = "", limit: int = 50) -> list[str]:
+        """Waits for the options to load and finds the parts of option paths which can come next in a section
+
+        Args:
+            section_path: str - the path of the section, "" for the top level
+            prefix: str - what has been typed of the next part so far
+            limit: int - the most parts to return
+
+        Returns:
+            list[str] - the next parts which start with the prefix, in alphabetical order
+        """
+
+        options = self.__wait()
+        return options.get_children(section_path, prefix, limit) if options else []
+
+    def search(self, query: str, section_path: str = "", limit: int = 50) -> list[str]:
+        """Waits for the options to load and finds the options whose paths best match a half remembered name
+
+        Args:
+            query: str - the words to search for, separated by spaces or dots
+            section_path: str - only options in this section are found, "" for all the options
+            limit: int - the most options to return
+
+        Returns:
+            list[str] - the option paths, best matches first
+        """
+
+        options = self.__wait()
+        return options.search(query, section_path, limit) if options else []
+
+    def search_descriptions(self, query: str, section_path: str = "", limit: int = 50) -> list[str]:
+        """Waits for the options to load and finds the options whose descriptions best match some words
+
+        Args:
+            query: str - the words to search for
+            section_path: str - only options in this section are found, "" for all the options
+            limit: int - the most options to return
+
+        Returns:
+            list[str] - the option paths, best matches first
+        """
+
+        options = self.__wait()
+        return options.search_descriptions(query, section_path, limit) if options else []
+
+    def look_up_options(self, option_paths: list[str]) -> dict[str, tuple[str, Types | None, str]]:
+        """Waits for the options to load and looks up many option paths at once
+
+        Args:
+            option_paths: list[str] - the paths to look up
+
+        Returns:
+            dict[str, tuple[str, Types | None, str]] - for each path which is, or is inside, an option: the path of
+            the option, its type and its type string
+        """
+
+        options = self.__wait()
+        return options.look_up_options(option_paths) if options else {}
+
+    def get_validator(self, option_path: str) -> Validator | None:
+        """Waits for the options to load and gets the validator for the values of an option
+
+        Args:
+            option_path: str - the path of the option
+
+        Returns:
+            Validator | None - the validator, or None if the path is not an option
+        """
+
+        options = self.__wait()
+        return options.get_validator(option_path) if options else None
+
+    def __wait(self) -> ParsingOptions | None:
+        """Waits for the options to finish loading
+
+        Returns:
+            ParsingOptions | None - the options, or None if they could not be loaded
+        """
+
+        if self.__future.exception():
+            return None
+        return self.__future.result()
@@ -0,0 +1,228 @@
+"""The patch composer edits the original file in place, only rewriting the parts of it that were changed"""
+
+from typing import TextIO
+
+from nix_tree.composer import AtomicFileWriter, compose_variable, work_out_output_location
+from nix_tree.decomposer import SourceSpan, SourceSpans
+from nix_tree.errors import ErrorComposingFileFromTree
+from nix_tree.tree import DecomposerTree, ConnectorNode, VariableNode, Node
+
+
+class PatchComposer:
+    """The class which contains the functionality to patch the original file with the applied operations
+
+    Note:
+        Unlike the composer this does not regroup the file, everything that was not changed (including comments
+        that are not attached to a line) is copied over exactly as it was
+    """
+
+    def __init__(self, tree: DecomposerTree, source_spans: SourceSpans, file_location: str, write_over: bool,
+                 operations: list[str], backups: int = 0, output: TextIO | None = None) -> None:
+        """Works out the edits the operations require and writes the patched file
+
+        Args:
+            tree: DecomposerTree - the tree with the operations already applied to it
+            source_spans: SourceSpans - the spans recorded by the decomposer for the original file
+            file_location: str - the location of the original file
+            write_over: bool - whether to write over the file or append .new to the file name
+            operations: list[str] - the operations that were applied, as they are shown in the operations stack
+            backups: int - how many backups of the file being written over to keep (0 to keep none)
+            output: TextIO | None - if given the file is written to this instead of to disk (e.g. for previewing)
+
+        Raises:
+            ErrorComposingFileFromTree - if the spans could not be recorded for the original file
+        """
+
+        if not source_spans.is_valid():
+            raise ErrorComposingFileFromTree(message="The file could not be patched as parts of it could not be understood")
+        self.__tree = tree
+        self.__spans = source_spans
+        self.__source = source_spans.get_source()
+        self.__edits: list[tuple[int, int, str]] = []
+        self.__work_out_edits(operations)
+        self.__written = False
+        if output is not None:
+            self.__write_to_file(output)
+        else:
+            self.__written = AtomicFileWriter(work_out_output_location(file_location, write_over), file_location,
+                                              backups).write(self.__write_to_file)
+
+    def get_written(self) -> bool:
+        """Returns whether the file was written, it is not if it already contained exactly the patched output
+
+        Returns:
+            bool - true if the file was written
+        """
+
+        return self.__written
+
+    def get_edits(self) -> list[tuple[int, int, str]]:
+        """Returns the edits made to the original file
+
+        Returns:
+            list[tuple[int, int, str]] - the edits, each one replaces the characters from the first int up to the
+            second int with the string
+        """
+
+        return self.__edits
+
+    def __work_out_edits(self, operations: list[str]) -> None:
+        """Goes through the paths the operations touched and works out what needs to change for each of them
+
+        Args:
+            operations: list[str] - the operations that were applied
+
+        Note:
+            The tree already contains the result of the operations, so the operations are only used to know which
+            paths to look at. This means a variable changed multiple times is only rewritten once
+        """
+
+        variable_paths: dict[str, None] = {}  # A dict is used as an ordered set
+        deleted_section_paths: dict[str, None] = {}
+        for operation in operations:
+            match operation.split(" ")[0]:
+                case "Added" | "Delete" | "Change":
+                    variable_paths[operation.split(" ", 1)[1].split("=")[0]] = None
+                case "Section":
+                    if operation.split(" ")[-1] == "deleted":
+                        deleted_section_paths[operation.split(" ")[1]] = None
+
+        for path in variable_paths:
+            span = self.__spans.get_variable_span(path)
+            node = self.__tree.find_variable_node(path, self.__tree.get_root())
+            if not isinstance(node, VariableNode):
+                if span:
+                    self.__edits.append((*self.__removal_range(span), ""))
+            elif span:
+                value = self.__compose_value(node, self.__indentation_of(span.start))
+                if value != self.__source[span.value_start:span.value_end]:
+                    self.__edits.append((span.value_start, span.value_end, value))
+            else:
+                self.__edits.append(self.__insertion(node))
+
+        for path in deleted_section_paths:
+            span = self.__spans.get_section_span(path)
+            if span and not self.__section_exists(path):
+                self.__edits.append((*self.__removal_range(span), ""))
+
+        # Sorting by where the edits start (the sort is stable so insertions at the same place keep their order),
+        # and dropping any edit inside a part of the file that is being removed
+        sorted_edits: list[tuple[int, int, str]] = []
+        for edit in sorted(self.__edits, key=lambda edit: edit[0]):
+            if sorted_edits and edit[0] < sorted_edits[-1][1]:
+                continue
+            sorted_edits.append(edit)
+        self.__edits = sorted_edits
+
+    def __write_to_file(self, file: TextIO) -> None:
+        """Writes the original file with the edits spliced in
+
+        Args:
+            file: TextIO - the file to write to
+        """
+
+        position = 0
+        for start, end, replacement in self.__edits:
+            file.write(self.__source[position:start])
+            file.write(replacement)
+            position = end
+        file.write(self.__source[position:])
+
+    def __compose_value(self, node: VariableNode, prepend: str) -> str:
+        """Works out how the value of a variable will look in the file
+
+        Args:
+            node: VariableNode - the variable
+            prepend: str - the indentation of the line the variable is on
+
+        Returns:
+            str - the value, e.g. "true" from "enable = true"
+        """
+
+        return compose_variable(node, prepend)[len(node.get_name().split(".")[-1]) + 3:]
+
+    def __insertion(self, node: VariableNode) -> tuple[int, int, str]:
+        """Works out where to add a new variable, this is at the end of the deepest section in the original file
+        with its own curly braces that the variable belongs in
+
+        Args:
+            node: VariableNode - the new variable
+
+        Returns:
+            tuple[int, int, str] - the edit adding the variable
+        """
+
+        path = node.get_name().split(".")
+        for section_length in range(len(path) - 1, -1, -1):
+            span = self.__spans.get_section_span(".".join(path[:section_length]))
+            if span:
+                break
+        else:
+            raise ErrorComposingFileFromTree(message="The file could not be patched as it has no main section")
+        relative_path = ".".join(path[section_length:])
+        start_of_line = self.__source.rfind("\n", 0, span.value_end) + 1
+        if self.__source[start_of_line:span.value_end].strip() == "":  # The closing brace is on its own line
+            indentation = self.__source[start_of_line:span.value_end] + "  "
+            value = self.__compose_value(node, indentation)
+            return start_of_line, start_of_line, f"{indentation}{relative_path} = {value};\n"
+        value = self.__compose_value(node, self.__indentation_of(span.value_end))
+        return span.value_end, span.value_end, f"{relative_path} = {value}; "
+
+    def __removal_range(self, span: SourceSpan) -> tuple[int, int]:
+        """Works out what to remove to delete a variable or section, if it is on its own lines then the whole lines
+        (including any comment on the end of the last line) are removed
+
+        Args:
+            span: SourceSpan - the span of the variable or section
+
+        Returns:
+            tuple[int, int] - the start and end of what should be removed
+        """
+
+        start_of_line = self.__source.rfind("\n", 0, span.start) + 1
+        end_of_line = self.__source.find("\n", span.end)
+        if end_of_line == -1:
+            end_of_line = len(self.__source)
+        rest_of_line = self.__source[span.end:end_of_line].strip()
+        if self.__source[start_of_line:span.start].strip() == "" and (rest_of_line == "" or rest_of_line[0] == "#"):
+            return start_of_line, min(end_of_line + 1, len(self.__source))
+        end = span.end
+        while end < len(self.__source) and self.__source[end] in " \t":
+            end += 1
+        return span.start, end
+
+    def __indentation_of(self, position: int) -> str:
+        """Returns the indentation of the line a position is on
+
+        Args:
+            position: int - the position in the original file
+
+        Returns:
+            str - the whitespace at the start of the line
+        """
+
+        start_of_line = self.__source.rfind("\n", 0, position) + 1
+        end_of_indentation = start_of_line
+        while self.__source[end_of_indentation] in " \t":
+            end_of_indentation += 1
+        return self.__source[start_of_line:end_of_indentation]
+
+    def __section_exists(self, path: str) -> bool:
+        """Checks if a section still exists in the tree
+
+        Args:
+            path: str - the full path of the section
+
+        Returns:
+            bool - true if the section exists
+        """
+
+        node: Node = self.__tree.get_root()
+        for part in path.split("."):
+            for child in node.get_connected_nodes():
+                if isinstance(child, ConnectorNode) and child.get_name() == part:
+                    node = child
+                    break
+            else:
+                return False
+        return True
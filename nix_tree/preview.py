@@ -0,0 +1,168 @@
+"""Composes the edited file in memory so the changes can be previewed before they are written"""
+
+import difflib
+import io
+import re
+
+from rich.text import Text
+
+from nix_tree.composer import Composer, RenderCache
+from nix_tree.decomposer import Decomposer
+from nix_tree.errors import ErrorComposingFileFromTree
+from nix_tree.patch_composer import PatchComposer
+
+
+def compose_to_string(decomposer: Decomposer, file_location: str, operations: list[str], comments: bool,
+                      patch: bool, render_cache: RenderCache | None = None) -> str:
+    """Composes the tree of the decomposer in memory, in the same way it would be written to the file
+
+    Args:
+        decomposer: Decomposer - the decomposer whose tree already has the operations applied to it
+        file_location: str - the location of the original file
+        operations: list[str] - the operations that were applied, as they are shown in the operations stack
+        comments: bool - whether to include comments from the original file
+        patch: bool - whether to patch the original file instead of composing the whole file
+        render_cache: RenderCache | None - the cache to reuse composed sections from when composing the whole file
+
+    Returns:
+        str - the file that would be written
+    """
+
+    if patch:
+        try:
+            output = io.StringIO()
+            PatchComposer(decomposer.get_tree(), decomposer.get_source_spans(), file_location, False, operations,
+                          output=output)
+            return output.getvalue()
+        except ErrorComposingFileFromTree:  # The whole file would be written instead
+            pass
+    output = io.StringIO()
+    Composer(decomposer.get_tree(), file_location, False, comments, render_cache=render_cache, output=output)
+    return output.getvalue()
+
+
+def work_out_changed_lines(old_lines: list[str], new_lines: list[str]) -> tuple[int, int, int]:
+    """Works out the block of lines which changed, so only that block has to be replaced
+
+    Args:
+        old_lines: list[str] - the lines before the change
+        new_lines: list[str] - the lines after the change
+
+    Returns:
+        tuple[int, int, int] - the first changed line, the line the changed block ended before in old_lines, and the
+        line it ends before in new_lines (the three are equal if nothing changed)
+    """
+
+    start = 0
+    while start < len(old_lines) and start < len(new_lines) and old_lines[start] == new_lines[start]:
+        start += 1
+    old_end = len(old_lines)
+    new_end = len(new_lines)
+    while old_end > start and new_end > start and old_lines[old_end - 1] == new_lines[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+    return start, old_end, new_end
+
+
+def work_out_diff(original: str, edited: str, file_location: str) -> str:
+    """Works out a unified diff between the original and edited file
+
+    Args:
+        original: str - the original file
+        edited: str - the file that would be written
+        file_location: str - the location of the original file, used as the name in the diff
+
+    Returns:
+        str - the diff, which is empty if the files are the same
+
+    Note:
+        The lines of the files are what is compared, which keeps this fast even for large files as most lines are
+        unchanged. The tokens which changed within each changed line are worked out afterwards by highlight_diff,
+        only for the lines in the diff
+    """
+
+    return "".join(difflib.unified_diff(
+        original.splitlines(keepends=True),
+        edited.splitlines(keepends=True),
+        fromfile=file_location,
+        tofile=file_location + " (edited)",
+    ))
+
+
+# The styles of the lines of a diff, and of the tokens which changed within a removed or added line
+DIFF_LINE_STYLES: dict[str, str] = {"-": "red", "+": "green", "@": "cyan"}
+DIFF_TOKEN_STYLES: dict[str, str] = {"-": "bold reverse red", "+": "bold reverse green"}
+
+
+def work_out_changed_tokens(old_line: str, new_line: str) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    """Works out which tokens (words, spaces and symbols) of a line were changed
+
+    Args:
+        old_line: str - the line before the change
+        new_line: str - the line after the change
+
+    Returns:
+        tuple[list[tuple[int, int]], list[tuple[int, int]]] - the start and end of each changed part of the old line,
+        and of the new line
+    """
+
+    old_tokens = [token.span() for token in re.finditer(r"\w+|\s+|[^\w\s]", old_line)]
+    new_tokens = [token.span() for token in re.finditer(r"\w+|\s+|[^\w\s]", new_line)]
+    matcher = difflib.SequenceMatcher(None, [old_line[start:end] for start, end in old_tokens],
+                                      [new_line[start:end] for start, end in new_tokens], autojunk=False)
+    old_changes = []
+    new_changes = []
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if old_start < old_end:
+            old_changes.append((old_tokens[old_start][0], old_tokens[old_end - 1][1]))
+        if new_start < new_end:
+            new_changes.append((new_tokens[new_start][0], new_tokens[new_end - 1][1]))
+    return old_changes, new_changes
+
+
+def highlight_diff(diff: str) -> Text:
+    """Colours a unified diff, highlighting the tokens which changed in each pair of removed and added lines
+
+    Args:
+        diff: str - the diff from work_out_diff
+
+    Returns:
+        Text - the coloured diff
+
+    Note:
+        A block of removed lines followed by a block of added lines is a replacement, so they are paired up in order
+        and only their tokens are compared, which keeps this fast however large the file is
+    """
+
+    lines = diff.splitlines(keepends=True)
+    highlighted = Text()
+    i = 0
+    while i < len(lines):
+        if i < 2 and lines[i].startswith(("---", "+++")):  # The file names
+            highlighted.append(lines[i], style="bold")
+            i += 1
+            continue
+        if not lines[i].startswith("-"):
+            highlighted.append(lines[i], style=DIFF_LINE_STYLES.get(lines[i][:1], ""))
+            i += 1
+            continue
+        removed_end = i
+        while removed_end < len(lines) and lines[removed_end].startswith("-"):
+            removed_end += 1
+        added_end = removed_end
+        while added_end < len(lines) and lines[added_end].startswith("+"):
+            added_end += 1
+        removed = [Text(line, style=DIFF_LINE_STYLES["-"]) for line in lines[i:removed_end]]
+        added = [Text(line, style=DIFF_LINE_STYLES["+"]) for line in lines[removed_end:added_end]]
+        for old_line, new_line in zip(removed, added):
+            old_changes, new_changes = work_out_changed_tokens(old_line.plain[1:], new_line.plain[1:])
+            for start, end in old_changes:
+                old_line.stylize(DIFF_TOKEN_STYLES["-"], start + 1, end + 1)
+            for start, end in new_changes:
+                new_line.stylize(DIFF_TOKEN_STYLES["+"], start + 1, end + 1)
+        for line in removed + added:
+            highlighted.append_text(line)
+        i = added_end
+    return highlighted
@@ -0,0 +1,83 @@
+"""Keeps a record of the configuration that each rebuild command last succeeded with, so redundant rebuilds can be
+spotted"""
+
+import json
+import os
+from pathlib import Path
+
+from nix_tree.composer import hash_file
+
+
+class RebuildRecord:
+    """The class which stores the hash of the configuration file after each successful rebuild
+
+    Note:
+        The record is a small json file in the users state directory, mapping each configuration file to the hash it
+        had when each rebuild command last succeeded
+    """
+
+    def __init__(self, record_location: Path | None = None) -> None:
+        """Reads the record if there is one
+
+        Args:
+            record_location: Path | None - where the record is kept, by default $XDG_STATE_HOME/nix-tree/rebuilds.json
+        """
+
+        if record_location is None:
+            state_directory = os.environ.get("XDG_STATE_HOME") or Path.home() / ".local" / "state"
+            record_location = Path(state_directory) / "nix-tree" / "rebuilds.json"
+        self.__record_location = record_location
+        try:
+            self.__record: dict[str, dict[str, str]] = json.loads(record_location.read_text(encoding="utf-8"))
+        except (OSError, ValueError):  # There is no record yet, or it could not be read
+            self.__record = {}
+
+    @staticmethod
+    def is_rebuild(command: list[str]) -> bool:
+        """Checks if a command builds the configuration (as opposed to e.g. removing a generation)
+
+        Args:
+            command: list[str] - the command
+
+        Returns:
+            bool - true if the command is a rebuild
+        """
+
+        return "nixos-rebuild" in command or command[-2:] in (["home-manager", "switch"], ["home-manager", "build"])
+
+    def is_redundant(self, file_location: str, command: list[str]) -> bool:
+        """Checks if the command last succeeded with the configuration file exactly as it is now
+
+        Args:
+            file_location: str - the configuration file
+            command: list[str] - the rebuild command
+
+        Returns:
+            bool - true if running the command again would build the same configuration
+        """
+
+        recorded_hash = self.__record.get(str(Path(file_location).resolve()), {}).get(" ".join(command))
+        try:
+            return recorded_hash is not None and recorded_hash == hash_file(Path(file_location))
+        except OSError:
+            return False
+
+    def record(self, file_location: str, command: list[str]) -> None:
+        """Records that the command succeeded with the configuration file as it is now
+
+        Args:
+            file_location: str - the configuration file
+            command: list[str] - the rebuild command
+
+        Note:
+            If the record cannot be written nothing happens, as it is only used to warn the user
+        """
+
+        try:
+            self.__record.setdefault(str(Path(file_location).resolve()), {})[" ".join(command)] = hash_file(
+                Path(file_location)
+            )
+            self.__record_location.parent.mkdir(parents=True, exist_ok=True)
+            self.__record_location.write_text(json.dumps(self.__record, indent=2), encoding="utf-8")
+        except OSError:
+            pass
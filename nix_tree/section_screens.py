@@ -5,11 +5,16 @@ import re
 from textual.app import ComposeResult
 from textual.containers import Horizontal, Vertical, Center
 from textual.screen import ModalScreen
-from textual.widgets import Input, Label, OptionList, Tree, Button, RadioSet
+from textual.suggester import Suggester
+from rich.text import Text
+from textual.widgets import Input, Label, OptionList, Tree, Button, RadioSet, RadioButton, Static
+from textual.widgets.option_list import Option
 
 from nix_tree.custom_types import UIConnectorNode
 from nix_tree.help_screens import SectionOptionsHelpScreen
-from nix_tree.parsing import ParsingOptions, Types
+from nix_tree.lazy_tree import add_section, add_variable, find_child, section_path, ui_children
+from nix_tree.parsing import BackgroundOptions, ParsingOptions, Types
+from nix_tree.validators import compile_type
 
 
 def work_out_full_path(current_node: UIConnectorNode, path: list) -> list:
@@ -34,6 +39,55 @@ def work_out_full_path(current_node: UIConnectorNode, path: list) -> list:
     return path
 
 
+def split_typed_path(section_path: str, typed_path: str) -> tuple[str, str]:
+    """Splits what has been typed into the path of the section it is in and the part still being typed
+
+    Args:
+        section_path: str - the path of the section the variable is being added to, "" for the top level
+        typed_path: str - what has been typed so far, e.g. firefox.ena
+
+    Returns:
+        tuple[str, str] - the full path of the section being typed in and the part being typed, e.g.
+        ("programs.firefox", "ena")
+    """
+
+    parts = [section_path] if section_path else []
+    parts += typed_path.split(".")
+    return ".".join(parts[:-1]), parts[-1]
+
+
+class OptionPathSuggester(Suggester):
+    """Suggests how to finish the part of the path being typed, from the options in the options.json"""
+
+    def __init__(self, options: ParsingOptions | BackgroundOptions, section_path: str) -> None:
+        """Stores the options to suggest from
+
+        Args:
+            options: ParsingOptions | BackgroundOptions - the options
+            section_path: str - the path of the section the variable is being added to, "" for the top level
+        """
+
+        self.__options = options
+        self.__section_path = section_path
+        super().__init__(use_cache=True, case_sensitive=True)
+
+    async def get_suggestion(self, value: str) -> str | None:
+        """Suggests the first option part which starts with what is being typed
+
+        Args:
+            value: str - what has been typed so far
+
+        Returns:
+            str | None - what has been typed with the part being typed finished, or None if nothing matches
+        """
+
+        parent, prefix = split_typed_path(self.__section_path, value)
+        children = self.__options.get_children(parent, prefix, 1)
+        if not children:
+            return None
+        return value[:len(value) - len(prefix)] + children[0]
+
+
 class AddScreenBoolean(ModalScreen[str]):
     """The add variable screen for a boolean"""
 
@@ -124,12 +178,11 @@ class AddScreenGroup(ModalScreen[list]):
             self.notify("You have entered invalid character(s) for the name of the group, not adding", title="error adding section",  severity="error")
             self.dismiss(None)
         else:
-            self.__node.node.add(user_input.value)
+            add_section(self.__node.node, user_input.value)
             if self.__node.node.is_root:
                 self.dismiss([f"Section {user_input.value} added"])
             else:
-                full_path = '.'.join(work_out_full_path(self.__node.node, []))
-                self.dismiss([f"Section {full_path}.{user_input.value} added"])
+                self.dismiss([f"Section {section_path(self.__node.node)}.{user_input.value} added"])
 
 
 class AddScreenInteger(ModalScreen[str]):
@@ -231,14 +284,15 @@ class AddScreenPath(ModalScreen[list]):
         ("escape", "quit_pressed"),
     ]
 
-    def __init__(self, node: Tree.NodeSelected, options: ParsingOptions) -> None:
+    def __init__(self, node: Tree.NodeSelected, options: ParsingOptions | BackgroundOptions, path: str = "") -> None:
         """Redefining the init method as we need to store the current node and the data type the user would
         like to add
 
         Args:
             node: Tree.NodeSelected - the section from which they are creating the variable from
-            options: ParsingOptions - an object that allows the path function to work out the required type
+            options: ParsingOptions | BackgroundOptions - an object that allows the path function to work out the required type
             of the variable the user wants to add
+            path: str - the path to start with, e.g. an option chosen from the search, "" to type it
 
         Note:
             It also initialises a variable for later use, operations stores the operations that need to be added
@@ -249,6 +303,8 @@ class AddScreenPath(ModalScreen[list]):
         self.__operations = []
         self.__path = ""
         self.__options = options
+        self.__initial_path = path
+        self.__section_path = section_path(node.node)
         super().__init__()
 
     def compose(self) -> ComposeResult:
@@ -256,6 +312,10 @@ class AddScreenPath(ModalScreen[list]):
 
         Returns:
             ComposeResult - the screen in a form the library understands
+
+        Note:
+            As the path is typed the options it could be are listed below the input, and the first one is suggested
+            in the input itself (press the right arrow to accept it)
         """
 
         with Vertical():
@@ -264,16 +324,65 @@ class AddScreenPath(ModalScreen[list]):
                 self.notify("This could be just the variable name or if you want it in a section/group use a .")
                 self.notify("Note the section does not need to be created, this will create any section necessary")
                 self.notify("If adding a group/section select the add group/section button")
-                yield Input(placeholder="Type the path of the variable if adding a variable", id="path_input")
+                yield Input(value=self.__initial_path, placeholder="Type the path of the variable if adding a variable",
+                            id="path_input", suggester=OptionPathSuggester(self.__options, self.__section_path))
+                yield OptionList(*self.__options.get_children(self.__section_path), id="path_completions")
                 with Center():
                     yield Button(label="Or add group/Section")
                     yield Label("Press ESC to go back")
 
+    def on_mount(self) -> None:
+        """Goes straight on to choosing the value if the screen was given a path
+
+        Note:
+            Paths with placeholders in them (like users.users.<name>.extraGroups) are left for the user to fill in
+        """
+
+        if self.__initial_path and re.search(r"<[^>]*>|\*", self.__initial_path):
+            self.notify("Replace the placeholders (like <name>) in the path with your own names")
+        elif self.__initial_path:
+            self.__choose_value(self.__initial_path)
+
+    def on_input_changed(self, path: Input.Changed) -> None:
+        """Lists the options which the part of the path being typed could be
+
+        Args:
+            path: Input.Changed - what has been typed so far
+        """
+
+        parent, prefix = split_typed_path(self.__section_path, path.value)
+        completions = self.query_one("#path_completions", OptionList)
+        completions.clear_options()
+        completions.add_options(self.__options.get_children(parent, prefix))
+
+    def on_option_list_option_selected(self, choice: OptionList.OptionSelected) -> None:
+        """Finishes the part of the path being typed with the option the user chose from the list
+
+        Args:
+            choice: OptionList.OptionSelected - the option the user chose
+        """
+
+        choice.stop()
+        path_input = self.query_one("#path_input", Input)
+        _, prefix = split_typed_path(self.__section_path, path_input.value)
+        path_input.value = path_input.value[:len(path_input.value) - len(prefix)] + str(choice.option.prompt)
+        path_input.cursor_position = len(path_input.value)
+        path_input.focus()
+
     def on_input_submitted(self, path: Input.Submitted) -> None:
         """Manages the input from the user choosing a path to place the variable
 
         Args:
             path: Input.Submitted - the path the user  inputted
+        """
+
+        self.__choose_value(path.value)
+
+    def __choose_value(self, path: str) -> None:
+        """Asks the user for the value of the variable at the path, recommending the type from the options.json
+
+        Args:
+            path: str - the path of the variable within the section
 
         Note:
             This method also does a small bit of input validation whereby if a list doesn't have all of its
@@ -309,31 +418,32 @@ class AddScreenPath(ModalScreen[list]):
                                              handle_return_from_variable_addition)
                     else:
                         self.app.push_screen(AddScreenVariableSelection(), handle_return_from_variable_addition)
+                elif type_as_defined and compile_type(type_as_defined[1]).validate(data[0]) is False:
+                    self.notify(f"The value does not fit the options type ({type_as_defined[1]})! Not updating",
+                                title="error adding option", severity="error")
+                    self.app.push_screen(RecommendedTypeOrChooseType(type_as_defined),
+                                         handle_return_from_variable_addition)
                 else:
-                    path_as_list = work_out_full_path(self.__node.node, [])
                     if data[1]:
-                        node_added = self.recursive_addition(self.__node.node, path.value.split("."), data[0], path_as_list,
-                                                             data[1])
+                        node_added = self.recursive_addition(self.__node.node, path.split("."), data[0], data[1])
                     else:
                         raise TypeError("The nodes type could not be determined")
                     if node_added:
-                        if not path_as_list:  # If we are appending to root
+                        if not self.__section_path:  # If we are appending to root
                             self.__operations.append(f"Added {self.__path}={data[0]}")
                         else:
-                            self.__operations.append(f"Added {'.'.join(path_as_list)}.{self.__path}={data[0]}")
+                            self.__operations.append(f"Added {self.__section_path}.{self.__path}={data[0]}")
                         self.dismiss(self.__operations)
             else:
                 self.app.pop_screen()
 
-        if re.search(r"[^a-zA-Z_.'\"]", path.value):
+        if re.search(r"[^a-zA-Z_.'\"]", path):
             self.notify("You have entered invalid character(s) for the path of your option, not adding", title="error adding option",  severity="error")
             self.dismiss(None)
         else:
-            self.__path = path.value
-            path_leading_up_to_section = ""
-            if not self.__node.node.is_root:
-                path_leading_up_to_section: str = '.'.join(work_out_full_path(self.__node.node, [])) + "."
-            type_as_defined: tuple[Types, str] | None = self.__options.check_type(path_leading_up_to_section + path.value)
+            self.__path = path
+            path_leading_up_to_section = f"{self.__section_path}." if self.__section_path else ""
+            type_as_defined: tuple[Types, str] | None = self.__options.check_type(path_leading_up_to_section + path)
             if type_as_defined:
                 self.app.push_screen(RecommendedTypeOrChooseType(type_as_defined),
                                      handle_return_from_variable_addition)
@@ -350,8 +460,7 @@ class AddScreenPath(ModalScreen[list]):
 
         self.app.push_screen(AddScreenGroup(self.__node), return_group_addition_for_stack)
 
-    def recursive_addition(self, node: UIConnectorNode, path: list, data: str, path_as_list: list,
-                           data_type: Types) -> bool | None:
+    def recursive_addition(self, node: UIConnectorNode, path: list, data: str, data_type: Types) -> bool | None:
         """This recursive method works through the path the user specified and creates any required sections and at the
         end it also adds the variable to the tree
 
@@ -360,36 +469,29 @@ class AddScreenPath(ModalScreen[list]):
             every stack frame)
             path: list - this stores how far down the path the function is, also informing it when to stop
             data: str - the data of the variable to be added
-            path_as_list: list - stores the path that needs to be added into the variables data (as it requires
-            the full path)
             data_type: Types - the data type of the variable we are adding
 
         Returns:
             bool - true if the function added the variable and false if otherwise
+
+        Note:
+            The sections and the variable are looked up by their full paths, so the sections on the way only have
+            their children added if they need to be
         """
+
+        node_path = section_path(node)
+        full_path = f"{node_path}.{path[0]}" if node_path else path[0]
         if len(path) > 1:
-            for child in node.children:
-                if child.label.plain == path[0]:
-                    del path[0]
-                    return self.recursive_addition(child, path, data, path_as_list, data_type)
-            new_node = node.add(path[0])
-            if new_node.parent.is_root:
-                self.__operations.append(f"Section {path[0]} added")
-            else:
-                self.__operations.append(f"Section {'.'.join(work_out_full_path(new_node, []))} added")
-            del path[0]
-            return self.recursive_addition(new_node, path, data, path_as_list, data_type)
-
-        for child in node.children:
-            if child.label.plain.split("=")[0] == self.__path.split(".")[-1]:
-                self.notify("variable already exists", severity="error")
-                return False
-        if not path_as_list:
-            node.add_leaf(self.__path.split(".")[-1] + "=" + data,
-                          data={self.__path: data, "type": data_type})
-        else:
-            node.add_leaf(self.__path.split(".")[-1] + "=" + data,
-                          data={'.'.join(path_as_list) + "." + self.__path: data, "type": data_type})
+            child = find_child(node, path[0])
+            if child is None or child.data:
+                child = add_section(node, path[0])
+                self.__operations.append(f"Section {full_path} added")
+            return self.recursive_addition(child, path[1:], data, data_type)
+
+        if find_child(node, path[0]) is not None:
+            self.notify("variable already exists", severity="error")
+            return False
+        add_variable(node, full_path, data, data_type)
         return True
 
     def action_quit_pressed(self) -> None:
@@ -490,6 +592,117 @@ class RecommendedTypeOrChooseType(ModalScreen[tuple[str, Types]]):
         self.app.pop_screen()
 
 
+class OptionSearchScreen(ModalScreen[str]):
+    """The screen for searching the options by parts of their names or by their descriptions, returning the option
+    the user chose"""
+
+    BINDINGS = [
+        ("escape", "quit_pressed"),
+    ]
+
+    def __init__(self, options: ParsingOptions | BackgroundOptions, section_path: str) -> None:
+        """Stores the options to search and the section to search in
+
+        Args:
+            options: ParsingOptions | BackgroundOptions - the options
+            section_path: str - the path of the section, "" to search all the options
+        """
+
+        self.__options = options
+        self.__section_path = section_path
+        self.__search_descriptions = False
+        super().__init__()
+
+    def compose(self) -> ComposeResult:
+        """Defines what the search screen will look like
+
+        Returns:
+            ComposeResult - the screen in a form the library understands
+        """
+
+        with Vertical(id="option_search"):
+            yield Input(placeholder="Search the options, e.g. opensh passwordauth or enable TRIM", id="search_input")
+            yield RadioSet(RadioButton("Names", value=True), RadioButton("Descriptions"), id="search_mode")
+            yield OptionList(id="search_results")
+            yield Static(id="search_description")
+            with Center():
+                yield Label("Enter: add the option, Esc: go back")
+
+    def on_input_changed(self, query: Input.Changed) -> None:
+        """Lists the options which best match what has been typed
+
+        Args:
+            query: Input.Changed - what has been typed so far
+        """
+
+        self.__search(query.value)
+
+    def on_radio_set_changed(self, mode: RadioSet.Changed) -> None:
+        """Searches again when the user switches between searching the names and the descriptions
+
+        Args:
+            mode: RadioSet.Changed - the choice of the user
+        """
+
+        self.__search_descriptions = mode.index == 1
+        self.__search(self.query_one("#search_input", Input).value)
+
+    def __search(self, query: str) -> None:
+        """Lists the options which best match the query, along with their types
+
+        Args:
+            query: str - what has been typed
+        """
+
+        if self.__search_descriptions:
+            option_paths = self.__options.search_descriptions(query, self.__section_path)
+        else:
+            option_paths = self.__options.search(query, self.__section_path)
+        types = self.__options.look_up_options(option_paths)
+        results = self.query_one("#search_results", OptionList)
+        results.clear_options()
+        results.add_options([
+            Option(Text.assemble(option_path, ("  " + types[option_path][2] if option_path in types else "", "dim")),
+                   id=option_path)
+            for option_path in option_paths
+        ])
+        results.highlighted = 0 if results.option_count else None
+        if not results.option_count:
+            self.query_one("#search_description", Static).update("")
+
+    def on_option_list_option_highlighted(self, highlighted: OptionList.OptionHighlighted) -> None:
+        """Shows the description of the highlighted option
+
+        Args:
+            highlighted: OptionList.OptionHighlighted - the option which is highlighted
+        """
+
+        description = self.__options.get_description(highlighted.option.id) or "No description"
+        self.query_one("#search_description", Static).update(Text(description))
+
+    def on_input_submitted(self, _: Input.Submitted) -> None:
+        """Chooses the highlighted option when enter is pressed in the search box"""
+
+        results = self.query_one("#search_results", OptionList)
+        if results.highlighted is not None:
+            self.dismiss(results.get_option_at_index(results.highlighted).id)
+
+    def on_option_list_option_selected(self, choice: OptionList.OptionSelected) -> None:
+        """Chooses the option the user selected from the list
+
+        Args:
+            choice: OptionList.OptionSelected - the option the user chose
+        """
+
+        choice.stop()
+        self.dismiss(choice.option.id)
+
+    def action_quit_pressed(self) -> None:
+        """Quits the screen when one of the quit buttons are pressed"""
+
+        self.app.pop_screen()
+
+
 class SectionOptionsScreen(ModalScreen[list[str]]):
     """The section options screen - brought up if one clicks on a section"""
 
@@ -497,15 +710,16 @@ class SectionOptionsScreen(ModalScreen[list[str]]):
         ("q", "quit_pressed"),
         ("escape", "quit_pressed"),
         ("?", "help", "Show help screen"),
+        ("/", "search", "Search the options"),
     ]
 
-    def __init__(self, node: Tree.NodeSelected, options: ParsingOptions) -> None:
+    def __init__(self, node: Tree.NodeSelected, options: ParsingOptions | BackgroundOptions) -> None:
         """Redefining the init function to take in variables (polymorphism) that are required, it also sets up 2 private
         attributes to be used later on
 
         Args:
             node: Tree.NodeSelected - the section node
-            options: ParsingOptions - the options parser to work out the validity of a path
+            options: ParsingOptions | BackgroundOptions - the options parser to work out the validity of a path
         """
 
         self.__node = node
@@ -527,9 +741,10 @@ class SectionOptionsScreen(ModalScreen[list[str]]):
             with Horizontal(id="buttons"):
                 yield Button("Delete", id="delete_section", variant="error")
                 yield Button("Add Child", id="add", variant="success")
+                yield Button("Search", id="search", variant="primary")
                 yield Button("Exit", id="exit_section", variant="default")
             with Center():
-                yield Label("q/Esc: quit options, ?: Show help screen")
+                yield Label("q/Esc: quit options, /: search options, ?: Show help screen")
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """Called when the user decides what to do with the section by pressing a button, this calls appropriate
@@ -539,18 +754,6 @@ class SectionOptionsScreen(ModalScreen[list[str]]):
             event: Button.Pressed - the button the user chose
         """
 
-        def return_addition_for_stack(changes: list | None) -> None:
-            """Returns the changes from variable addition to the main class for addition to the operations stack
-
-            Args:
-                changes: list | None - the operations that have occurred in a list
-            """
-
-            if changes:
-                self.dismiss(changes)
-            else:
-                self.app.pop_screen()
-
         if event.button.id == "exit_section":
             self.app.pop_screen()
         if event.button.id == "delete_section":
@@ -563,10 +766,43 @@ class SectionOptionsScreen(ModalScreen[list[str]]):
                 self.recursive_deletion(self.__node.node)
                 self.dismiss(self.__operations)
         if event.button.id == "add":
-            self.app.push_screen(AddScreenPath(self.__node, self.__options), return_addition_for_stack)
+            self.app.push_screen(AddScreenPath(self.__node, self.__options), self.__return_addition_for_stack)
+        elif event.button.id == "search":
+            self.action_search()
         else:
             pass
 
+    def action_search(self) -> None:
+        """Opens the search of the options in this section, adding the option the user chooses"""
+
+        search_path = section_path(self.__node.node)
+
+        def add_chosen_option(option_path: str | None) -> None:
+            """Goes on to add the option the user chose, with its type recommended from the options.json
+
+            Args:
+                option_path: str | None - the full path of the option
+            """
+
+            if option_path:
+                path_in_section = option_path[len(search_path) + 1:] if search_path else option_path
+                self.app.push_screen(AddScreenPath(self.__node, self.__options, path_in_section),
+                                     self.__return_addition_for_stack)
+
+        self.app.push_screen(OptionSearchScreen(self.__options, search_path), add_chosen_option)
+
+    def __return_addition_for_stack(self, changes: list | None) -> None:
+        """Returns the changes from variable addition to the main class for addition to the operations stack
+
+        Args:
+            changes: list | None - the operations that have occurred in a list
+        """
+
+        if changes:
+            self.dismiss(changes)
+        else:
+            self.app.pop_screen()
+
     def recursive_deletion(self, node: UIConnectorNode) -> None:
         """Recursively deletes a section by visiting children and then deleting all the data there and so on
 
@@ -576,11 +812,11 @@ class SectionOptionsScreen(ModalScreen[list[str]]):
         Note:
             It acts similarly to BFS in the way it iterates through sections
         """
-        while node.children:
-            for child in node.children:
+        while ui_children(node):
+            for child in ui_children(node):
                 self.recursive_deletion(child)
         if not node.children and node.allow_expand:
-            self.__operations.append(f"Section {'.'.join(work_out_full_path(node, []))} deleted")
+            self.__operations.append(f"Section {section_path(node)} deleted")
             node.remove()
         if not node.children and not node.allow_expand:
             path, value = (list(node.data.keys())[0], list(node.data.values())[0])
@@ -4,6 +4,8 @@ Note:
     Inheritance is useless due to all the stacks being of different data types by design, to avoid confusion
 """
 
+from typing import Callable
+
 from textual.widgets import ListItem
 
 
@@ -35,12 +37,27 @@ class GroupsStack:
 
 
 class OperationsStack:
-    """An implementation of the stack data-structure in order to store operations effectively"""
+    """An implementation of the stack data-structure in order to store operations effectively
+
+    Note:
+        Anything which needs to know about the operations as they happen (e.g. checking the changed variables) can
+        subscribe to the stack, and is called with each item pushed or popped
+    """
 
     def __init__(self) -> None:
         """Creates the stack and the stack variables"""
 
         self.__stack_array: list[ListItem] = []
+        self.__subscribers: list[Callable[[ListItem, bool], None]] = []
+
+    def subscribe(self, subscriber: Callable[[ListItem, bool], None]) -> None:
+        """Calls a function whenever an item is pushed or popped
+
+        Args:
+            subscriber: Callable[[ListItem, bool], None] - the function, called with the item and whether it was pushed
+        """
+
+        self.__subscribers.append(subscriber)
 
     def pop(self) -> ListItem:
         """Pops the tops element of the stack
@@ -49,7 +66,10 @@ class OperationsStack:
             ListItem - the top most element in the stack
         """
 
-        return self.__stack_array.pop()
+        item = self.__stack_array.pop()
+        for subscriber in self.__subscribers:
+            subscriber(item, False)
+        return item
 
     def push(self, item: ListItem) -> None:
         """Pushes an element on to the stack
@@ -59,6 +79,8 @@ class OperationsStack:
         """
 
         self.__stack_array.append(item)
+        for subscriber in self.__subscribers:
+            subscriber(item, True)
 
     def peek(self) -> ListItem:
         """Returns the uppermost value in the stack without removing it
@@ -78,6 +100,15 @@ class OperationsStack:
 
         return len(self.__stack_array)
 
+    def return_stack(self) -> list[ListItem]:
+        """Returns the stack as a list, from the bottom of the stack to the top
+
+        Returns:
+            list[ListItem] - the stack
+        """
+
+        return self.__stack_array
+
 
 class OperationsQueue:
     """Defines an operations queue for reversing the order of the operations stack"""
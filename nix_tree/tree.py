@@ -1,5 +1,6 @@
 """Contains the tree used to store the decomposed file"""
 
+import hashlib
 import re
 
 from nix_tree.custom_types import UIConnectorNode
@@ -44,6 +45,8 @@ class Node:
 
         self.__name = name
         self.__comments = None
+        self.__parent: ConnectorNode | None = None
+        self.__content_hash: bytes | None = None
 
     def get_name(self) -> str:
         """Returns the nodes name
@@ -62,6 +65,75 @@ class Node:
         """
 
         self.__name = new_name
+        self.invalidate_content_hash()
+
+    def get_parent(self) -> "ConnectorNode | None":
+        """Returns the connector node this node is connected to
+
+        Returns:
+            ConnectorNode | None - the parent, or None if it is the root or not in a tree
+        """
+
+        return self.__parent
+
+    def __getstate__(self) -> dict:
+        """Leaves out the parent and the hash when the node is pickled
+
+        Returns:
+            dict - the attributes of the node to pickle
+
+        Note:
+            Otherwise pickling a section (e.g. to compose it in another process) would pickle the whole tree through
+            the parent links. The parents of the children are set again by ConnectorNode.__setstate__
+        """
+
+        state = self.__dict__.copy()
+        state["_Node__parent"] = None
+        state["_Node__content_hash"] = None
+        return state
+
+    def set_parent(self, parent: "ConnectorNode | None") -> None:
+        """Sets the connector node this node is connected to, called when it is added to or removed from a node
+
+        Args:
+            parent: ConnectorNode | None - the new parent
+        """
+
+        self.__parent = parent
+
+    def get_content_hash(self) -> bytes:
+        """Returns a hash of everything in the node and below it, it is only worked out again after a change
+
+        Returns:
+            bytes - the hash
+        """
+
+        if self.__content_hash is None:
+            self.__content_hash = self._work_out_content_hash()
+        return self.__content_hash
+
+    def invalidate_content_hash(self) -> None:
+        """Forgets the hash of this node and of every node above it, called whenever the node changes
+
+        Note:
+            A node only has a hash if all the nodes below it do, so once a node without a hash is reached
+            all the nodes above it cannot have one either
+        """
+
+        node: Node | None = self
+        while node is not None and node.__content_hash is not None:
+            node.__content_hash = None
+            node = node.__parent
+
+    def _work_out_content_hash(self) -> bytes:
+        """Works out the hash of the node, the node classes extend this with their own contents
+
+        Returns:
+            bytes - the hash
+        """
+
+        return hashlib.blake2b(repr((type(self).__name__, self.__name, self.__comments)).encode(),
+                               digest_size=16).digest()
 
     def get_connected_nodes(self) -> list:
         """Default get connected nodes method, connector nodes override it
@@ -79,6 +151,7 @@ class Node:
         """
 
         self.__comments = comments
+        self.invalidate_content_hash()
 
     def get_comments(self) -> list[tuple[str, bool]]:
         """To get the comments of the current node
@@ -110,14 +183,31 @@ class ConnectorNode(Node):
         super().__init__(name)
         self.__children: list[Node] = []
 
-    def add_node(self, node: Node) -> None:
+    def __setstate__(self, state: dict) -> None:
+        """Restores the node after it has been unpickled, linking its children back to it
+
+        Args:
+            state: dict - the attributes of the node
+        """
+
+        self.__dict__.update(state)
+        for child in self.__children:
+            child.set_parent(self)
+
+    def add_node(self, node: Node, position: int | None = None) -> None:
         """Adds a new node to the children of the connector node
 
         Args:
             node: Node - the node to be added
+            position: int | None - where in the children to add it, it is added to the end if this is None
         """
 
-        self.__children.append(node)
+        if position is None:
+            self.__children.append(node)
+        else:
+            self.__children.insert(position, node)
+        node.set_parent(self)
+        self.invalidate_content_hash()
 
     def get_connected_nodes(self) -> list[Node]:
         """Returns the list of connected nodes
@@ -139,7 +229,8 @@ class ConnectorNode(Node):
         for i, node in enumerate(self.__children):
             if isinstance(node, VariableNode):
                 if node.get_name() + "=" + node.get_data() == full_path:
-                    self.__children.pop(i)
+                    self.__children.pop(i).set_parent(None)
+                    self.invalidate_content_hash()
                     return
         raise NodeNotFound(full_path)
 
@@ -154,10 +245,23 @@ class ConnectorNode(Node):
         for i, node in enumerate(self.__children):
             if isinstance(node, ConnectorNode):
                 if node.get_name() == name:
-                    self.__children.pop(i)
+                    self.__children.pop(i).set_parent(None)
+                    self.invalidate_content_hash()
                     return
         raise NodeNotFound(name)
 
+    def _work_out_content_hash(self) -> bytes:
+        """Works out the hash of the connector node from its name, comments and the hashes of its children
+
+        Returns:
+            bytes - the hash
+        """
+
+        content_hash = hashlib.blake2b(super()._work_out_content_hash(), digest_size=16)
+        for child in self.__children:
+            content_hash.update(child.get_content_hash())
+        return content_hash.digest()
+
 
 class VariableNode(Node):
     """The variable node, it stores a value such as true or 'vim'
@@ -210,9 +314,20 @@ class VariableNode(Node):
 
         if self.__type == find_type(data):
             self.__data = data
+            self.invalidate_content_hash()
             return True
         return False
 
+    def _work_out_content_hash(self) -> bytes:
+        """Works out the hash of the variable node from its name, comments, data and type
+
+        Returns:
+            bytes - the hash
+        """
+
+        return hashlib.blake2b(super()._work_out_content_hash() + repr((self.__data, self.__type)).encode(),
+                               digest_size=16).digest()
+
 
 class DecomposerTree:
     """An implementation of a rooted tree
@@ -221,6 +336,8 @@ class DecomposerTree:
     def __init__(self) -> None:
         """Creates the root node from which all other nodes will be connected to"""
         self.__root_node = ConnectorNode("")
+        self.__variables_by_path: dict[str, VariableNode] | None = None  # Built the first time a path is looked up
+        self.__sections_by_path: dict[str, ConnectorNode] | None = None
 
     def get_root(self) -> ConnectorNode:
         """Returns the root node if something needs to traverse the tree
@@ -251,6 +368,7 @@ class DecomposerTree:
             print("Encountered a repeated node - non-fatal error")
         elif isinstance(found_node, ConnectorNode):
             node_path = found_node.get_name()
+            full_path = path
             if not node_path == "":
                 path = path[path.index(node_path) + 1:]
             nodes: list[ConnectorNode] = [found_node]
@@ -258,7 +376,13 @@ class DecomposerTree:
                 nodes.append(ConnectorNode(path[bit_of_path_itr]))
             for node_itr in range(len(nodes) - 1):
                 nodes[node_itr].add_node(nodes[node_itr + 1])
-            nodes[len(nodes) - 1].add_node(VariableNode(string_path, variable, find_type(variable)))
+                if self.__sections_by_path is not None:
+                    section_path = ".".join(full_path[:len(full_path) - len(path) + node_itr + 1])
+                    self.__sections_by_path[section_path] = nodes[node_itr + 1]
+            new_node = VariableNode(string_path, variable, find_type(variable))
+            nodes[len(nodes) - 1].add_node(new_node)
+            if self.__variables_by_path is not None:
+                self.__variables_by_path[string_path] = new_node
         else:
             raise TypeError("Found a node which isn't a variable or a connector node")
 
@@ -296,6 +420,99 @@ class DecomposerTree:
             return node
         raise TypeError("Found a node which isn't a variable or a connector node")
 
+    def find_variable_by_path(self, path: str) -> VariableNode | None:
+        """Finds a variable from its full path without searching the tree
+
+        Args:
+            path: str - the full path of the variable, with or without its value on the end
+
+        Returns:
+            VariableNode | None - the variable, or None if there is no variable with that path in the tree
+
+        Note:
+            The variables are indexed by path the first time one is looked up. Variables which have been removed since
+            are still in the index, so a variable found is only returned if its sections lead back to the root
+        """
+
+        path = path.split("=")[0]
+        if self.__variables_by_path is None:
+            self.__index_paths()
+        node = self.__variables_by_path.get(path)
+        if node is None or node.get_name() != path:
+            return None
+        return node if self.__is_in_tree(node) else None
+
+    def find_section_by_path(self, path: str) -> ConnectorNode | None:
+        """Finds a section from its full path without searching the tree
+
+        Args:
+            path: str - the full path of the section, "" for the root
+
+        Returns:
+            ConnectorNode | None - the section, or None if there is no section with that path in the tree
+
+        Note:
+            The sections are indexed along with the variables, so removed sections are checked for in the same way
+        """
+
+        if path == "":
+            return self.__root_node
+        if self.__sections_by_path is None:
+            self.__index_paths()
+        node = self.__sections_by_path.get(path)
+        return node if node is not None and self.__is_in_tree(node) else None
+
+    def add_section(self, path: str) -> ConnectorNode | None:
+        """Adds an empty section to the tree
+
+        Args:
+            path: str - the full path of the new section
+
+        Returns:
+            ConnectorNode | None - the new section, or None if the section it goes in is not in the tree
+        """
+
+        parent_path, _, name = path.rpartition(".")
+        parent = self.find_section_by_path(parent_path)
+        if parent is None:
+            return None
+        section = ConnectorNode(name)
+        parent.add_node(section)
+        if self.__sections_by_path is not None:
+            self.__sections_by_path[path] = section
+        return section
+
+    def __index_paths(self) -> None:
+        """Indexes every section and variable in the tree by its full path"""
+
+        self.__variables_by_path = {}
+        self.__sections_by_path = {}
+        stack: list[tuple[Node, str]] = [(self.__root_node, "")]
+        while stack:
+            node, path = stack.pop()
+            if isinstance(node, VariableNode):
+                self.__variables_by_path.setdefault(node.get_name(), node)
+            else:
+                if node is not self.__root_node:
+                    self.__sections_by_path.setdefault(path, node)
+                for child in reversed(node.get_connected_nodes()):
+                    stack.append((child, f"{path}.{child.get_name()}" if path else child.get_name()))
+
+    def __is_in_tree(self, node: Node) -> bool:
+        """Checks an indexed node has not been removed from the tree, as removing a node does not update the index
+
+        Args:
+            node: Node - the node
+
+        Returns:
+            bool - true if its sections lead back to the root
+        """
+
+        section = node.get_parent()
+        while section is not None and section is not self.__root_node:
+            section = section.get_parent()
+        return section is self.__root_node
+
     def find_node_parent(self, path: str, node: Node, covered_path: list = None) -> Node | None:
         """Finds the variable nodes parent
 
@@ -380,3 +597,24 @@ class DecomposerTree:
             else:
                 label = node.get_name() + "=" + node.get_data()
             previous_node.add_leaf(str(label), data={node.get_name(): node.get_data(), "type": node.get_type()})
+
+    def add_children_to_ui(self, node: ConnectorNode, ui_node: UIConnectorNode) -> list[tuple[UIConnectorNode, Node]]:
+        """Adds only the children of a section to the ui tree, so the tree can be filled in as sections are opened
+
+        Args:
+            node: ConnectorNode - the section
+            ui_node: UIConnectorNode - the node of the section in the ui tree
+
+        Returns:
+            list[tuple[UIConnectorNode, Node]] - the ui node of each child added and the node it is for, so they can be
+            linked (the children of the sections are not added)
+        """
+
+        added = []
+        for child in node.get_connected_nodes():
+            if isinstance(child, ConnectorNode):
+                added.append((ui_node.add(child.get_name()), child))
+            else:
+                self.add_to_ui(child, ui_node)
+                added.append((ui_node.children[-1], child))
+        return added
@@ -1,23 +1,37 @@
 """The main UI file which contains all the main screens such as the tree or operations stack"""
 
 import subprocess
+import threading
 from pathlib import Path
 import re
+from typing import Callable
 
+from rich.text import Text
+from textual import work
+from textual.worker import get_current_worker
 from textual.app import App, ComposeResult
-from textual.containers import Horizontal, Vertical, Center
-from textual.screen import ModalScreen
+from textual.containers import Horizontal, Vertical, Center, VerticalScroll
+from textual.screen import ModalScreen, Screen
 from textual.widgets import Label, ListView, ListItem, OptionList, Static, Tree, Header, Footer, TabbedContent, \
-    TabPane, Button, Collapsible
+    TabPane, Button, Collapsible, TextArea, LoadingIndicator, ProgressBar
 
-from nix_tree.composer import Composer
+from nix_tree.checker import find_variables
+from nix_tree.command_screen import CommandScreen
+from nix_tree.composer import Composer, RenderCache
 from nix_tree.custom_types import UIVariableNode, UIConnectorNode
 from nix_tree.decomposer import DecomposerTree, Decomposer
-from nix_tree.errors import ErrorComposingFileFromTree, NodeNotFound
+from nix_tree.errors import DecompositionCancelled, ErrorComposingFileFromTree, NodeNotFound, NoValidHeadersNode
+from nix_tree.generations import GenerationsCache
 from nix_tree.help_screens import MainHelpScreen
-from nix_tree.parsing import ParsingOptions, Types
+from nix_tree.lazy_tree import LazyTree, ui_children
+from nix_tree.live_validation import LiveValidator, mark_node, tree_variables
+from nix_tree.option_sets import OptionSets, choose_option_sets, find_option_sets
+from nix_tree.parsing import BackgroundOptions, Types
+from nix_tree.patch_composer import PatchComposer
+from nix_tree.preview import compose_to_string, highlight_diff, work_out_diff, work_out_changed_lines
+from nix_tree.rebuild_record import RebuildRecord
 from nix_tree.stacks import OperationsStack, OperationsQueue
-from nix_tree.tree import VariableNode, ConnectorNode, Node
+from nix_tree.tree import VariableNode, ConnectorNode
 from nix_tree.variable_screens import OptionsScreen
 from nix_tree.section_screens import SectionOptionsScreen
 
@@ -29,16 +43,18 @@ class QueueScreen(ModalScreen[bool]):
         ("escape", "quit_pressed")
     ]
 
-    def __init__(self, queue: list) -> None:
+    def __init__(self, queue: list, preview: Callable[[], str]) -> None:
         """Redefining the init function to take in a queue list for displaying in the ListView
 
         Args:
             queue: list - the queue as a list
+            preview: Callable[[], str] - a function which works out the diff the queue would make to the file
         """
 
         self.__queue_as_list = []
         for item in queue:
             self.__queue_as_list.append(ListItem(Label(item.name), name=item.name))
+        self.__preview = preview
         super().__init__()
 
     def compose(self) -> ComposeResult:
@@ -51,11 +67,44 @@ class QueueScreen(ModalScreen[bool]):
         with Vertical(id="apply_queue"):
             with Center():
                 yield ListView(*self.__queue_as_list, id="operations_list_queue")
+                with VerticalScroll(id="diff_preview_scroll"):
+                    yield Static("Working out the changes to the file...", id="diff_preview")
                 with Center():
                     with Horizontal(id="buttons"):
                         yield Button("Apply", id="apply", variant="success")
                         yield Button("Don't apply", id="do_not_apply", variant="error")
 
+    def on_mount(self) -> None:
+        """Starts working out the diff once the screen is shown"""
+
+        self.__work_out_preview()
+
+    @work(thread=True, exclusive=True)
+    def __work_out_preview(self) -> None:
+        """Works out the diff in a background thread so the screen can still be used while it is composed"""
+
+        try:
+            diff = self.__preview()
+        except Exception as error:  # The preview should never stop the user from applying
+            self.app.call_from_thread(self.__show_preview, Text(f"Unable to preview the changes: {error}"))
+            return
+        self.app.call_from_thread(self.__show_preview, highlight_diff(diff) if diff else None)
+
+    def __show_preview(self, diff: Text | None) -> None:
+        """Shows the diff in the preview pane
+
+        Args:
+            diff: Text | None - the highlighted unified diff, None if the file would not change
+        """
+
+        if not self.is_mounted:  # The screen was closed before the diff was worked out
+            return
+        preview = self.query_one("#diff_preview", Static)
+        if diff:
+            preview.update(diff)
+        else:
+            preview.update("The file will not change")
+
     def on_button_pressed(self, button: Button.Pressed) -> None:
         """Called when the user chooses one of the buttons, the function removes its screen returning true if the
         user chose to apply and false if not
@@ -153,47 +202,67 @@ class UI(App[list[str]]):
         ("u", "undo", "To undo the previous change"),
         ("e", "empty", "To empty the operations stack"),
         ("a", "apply", "To apply your changes to the file"),
+        ("v", "toggle_preview", "To show or hide the generated file"),
     ]
 
-    def __init__(self, file_name: str, decomposer: Decomposer) -> None:
+    def __init__(self, file_name: str, decomposer: Decomposer | None, comments: bool = False, patch: bool = False,
+                 rebuild_record: RebuildRecord | None = None, option_sets: dict[str, Path] | None = None,
+                 layers: list[str] | None = None) -> None:
         """Redefining the init function to initialise two objects, the stack and the options parser,
         it also takes in the file name to place as the title of the tree
 
         Args:
             file_name: str - the file name
-            decomposer: Decomposer - a decomposer object to form the tree
+            decomposer: Decomposer | None - a decomposer object to form the tree, or None to decompose the file in a
+            background worker once the app is shown
+            comments: bool - whether comments will be copied over (for previewing the changes)
+            patch: bool - whether the file will be patched instead of composed (for previewing the changes)
+            rebuild_record: RebuildRecord | None - the record of successful rebuilds, to warn about redundant ones
+            option_sets: dict[str, Path] | None - the location of each option set, by default the sets in the data
+            directory
+            layers: list[str] | None - the option sets to check the file against, by default chosen from its name
         """
 
         self.__stack = OperationsStack()
         self.__queue = OperationsQueue()
 
-        # This allows for the program to run without a constant options location
-        # It was an issue as it wouldn't allow the program to be installed without hardcoding
-        # the location of the options file.
-        path_of_executable = Path(__file__).parts
-        options_location = Path()
-        if 'store' in path_of_executable:  # If it is being run as a flake
-            for i in path_of_executable:
-                if i == "lib":
-                    break
-                options_location = options_location / i
-            options_location = options_location / "data/options.json"
-        else:  # If it is not being run as a flake
-            for i in path_of_executable:
-                if i == "nix-tree":
-                    options_location = options_location / i
-                    break
-                options_location = options_location / i
-            options_location = options_location / "data/options.json"
-
-        # Opening the options and storing the decomposer and file name
-        self.__options = ParsingOptions(options_location)
+        # The options are loaded in the background once the app is shown, and storing the decomposer and file name
+        self.__option_sets = option_sets if option_sets else find_option_sets()
+        self.__layers = layers if layers else choose_option_sets(file_name, self.__option_sets)
+        self.__options = BackgroundOptions()
+
+        # The variables are checked against the options in the background as the operations stack changes, and the
+        # value and problem of each variable which does not fit them is stored by its path
+        self.__live_validator = LiveValidator(self.__options)
+        self.__problems: dict[str, tuple[str, str]] = {}
+        self.__stack.subscribe(self.__operation_changed)
         self.__file_name = file_name
         self.__decomposer = decomposer
+        self.__model = decomposer.get_tree() if decomposer else DecomposerTree()  # Filled in as the file is read
+        self.__comments = comments
+        self.__patch = patch
 
         # Creating the nixos-rebuild switch requirement for double clicking
         self.__rebuild_switch_already_pressed: bool = False
 
+        # The home-manager generations are listed in the background, and kept until the profile changes
+        self.__generations_cache = GenerationsCache()
+
+        # Storing the last rebuild the user was warned was redundant, so pressing it again runs it anyway
+        self.__rebuild_record = rebuild_record if rebuild_record else RebuildRecord()
+        self.__redundant_rebuild_warned: list[str] | None = None
+
+        # A separate tree with the operations stack applied to it, for the live preview of the generated file. It is
+        # changed and composed in a background worker, which takes the operations queued for it since it last ran
+        self.__preview_decomposer: Decomposer | None = None
+        self.__preview_cache = RenderCache()
+        self.__preview_lines: list[str] = []
+        self.__preview_lock = threading.Lock()
+        self.__pending_lock = threading.Lock()
+        self.__pending_operations: list[str] = []
+        self.__pending_reset = False
+        self.__pending_stack: list[str] = []
+
         super().__init__()
 
     def action_help(self) -> None:
@@ -204,9 +273,130 @@ class UI(App[list[str]]):
     def action_empty(self) -> None:
         """Empties the stack if the user chooses to empty the stack by pressing e"""
 
+        if self.__still_loading():
+            return
         while self.__stack.get_len() > 0:
             self.action_undo(empty_command=True)
         self.query_one("#operations_stack", ListView).clear()
+        self.__update_preview([], reset=True)
+
+    def action_toggle_preview(self) -> None:
+        """Shows or hides the preview of the generated file if v is pressed"""
+
+        preview = self.query_one("#nix_preview", TextArea)
+        preview.display = not preview.display
+
+    def __update_preview(self, operations: list[str], reset: bool = False) -> None:
+        """Queues operations to be applied to the preview tree and works out the preview again in the background
+
+        Args:
+            operations: list[str] - the operations that have just been pushed to the operations stack (or the reverse
+            of one which has been undone)
+            reset: bool - whether to decompose the file again into the preview tree and apply the whole operations
+            stack to it instead
+        """
+
+        with self.__pending_lock:
+            self.__pending_operations.extend(operations)
+            self.__pending_reset = self.__pending_reset or reset
+            self.__pending_stack = [item.name for item in self.__stack.return_stack() if item.name]
+        self.__work_out_preview()
+
+    @work(thread=True, group="preview")
+    def __work_out_preview(self) -> None:
+        """Applies the queued operations to the preview tree, composes it and works out which lines of the preview
+        changed, in a background thread so editing is not held up by composing the file
+
+        Note:
+            The render cache means only the sections containing the changes are composed again. The lock keeps the
+            workers from changing the preview tree at the same time, and each worker takes every operation queued
+            so far, so a worker which finds nothing queued has nothing to do. The workers are only cancelled when
+            the app is quit, which stops the preview tree being decomposed
+        """
+
+        worker = get_current_worker()
+
+        def stop_if_cancelled(done: int, total: int) -> None:
+            """Stops the decomposer if the app has been quit
+
+            Args:
+                done: int - how many assignments have been read
+                total: int - how many there are
+            """
+
+            if worker.is_cancelled:
+                raise DecompositionCancelled()
+
+        with self.__preview_lock:
+            with self.__pending_lock:
+                operations, self.__pending_operations = self.__pending_operations, []
+                reset, self.__pending_reset = self.__pending_reset, False
+                stack = self.__pending_stack
+            if not operations and not reset and self.__preview_decomposer is not None:
+                return
+            try:
+                if reset or self.__preview_decomposer is None:  # The last update failed so the tree is out of date
+                    self.__preview_decomposer = None  # Left as None if the app is quit part way through
+                    self.__preview_decomposer = Decomposer(file_path=Path(self.__file_name), tree=DecomposerTree(),
+                                                           progress=stop_if_cancelled)
+                    operations = stack
+                self.__apply_operations(self.__preview_decomposer.get_tree(), operations)
+                lines = compose_to_string(self.__preview_decomposer, self.__file_name, operations, self.__comments,
+                                          False, self.__preview_cache).splitlines(keepends=True)
+            except DecompositionCancelled:
+                return
+            except (ErrorComposingFileFromTree, NodeNotFound, NoValidHeadersNode) as error:
+                self.__preview_decomposer = None
+                self.__preview_lines = []
+                self.call_from_thread(self.__show_preview, f"Unable to preview the file: {error}", None)
+                return
+            if not self.__preview_lines:
+                self.call_from_thread(self.__show_preview, "".join(lines), None)
+            else:
+                start, old_end, new_end = work_out_changed_lines(self.__preview_lines, lines)
+                if start != old_end or start != new_end:
+                    self.call_from_thread(self.__show_preview, "".join(lines[start:new_end]), (start, old_end))
+            self.__preview_lines = lines
+
+    def __show_preview(self, text: str, changed: tuple[int, int] | None) -> None:
+        """Puts the lines which changed into the preview
+
+        Args:
+            text: str - the new lines
+            changed: tuple[int, int] | None - the first line which changed and the line after the last one, or None to
+            replace the whole preview
+        """
+
+        preview = self.__main_screen().query_one("#nix_preview", TextArea)
+        if changed is None:
+            preview.load_text(text)
+        else:
+            preview.replace(text, (changed[0], 0), (changed[1], 0))
+            preview.move_cursor((changed[0], 0), center=True)
+
+    @staticmethod
+    def __reverse_operation(action: str) -> str:
+        """Works out the operation which undoes another, so an undo can be applied to the preview tree
+
+        Args:
+            action: str - the operation, as it is shown in the operations stack
+
+        Returns:
+            str - the operation which reverses it
+        """
+
+        match action.split(" ")[0]:
+            case "Added":
+                return f"Delete {action[6:]}"
+            case "Delete":
+                return f"Added {action[7:].rsplit(' type: ', 1)[0]}"
+            case "Change":
+                pre, post = action[7:].split("->", 1)
+                return f"Change {post.strip()} -> {pre.strip()}"
+            case "Section":
+                path, _, change = action[8:].rpartition(" ")
+                return f"Section {path} {'deleted' if change == 'added' else 'added'}"
+        return action
 
     def __extract_data_from_action(self, action: str) -> tuple[str, str, str]:
         """This method extracts data from actions which is needed in undo and apply functionality
@@ -257,10 +447,14 @@ class UI(App[list[str]]):
             list instead of repeatedly popping from it
         """
 
+        if self.__still_loading():
+            return
         if self.__stack.get_len() > 0:
             if not empty_command:  # To make the empty functionality more efficient we clear it all at once elsewhere
                 self.query_one("#operations_stack", ListView).pop(0)
             action: str | None = self.__stack.pop().name
+            if not empty_command and action:
+                self.__update_preview([self.__reverse_operation(action)])
             if action:
                 match action.split(" ")[0]:
                     case "Delete":
@@ -278,22 +472,15 @@ class UI(App[list[str]]):
                             case "Types.BOOL":
                                 var_type = Types.BOOL
                         if var_type:
-                            self.recursive_addition(
-                                self.query_one(Tree).root,
-                                path.split("."),
-                                full_path.split("=")[1],
-                                var_type,
-                                full_path.split("=")[0]
-                            )
+                            tree = self.query_one(LazyTree)
+                            tree.add_variable(self.__find_or_add_section(tree, path.rpartition(".")[0]), path,
+                                              full_path[len(path) + 1:], var_type, after=0)
                         else:
                             raise TypeError("Cannot deduce node variable type")
                     case "Added":
                         path, variable, full_path = self.__extract_data_from_action(action)
-                        node_to_delete: UIVariableNode | None = self.recursive_searching_for_var(
-                            self.query_one(Tree).root,
-                            path.split("."),
-                            variable
-                        )
+                        node_to_delete: UIVariableNode | None = self.query_one(LazyTree).find_variable(
+                            path, full_path[len(path) + 1:])
                         if node_to_delete:
                             node_to_delete.remove()
                         else:
@@ -302,11 +489,8 @@ class UI(App[list[str]]):
                         change_command: str = action[7:]  # Can't use space splits as it changes the lists spaces
                         pre: list = change_command.split("->")[0].strip().split("=")
                         post: list = change_command.split("->")[1].strip().split("=")
-                        variable_to_change: UIVariableNode | None = self.recursive_searching_for_var(
-                            self.query_one(Tree).root,
-                            post[0].split("."),
-                            post[1]
-                        )
+                        variable_to_change: UIVariableNode | None = self.query_one(LazyTree).find_variable(
+                            post[0], post[1])
                         if variable_to_change:
                             new_label = f"{pre[0].split('.')[-1]}={pre[1]}"
                             variable_to_change.label = new_label
@@ -317,27 +501,17 @@ class UI(App[list[str]]):
                         else:
                             raise NodeNotFound(node_name='='.join(post))
                     case "Section":
+                        tree = self.query_one(LazyTree)
+                        path_as_list = action.split(" ")[1].split(".")
                         match action.split(" ")[-1]:
                             case "deleted":
-                                path_as_list = action.split(" ")[1].split(".")
-                                if len(path_as_list) > 1:
-                                    path_before_section = path_as_list[:-1]
-                                else:
-                                    path_before_section = path_as_list
-                                section_node: UIConnectorNode | None = self.recursive_searching_for_connector(
-                                    self.query_one(Tree).root,
-                                    path_before_section
-                                )
+                                section_node: UIConnectorNode | None = tree.find_section(".".join(path_as_list[:-1]))
                                 if section_node:
-                                    section_node.add(path_as_list[-1], after=0)
+                                    tree.add_section(section_node, path_as_list[-1], after=0)
                                 else:
                                     raise NodeNotFound(node_name='.'.join(path_as_list))
                             case "added":
-                                path_as_list = action.split(" ")[1].split(".")
-                                section_node: UIConnectorNode | None = self.recursive_searching_for_connector(
-                                    self.query_one(Tree).root,
-                                    path_as_list
-                                )
+                                section_node: UIConnectorNode | None = tree.find_section(".".join(path_as_list))
                                 if section_node:
                                     section_node.remove()
                                 else:
@@ -346,8 +520,8 @@ class UI(App[list[str]]):
             self.notify("The operations stack is empty")
 
     def __remove_empty_sections(self, node: UIConnectorNode, operations: list[str]) -> list[str]:
-        if node.children:
-            for child in node.children:
+        if ui_children(node):
+            for child in ui_children(node):
                 operations = self.__remove_empty_sections(child, operations)
         elif "=" not in node.label:
             node.remove()
@@ -358,9 +532,41 @@ class UI(App[list[str]]):
     def __apply_changes(self) -> None:
         """Applies the changes stored in the operations queue to the decomposer tree for changing the file"""
 
-        tree: DecomposerTree = self.__decomposer.get_tree()
+        operations: list[str] = []
         while self.__queue.get_len() > 0:
             action = self.__queue.dequeue().name
+            if action:
+                operations.append(action)
+        self.__apply_operations(self.__decomposer.get_tree(), operations)
+
+    def __preview_changes(self, operations: list[str]) -> str:
+        """Works out the diff the operations would make to the file, without changing the tree being edited
+
+        Args:
+            operations: list[str] - the operations to preview
+
+        Returns:
+            str - the unified diff between the original and the edited file
+
+        Note:
+            This is run in a background thread, so the file is decomposed again into a separate tree
+        """
+
+        tree = DecomposerTree()
+        decomposer = Decomposer(file_path=Path(self.__file_name), tree=tree)
+        self.__apply_operations(tree, operations)
+        edited = compose_to_string(decomposer, self.__file_name, operations, self.__comments, self.__patch)
+        return work_out_diff(decomposer.get_source_spans().get_source(), edited, self.__file_name)
+
+    def __apply_operations(self, tree: DecomposerTree, operations: list[str]) -> None:
+        """Performs the operations on a decomposer tree
+
+        Args:
+            tree: DecomposerTree - the tree to change
+            operations: list[str] - the operations, as they are shown in the operations stack
+        """
+
+        for action in operations:
             if action:
 
                 # Performing the operations on the tree
@@ -370,12 +576,10 @@ class UI(App[list[str]]):
                         tree.add_branch(full_path)
                     case "Delete":
                         _, _, full_path = self.__extract_data_from_action(action)
-                        parent: Node | None = tree.find_node_parent(full_path, tree.get_root())
+                        variable_node: VariableNode | None = tree.find_variable_by_path(full_path)
+                        parent: ConnectorNode | None = variable_node.get_parent() if variable_node else None
                         if parent:
-                            if isinstance(parent, ConnectorNode):
-                                parent.remove_child_variable_node(full_path)
-                            else:
-                                raise NodeNotFound(node_name=full_path)
+                            parent.remove_child_variable_node(full_path)
                         else:
                             raise NodeNotFound(node_name=full_path)
                     case "Change":
@@ -383,8 +587,8 @@ class UI(App[list[str]]):
                         change_command: str = action[7:]
                         pre: str = change_command.split("->")[0].strip()
                         post: str = change_command.split("->")[1].strip()
-                        node_to_edit: Node = tree.find_variable_node(pre, tree.get_root())
-                        if isinstance(node_to_edit, VariableNode):
+                        node_to_edit: VariableNode | None = tree.find_variable_by_path(pre)
+                        if node_to_edit:
                             if match := re.search(r"^(.*?)=(.*)$", post.strip()):
                                 # Question mark makes the match not greedy meaning it matches as few chars as possible
                                 node_to_edit.set_data(match.group(2))
@@ -395,25 +599,18 @@ class UI(App[list[str]]):
 
                     # Sections need to be handled differently due to their unique commands
                     case "Section":
+                        section_path: str = action.split(" ")[1]
                         match action.split(" ")[-1]:
                             case "deleted":
-                                parent: Node | None = tree.find_section_node_parent(action.split(" ")[1], tree.get_root())
+                                parent: ConnectorNode | None = tree.find_section_by_path(
+                                    section_path.rpartition(".")[0])
                                 if parent:
-                                    if isinstance(parent, ConnectorNode):
-                                        parent.remove_child_section_node(action.split(" ")[1].split(".")[-1])
-                                    else:
-                                        raise NodeNotFound(node_name=action.split(" ")[1])
+                                    parent.remove_child_section_node(section_path.split(".")[-1])
                                 else:
-                                    raise NodeNotFound(node_name=action.split(" ")[1])
+                                    raise NodeNotFound(node_name=section_path)
                             case "added":
-                                parent: Node | None = tree.find_section_node_parent(action.split(" ")[1], tree.get_root())
-                                if parent:
-                                    if isinstance(parent, ConnectorNode):
-                                        parent.add_node(ConnectorNode(action.split(" ")[1].split(".")[-1]))
-                                    else:
-                                        raise NodeNotFound(node_name=action.split(" ")[1])
-                                else:
-                                    raise NodeNotFound(node_name=action.split(" ")[1])
+                                if not tree.add_section(section_path):
+                                    raise NodeNotFound(node_name=section_path)
 
     def action_apply(self) -> None:
         """Called if "a" is pressed, it pushes the apply screen which allows the user to push their changes to the
@@ -437,91 +634,40 @@ class UI(App[list[str]]):
                 while self.__queue.get_len() > 0:
                     self.__stack.push(self.__queue.dequeue())
 
+        if self.__still_loading():
+            return
         commands = self.__remove_empty_sections(self.app.query_one(Tree).root, [])
         if commands:
             for command in commands:
                 self.__stack.push(ListItem(Label(command), name=command))
                 self.query_one(ListView).insert(0, [self.__stack.peek()])
+            self.__update_preview(commands)
         while self.__stack.get_len() > 0:
             self.__queue.enqueue(self.__stack.pop())
         saved_queue = self.__queue.return_queue()[:]
-        self.app.push_screen(QueueScreen(self.__queue.return_queue()), handle_response_from_queue_screen)
+        operations = [item.name for item in saved_queue if item.name]
+        self.app.push_screen(
+            QueueScreen(self.__queue.return_queue(), lambda: self.__preview_changes(operations)),
+            handle_response_from_queue_screen
+        )
 
-    def recursive_addition(self, node: UIConnectorNode, path: list, data: str, data_type: Types,
-                           full_path: str) -> None:
-        """Called by the undo function - if a node has been deleted this function adds it back
+    def __find_or_add_section(self, tree: LazyTree, path: str) -> UIConnectorNode:
+        """Called by the undo function - finds the section a deleted variable goes back into, adding the sections of
+        its path which have been deleted too
 
         Args:
-            node: UIConnectorNode - the current node we are analysing (as the function is recursive this changes in
-            every stack frame)
-            path: list - this stores how far down the path the function is, also informing it when to stop
-            data: str - the data that needs to be added
-            data_type: Types - the data type of the data being added
-            full_path: str - the full path this addition needs
-
-        Note:
-            While it is similar to the recursive addition in the path screen, this has slightly different data that we
-            have hence we can make it slightly simpler - also we do not need to make any sections/groups, so it doesn't
-            need that functionality.
-        """
-
-        if len(path) > 1:
-            path_bit_already_exists = False
-            for child in node.children:
-                if child.label.plain == path[0]:
-                    path_bit_already_exists = True
-                    del path[0]
-                    self.recursive_addition(child, path, data, data_type, full_path)
-            if not path_bit_already_exists:
-                new_node = node.add(path[0])
-                del path[0]
-                self.recursive_addition(new_node, path, data, data_type, full_path)
-        else:
-            node.add_leaf(path[0] + "=" + data, data={full_path: data, "type": data_type}, after=0)
-
-    def recursive_searching_for_var(self, node: UIConnectorNode, path: list, variable: str) -> UIVariableNode | None:
-        """Recursively searches for a var so the undo function can do something with it - often deletion
-
-        Args:
-            node: UIConnectorNode - the starting node, often the root node
-            path: list - storing how deep into the path we are, so we know when it is found
-            variable: str - the data in the variable so it can be identified
+            tree: LazyTree - the ui tree
+            path: str - the full path of the section, "" for the root
 
         Returns:
-            UIVariableNode - the found variable node
-        """
-        if len(path) > 1:
-            for child in node.children:
-                if str(child.label) == path[0]:
-                    del path[0]
-                    return self.recursive_searching_for_var(child, path, variable)
-        elif len(path) == 1:
-            for child in node.children:
-                if str(child.label) == path[0] + "=" + variable:
-                    return child
-        return None
-
-    def recursive_searching_for_connector(self, node: UIConnectorNode, path: list) -> UIConnectorNode | None:
-        """Recursively searches for a section so the undo function can add and delete sections
-
-        Args:
-            node: UIConnectorNode - the starting node
-            path: list - a path to store how close we are and when to stop
-
-        Returns:
-            UIConnectorNode - the found connector node
+            UIConnectorNode - the section
         """
-        if len(path) > 1:
-            for child in node.children:
-                if str(child.label) == path[0]:
-                    del path[0]
-                    return self.recursive_searching_for_connector(child, path)
-        else:
-            for child in node.children:
-                if str(child.label) == path[0]:
-                    return child
-            return node.tree.root
-        return None
+
+        section = tree.find_section(path)
+        if section is None:
+            parent_path, _, label = path.rpartition(".")
+            section = tree.add_section(self.__find_or_add_section(tree, parent_path), label)
+        return section
 
     def on_tree_node_selected(self, node: Tree.NodeSelected) -> None:
         """Called when the user selects a node (section or var) and brings up the appropriate screens
@@ -541,6 +687,7 @@ class UI(App[list[str]]):
                 for change in changes_mode:
                     self.__stack.push(ListItem(Label(change), name=change))
                     self.query_one(ListView).insert(0, [self.__stack.peek()])
+                self.__update_preview(changes_mode)
 
         def save_change_to_stack(changes_made: str | None) -> None:
             """Saves the changes to variables to the operations stack and updates the list view
@@ -552,11 +699,14 @@ class UI(App[list[str]]):
             if changes_made:
                 self.__stack.push(ListItem(Label(changes_made), name=changes_made))
                 self.query_one(ListView).insert(0, [self.__stack.peek()])
+                self.__update_preview([changes_made])
 
+        if self.__still_loading():
+            return
         if node.node.allow_expand:
             self.app.push_screen(SectionOptionsScreen(node, self.__options), save_section_changes_to_stack)
         else:
-            self.app.push_screen(OptionsScreen(node), save_change_to_stack)
+            self.app.push_screen(OptionsScreen(node, self.__options), save_change_to_stack)
 
     def on_option_list_option_selected(self, choice: OptionList.OptionSelected) -> None:
         """Opened if the user chooses an option - usually in generation management
@@ -572,7 +722,8 @@ class UI(App[list[str]]):
                 cmd: list[str] | None - the users choice (None if they chose nothing)
             """
 
-            self.app.exit(cmd)
+            if cmd:
+                self.__run_command(cmd)
 
         if choice.option_list.id in ("system-build-options", "home-manager-gens"):
             match choice.option.prompt:
@@ -584,18 +735,64 @@ class UI(App[list[str]]):
                                     )
                         self.__rebuild_switch_already_pressed = True
                     else:
-                        self.app.exit("sudo nixos-rebuild switch".split())
+                        self.__rebuild("sudo nixos-rebuild switch".split())
                 case "boot":
-                    self.app.exit("sudo nixos-rebuild boot".split())
+                    self.__rebuild("sudo nixos-rebuild boot".split())
                 case "test":
-                    self.app.exit("sudo nixos-rebuild test".split())
+                    self.__rebuild("sudo nixos-rebuild test".split())
+                case "build":
+                    self.__rebuild("nixos-rebuild build".split())
                 case "dry-activate":
-                    self.app.exit("sudo nixos-rebuild dry-activate".split())
+                    self.__rebuild("sudo nixos-rebuild dry-activate".split())
                 case "build-vm":
-                    self.app.exit("sudo nixos-rebuild build-vm".split())
+                    self.__rebuild("sudo nixos-rebuild build-vm".split())
                 case _:  # Home-manager
                     self.app.push_screen(HomeManagerGenerationScreen(str(choice.option.prompt)), handle_home_manager_choice)
 
+    def __rebuild(self, command: list[str]) -> None:
+        """Runs a rebuild command, unless it last succeeded with the file as it is now in which case the user is
+        warned first and has to choose it again
+
+        Args:
+            command: list[str] - the rebuild command
+        """
+
+        if command != self.__redundant_rebuild_warned and self.__rebuild_record.is_redundant(self.__file_name, command):
+            self.notify(title="Configuration unchanged",
+                        message=f"{' '.join(command)} already succeeded with the file as it is now, choose it again to run it anyway",
+                        severity="warning",
+                        )
+            self.__redundant_rebuild_warned = command
+        else:
+            self.__run_command(command)
+
+    def __run_command(self, command: list[str]) -> None:
+        """Runs a command in the app, showing its output as it runs
+
+        Args:
+            command: list[str] - the command
+
+        Note:
+            The tree, the operations stack and the options are all kept, so nothing is read again afterwards apart
+            from the home-manager generations, which a successful command may have changed
+        """
+
+        def command_finished(return_code: int | None) -> None:
+            """Records a successful rebuild and lists the home-manager generations again
+
+            Args:
+                return_code: int | None - the exit code of the command, None if it was cancelled
+            """
+
+            self.__rebuild_switch_already_pressed = False
+            self.__redundant_rebuild_warned = None
+            if return_code == 0:
+                if RebuildRecord.is_rebuild(command):
+                    self.__rebuild_record.record(self.__file_name, command)
+                self.__load_generations()
+
+        self.push_screen(CommandScreen(command), command_finished)
+
     def on_button_pressed(self, choice: Button.Pressed):
         """Called if a button is pressed - only really in generation management
 
@@ -605,9 +802,9 @@ class UI(App[list[str]]):
 
         match choice.button.id:
             case "switch_hm":
-                self.app.exit("home-manager switch".split())
+                self.__rebuild("home-manager switch".split())
             case "build_hm":
-                self.app.exit("home-manager build".split())
+                self.__rebuild("home-manager build".split())
 
     def compose(self) -> ComposeResult:
         """Defines what the main app screen will look like
@@ -616,13 +813,14 @@ class UI(App[list[str]]):
             ComposeResult - the screen in a form the library understands
         """
 
-        tree: Tree[dict] = Tree(self.__file_name)
+        tree = LazyTree(self.__file_name, self.__model, self.__mark_if_problem, loading=self.__decomposer is None)
         tree.root.expand()
-        self.__decomposer.get_tree().add_to_ui(self.__decomposer.get_tree().get_root(), tree.root)
 
         with TabbedContent():
             with TabPane(title="tree"):
-                yield tree
+                with Horizontal(id="tree_and_preview"):
+                    yield tree
+                    yield TextArea(id="nix_preview", read_only=True, show_line_numbers=True)
             with TabPane(title="generations"):
                 with TabbedContent():
                     with TabPane(title="System"):
@@ -654,40 +852,317 @@ class UI(App[list[str]]):
                             Activate -> Activates the selected generation, switching to it
                             Remove -> Deletes the selected generation
                             """)
-                        try:
-                            generation_command = subprocess.run("home-manager generations".split(), capture_output=True,
-                                                                text=True, check=True)
-                            yield OptionList(*generation_command.stdout.split("\n")[:-1], id="home-manager-gens")
-                            with Horizontal(id="buttons"):
-                                yield Button(label="switch", variant="success", id="switch_hm")
-                                yield Button(label="build", id="build_hm")
-                        except FileNotFoundError:  # If the user does not have home manager installed
-                            yield Static("Home manager options unavailable - first install home-manager!")
+                        with Vertical(id="home-manager-generations"):
+                            yield Static("Loading the home-manager generations...")
             with TabPane(title="operations stack", id="operations_stack_tab"):
                 yield ListView(id="operations_stack")
         yield Header(name="Nix tree")
+        if self.__decomposer is None:
+            with Horizontal(id="file_loading"):
+                yield ProgressBar(show_eta=False)
+                yield Label(f"Reading {self.__file_name}... (q to quit)")
+        with Horizontal(id="options_loading"):
+            yield LoadingIndicator()
+            yield Label("Loading the options...")
         yield Footer()
 
     def on_mount(self) -> None:
-        """sets the title of the page to Nix tree"""
+        """sets the title of the page to Nix tree, starts loading the options and fills in the preview of the
+        generated file, decomposing the file first if it has not been"""
 
         self.title = "Nix tree"
+        self.__load_options()
+        self.__load_generations()
+        if self.__decomposer is None:
+            self.__decompose()
+        else:
+            self.__update_preview([], reset=True)
 
+    @work(thread=True, exclusive=True, group="generations")
+    def __load_generations(self) -> None:
+        """Lists the home-manager generations in a background thread, as running home-manager is slow
 
-def start_ui(file_location: str, write_over: bool, comments: bool) -> None:
-    """Makes a DecomposerTree object along with calling the decomposer object to fill the tree, it then passes it into
-    the ui object from which it runs the ui"""
-
-    tree = DecomposerTree()
-    decomposer = Decomposer(file_path=Path(file_location), tree=tree)
-    ui = UI(file_location, decomposer)
-    command: list[str] | None = ui.run()
-    if command:
-        # If command is an actual command it will be executed, otherwise it is a list of operations for the composer to use in the edit the file option
-        if any(substring in ' '.join(command) for substring in ["sudo", "home-manager", "activate"]):
-            subprocess.run(command, check=True)  # To error out if the command fails
-            _ = input("Command succesful, press enter to continue...\n")  # Just to force the user to press enter we don't care what they input
-            # We know the command was succesful because otherwise the subprocess run line would have failed!
-            start_ui(file_location, write_over, comments)
+        Note:
+            The list is cached until the home-manager profile changes, so this is usually quick too
+        """
+
+        try:
+            generations: list[str] | None = self.__generations_cache.get_generations()
+            message = ""
+        except FileNotFoundError:  # If the user does not have home manager installed
+            generations, message = None, "Home manager options unavailable - first install home-manager!"
+        except subprocess.CalledProcessError as error:
+            generations, message = None, f"The home-manager generations could not be listed ({error.stderr.strip()})"
+        self.call_from_thread(self.__show_generations, generations, message)
+
+    def __show_generations(self, generations: list[str] | None, message: str) -> None:
+        """Replaces the placeholder in the home manager tab with the generations
+
+        Args:
+            generations: list[str] | None - the generations, or None if they could not be listed
+            message: str - why they could not be listed
+        """
+
+        container = self.__main_screen().query_one("#home-manager-generations", Vertical)
+        container.remove_children()
+        if generations is None:
+            container.mount(Static(message))
         else:
-            Composer(decomposer.get_tree(), file_location, write_over, comments)
+            container.mount(OptionList(*generations, id="home-manager-gens"))
+            container.mount(Horizontal(Button(label="switch", variant="success", id="switch_hm"),
+                                       Button(label="build", id="build_hm"), id="buttons"))
+
+    def get_decomposer(self) -> Decomposer | None:
+        """Returns the decomposer of the file, for composing it once the app has exited
+
+        Returns:
+            Decomposer | None - the decomposer, or None if the app was quit before the file had been read
+        """
+
+        return self.__decomposer
+
+    @work(thread=True, exclusive=True, group="decomposing")
+    def __decompose(self) -> None:
+        """Decomposes the file in a background thread, showing the top level of the tree as it is read
+
+        Note:
+            The tree is shown about a hundred times while the file is read, rather than after every assignment. The
+            file can be edited as soon as it has been read, and the preview tree is decomposed afterwards by the
+            preview worker. If the app is quit the worker is cancelled, and the decomposer is stopped at the next
+            assignment
+        """
+
+        worker = get_current_worker()
+        last_shown = 0
+
+        def progress(done: int, total: int) -> None:
+            """Stops the decomposer if the app has been quit, and shows how far through the file it is
+
+            Args:
+                done: int - how many assignments have been read
+                total: int - how many there are
+            """
+
+            nonlocal last_shown
+            if worker.is_cancelled:
+                raise DecompositionCancelled()
+            if done - last_shown >= max(total // 100, 1) or done == total:
+                last_shown = done
+                self.call_from_thread(self.__show_progress, done, total)
+
+        try:
+            decomposer = Decomposer(file_path=Path(self.__file_name), tree=self.__model, progress=progress)
+        except DecompositionCancelled:
+            return
+        if not worker.is_cancelled:
+            self.call_from_thread(self.__file_loaded, decomposer)
+
+    def __show_progress(self, done: int, total: int) -> None:
+        """Moves the progress bar on and adds the sections read since it was last moved to the tree
+
+        Args:
+            done: int - how many assignments have been read
+            total: int - how many there are
+        """
+
+        main_screen = self.__main_screen()
+        main_screen.query_one("#file_loading ProgressBar", ProgressBar).update(total=total, progress=done)
+        main_screen.query_one(LazyTree).show_loaded()
+
+    def __file_loaded(self, decomposer: Decomposer) -> None:
+        """Finishes the tree once the file has been read, starts filling in the preview and checks every variable
+        against the options if they have already loaded
+
+        Args:
+            decomposer: Decomposer - the decomposer of the file
+        """
+
+        self.__decomposer = decomposer
+        main_screen = self.__main_screen()
+        main_screen.query_one("#file_loading", Horizontal).remove()
+        main_screen.query_one(LazyTree).finish_loading()
+        self.__update_preview([], reset=True)
+        if self.__options.is_ready() and not self.__options.get_error():
+            self.__validate_every_variable()
+
+    def __main_screen(self) -> Screen:
+        """Returns the screen with the tree on it, for the background workers to show their results on
+
+        Returns:
+            Screen - the main screen
+
+        Note:
+            Querying the app only looks in the screen on top, so a worker which finished while another screen (like
+            the help screen) was open would not find the tree
+        """
+
+        return self.screen_stack[0]
+
+    def __still_loading(self) -> bool:
+        """Tells the user the file is still being read if it is, as nothing can be edited until it has been
+
+        Returns:
+            bool - true if it is still being read
+        """
+
+        if self.__decomposer is None:
+            self.notify("The file is still being read, it can be edited once it has loaded", title="Loading")
+            return True
+        return False
+
+    @work(thread=True, exclusive=True)
+    def __load_options(self) -> None:
+        """Loads the options in a background thread so the tree can be used straight away
+
+        Note:
+            Anything which needs the options before they have loaded waits for them
+        """
+
+        self.__options.load(lambda: OptionSets(self.__option_sets, self.__layers))
+        self.call_from_thread(self.__options_loaded)
+
+    def __options_loaded(self) -> None:
+        """Removes the loading indicator, telling the user if the options could not be loaded, and checks every
+        variable in the tree against them"""
+
+        self.__main_screen().query_one("#options_loading", Horizontal).remove()
+        if error := self.__options.get_error():
+            self.notify(f"The options could not be loaded ({error}), so types will not be checked",
+                        title="Options unavailable", severity="warning")
+        elif self.__decomposer is not None:  # Otherwise they are checked once the file has been read
+            self.__validate_every_variable()
+
+    def __validate_every_variable(self) -> None:
+        """Checks every variable in the file against the options, once both have loaded"""
+
+        # The decomposer tree has every variable in the file, and the ui tree has any edited since it was opened
+        variables = [(variable.get_name(), variable.get_data()) for variable in find_variables(self.__model.get_root())]
+        edited = tree_variables(self.__main_screen().query_one(Tree).root)
+        self.__validate(list(dict.fromkeys(variables + edited)), True)
+
+    def __operation_changed(self, item: ListItem, pushed: bool) -> None:
+        """Checks the variables an operation changed when it is pushed to (or popped from) the operations stack
+
+        Args:
+            item: ListItem - the operation
+            pushed: bool - whether it was pushed, the variables are the same either way
+
+        Note:
+            Both the old and new values of a change are checked, as undoing it puts the old value back. Only the one
+            which is in the tree by the time they have been checked is marked
+        """
+
+        if not item.name or not self.__options.is_ready() or self.__options.get_error():
+            return  # Edits made before the options have loaded are checked along with everything else once they are
+        action = item.name
+        variables: list[tuple[str, str]] = []
+        try:
+            match action.split(" ")[0]:
+                case "Added" | "Delete":
+                    path, _, full_path = self.__extract_data_from_action(action)
+                    variables.append((path, full_path[len(path) + 1:]))
+                case "Change":
+                    for side in action[7:].split(" -> "):
+                        path, _, value = side.strip().partition("=")
+                        variables.append((path, value))
+                case "Section" if action.split(" ")[-1] == "deleted":
+                    section = action.split(" ")[1] + "."
+                    self.__problems = {path: problem for path, problem in self.__problems.items()
+                                       if not path.startswith(section)}
+        except ErrorComposingFileFromTree:
+            return
+        if variables:
+            self.__validate(variables)
+
+    @work(thread=True, group="validation")
+    def __validate(self, variables: list[tuple[str, str]], every_variable: bool = False) -> None:
+        """Checks variables against the options in a background thread
+
+        Args:
+            variables: list[tuple[str, str]] - the full path and value of each variable
+            every_variable: bool - whether every variable in the file is being checked, once the options have loaded
+        """
+
+        results = self.__live_validator.check(variables)
+        self.call_from_thread(self.__mark_problems, results, every_variable)
+
+    def __mark_problems(self, results: dict[tuple[str, str], str | None], every_variable: bool) -> None:
+        """Marks the variables which do not fit the options in the tree, and unmarks the ones which now do
+
+        Args:
+            results: dict[tuple[str, str], str | None] - what is wrong with each variable checked, None if nothing
+            every_variable: bool - whether every variable in the file was checked
+
+        Note:
+            Each new problem found after an edit is shown as a notification, but only how many there are is shown
+            when every variable is checked. Variables in sections which have not been opened yet are marked by
+            __mark_if_problem when they are
+        """
+
+        tree = self.__main_screen().query_one(LazyTree)
+        new_problems: list[str] = []
+        for (path, value), problem in results.items():
+            node = tree.find_variable(path, value, fill=False)
+            if node is None:
+                if every_variable and problem:  # Its section has not been opened yet
+                    new_problems.append(problem)
+                    self.__problems[path] = (value, problem)
+                elif self.__problems.get(path, ("",))[0] == value:  # It has been changed again since
+                    del self.__problems[path]
+                continue
+            mark_node(node, problem)
+            if problem:
+                if self.__problems.get(path) != (value, problem):
+                    new_problems.append(problem)
+                self.__problems[path] = (value, problem)
+            else:
+                self.__problems.pop(path, None)
+        if every_variable and new_problems:
+            self.notify(f"{len(new_problems)} variable(s) do not fit the options, they are shown in red",
+                        title="Options problems", severity="warning")
+        elif not every_variable:
+            for problem in new_problems:
+                self.notify(problem, title="Does not fit the options", severity="warning")
+
+    def __mark_if_problem(self, node: UIVariableNode) -> None:
+        """Marks a variable as it is added to the tree if it was found not to fit the options
+
+        Args:
+            node: UIVariableNode - the variable
+        """
+
+        for path, value in node.data.items():
+            if (problem := self.__problems.get(path)) and problem[0] == value:
+                mark_node(node, problem[1])
+
+
+def start_ui(file_location: str, write_over: bool, comments: bool, backups: int = 0, patch: bool = False,
+             jobs: int = 1, dry_run: bool = False, option_sets: dict[str, Path] | None = None,
+             layers: list[str] | None = None) -> None:
+    """Runs the ui, which decomposes the file in the background as it starts, and then makes any changes chosen in
+    it
+
+    Note:
+        If dry_run is true the changes are printed as a diff instead of being written to the file. The option sets
+        are the sets the file can be checked against and layers the ones it is, chosen from its name if not given
+    """
+
+    ui = UI(file_location, None, comments, patch, option_sets=option_sets, layers=layers)
+    operations: list[str] | None = ui.run()
+    decomposer = ui.get_decomposer()
+    if operations and decomposer:  # Changes can only be made once the file has been read
+        if dry_run:
+            edited = compose_to_string(decomposer, file_location, operations, comments, patch)
+            print(work_out_diff(decomposer.get_source_spans().get_source(), edited, file_location), end="")
+            return
+        if patch:
+            try:
+                patch_composer = PatchComposer(decomposer.get_tree(), decomposer.get_source_spans(), file_location,
+                                               write_over, operations, backups)
+                if not patch_composer.get_written():
+                    print("The file already contains these changes, so it was not written")
+                return
+            except ErrorComposingFileFromTree as error:
+                print(f"\033[93m {error}, writing the whole file instead \033[91m")
+        if not Composer(decomposer.get_tree(), file_location, write_over, comments, backups, jobs).get_written():
+            print("The file already contains these changes, so it was not written")
@@ -0,0 +1,501 @@
+"""Compiles the type strings in the options.json into validators which check values exactly, e.g. a value for
+"integer between 1 and 65535 (both inclusive)" must be a whole number in that range"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import cache
+import re
+from typing import Any
+
+# Functions which only change the priority or order of a value, e.g. lib.mkDefault true is checked as true
+PRIORITY_FUNCTION = re.compile(r"(?:lib\.)?(?:mkDefault|mkForce|mkBefore|mkAfter|mk(?:Override|Order)[.\s]+\d+)"
+                               r"[.\s]+(.+)", re.DOTALL)
+INDENTED_STRING = re.compile(r"''((?:'''|[^']|'(?!'))*)''", re.DOTALL)
+SINGLE_QUOTED_STRING = re.compile(r"'([^']*)'")  # The decomposer stores "strings" like this
+DOUBLE_QUOTED_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"', re.DOTALL)
+
+
+@dataclass(frozen=True)
+class NixValue:
+    """A value as far as it can be worked out without evaluating it
+
+    Note:
+        The kind is one of bool, int, float, null, string, path, list, set or expression (anything which would have
+        to be evaluated, like pkgs.git). The content is the value itself for bools, ints, floats and strings (None
+        for strings with ${} in them), the elements for lists (None if they could not be split) and None otherwise
+    """
+    kind: str
+    content: Any = None
+
+
+def split_elements(inside: str) -> list[str] | None:
+    """Splits the inside of a list into its elements
+
+    Args:
+        inside: str - what is between the square brackets
+
+    Returns:
+        list[str] | None - the elements, or None if the brackets or strings do not match up
+    """
+
+    elements = []
+    depth = 0
+    start: int | None = None
+    i = 0
+    while i < len(inside):
+        character = inside[i]
+        if start is None and not character.isspace():
+            start = i
+        if inside.startswith("''", i):
+            match = INDENTED_STRING.match(inside, i)
+            i = match.end() if match else i + 2  # Otherwise it is an empty string, stored as ''
+            continue
+        if character in "'\"":
+            match = (SINGLE_QUOTED_STRING if character == "'" else DOUBLE_QUOTED_STRING).match(inside, i)
+            if not match:
+                return None
+            i = match.end()
+            continue
+        if character in "[{(":
+            depth += 1
+        elif character in "]})":
+            depth -= 1
+            if depth < 0:
+                return None
+        elif character.isspace() and depth == 0 and start is not None:
+            elements.append(inside[start:i])
+            start = None
+        i += 1
+    if depth != 0:
+        return None
+    if start is not None:
+        elements.append(inside[start:])
+    return elements
+
+
+def parse_value(value: str) -> NixValue:
+    """Works out what kind of value a variable has, in the form the decomposer stores values
+
+    Args:
+        value: str - the value, e.g. "[ 'wheel' 'docker' ]"
+
+    Returns:
+        NixValue - the kind and content of the value
+    """
+
+    text = value.strip()
+    if match := PRIORITY_FUNCTION.fullmatch(text):
+        return parse_value(match.group(1))
+    if text in ("true", "false"):
+        return NixValue("bool", text == "true")
+    if text == "null":
+        return NixValue("null")
+    if re.fullmatch(r"-?\d+", text):
+        return NixValue("int", int(text))
+    if re.fullmatch(r"-?(\d+\.\d*|\.\d+)([eE][+-]?\d+)?", text):
+        return NixValue("float", float(text))
+    if text == "''":  # An empty string, stored with single quotes
+        return NixValue("string", "")
+    for string in (INDENTED_STRING, SINGLE_QUOTED_STRING, DOUBLE_QUOTED_STRING):
+        if match := string.fullmatch(text):
+            return NixValue("string", None if "${" in match.group(1) else match.group(1))
+    if text.startswith("[") and text.endswith("]"):
+        elements = split_elements(text[1:-1])
+        return NixValue("list", [parse_value(element) for element in elements] if elements is not None else None)
+    if text.startswith("{") and text.endswith("}"):
+        return NixValue("set", text[1:-1].strip())
+    if re.fullmatch(r"(\.{1,2}|~)?(/[\w.+\-]+)+/?", text):
+        return NixValue("path")
+    return NixValue("expression")
+
+
+class Validator(ABC):
+    """The base class of the validators, which say if a value fits a type
+
+    Note:
+        Validators return True if the value fits, False if it does not and None if it can not be told without
+        evaluating the value (e.g. pkgs.git for a package)
+    """
+
+    def validate(self, value: str) -> bool | None:
+        """Checks a value as it is stored by the decomposer
+
+        Args:
+            value: str - the value
+
+        Returns:
+            bool | None - whether the value fits the type, None if it can not be told
+        """
+
+        return self.check(parse_value(value))
+
+    def check(self, value: NixValue) -> bool | None:
+        """Checks a value which has already been parsed
+
+        Args:
+            value: NixValue - the value
+
+        Returns:
+            bool | None - whether the value fits the type, None if it can not be told
+        """
+
+        if value.kind == "expression":
+            return None
+        return self._check(value)
+
+    @abstractmethod
+    def _check(self, value: NixValue) -> bool | None:
+        """Checks a value which is not an expression, each validator defines this
+
+        Args:
+            value: NixValue - the value
+
+        Returns:
+            bool | None - whether the value fits the type, None if it can not be told
+        """
+
+
+class AnythingValidator(Validator):
+    """For types which allow any value, like "raw value" """
+
+    def _check(self, value: NixValue) -> bool | None:
+        """Every value fits"""
+
+        return True
+
+
+class UnknownValidator(Validator):
+    """For type strings which are not understood, so no value is ever said to be wrong"""
+
+    def _check(self, value: NixValue) -> bool | None:
+        """It can never be told if a value fits"""
+
+        return None
+
+
+class KindValidator(Validator):
+    """For types which only allow some kinds of value, like "boolean" or "null" """
+
+    def __init__(self, kinds: tuple[str, ...], exact: bool = True) -> None:
+        """Stores the kinds of value which are allowed
+
+        Args:
+            kinds: tuple[str, ...] - the kinds, e.g. ("bool",)
+            exact: bool - false if a value of the right kind may still be wrong (e.g. a set for a submodule)
+        """
+
+        self.__kinds = kinds
+        self.__exact = exact
+
+    def _check(self, value: NixValue) -> bool | None:
+        """The value fits if it is one of the kinds"""
+
+        if value.kind not in self.__kinds:
+            return False
+        return True if self.__exact else None
+
+
+class IntValidator(Validator):
+    """For integer types, which may have a range"""
+
+    def __init__(self, lowest: int | None = None, highest: int | None = None) -> None:
+        """Stores the range of the integers
+
+        Args:
+            lowest: int | None - the lowest integer allowed
+            highest: int | None - the highest integer allowed
+        """
+
+        self.__lowest = lowest
+        self.__highest = highest
+
+    def _check(self, value: NixValue) -> bool | None:
+        """The value fits if it is an integer in the range"""
+
+        if value.kind != "int":
+            return False
+        return ((self.__lowest is None or value.content >= self.__lowest) and
+                (self.__highest is None or value.content <= self.__highest))
+
+
+class StringValidator(Validator):
+    """For string types, which may have to be non-empty or match a pattern"""
+
+    def __init__(self, non_empty: bool = False, pattern: str | None = None) -> None:
+        """Stores what the strings must be like
+
+        Args:
+            non_empty: bool - whether the string must not be empty
+            pattern: str | None - a regular expression the whole string must match
+        """
+
+        self.__non_empty = non_empty
+        try:
+            self.__pattern = re.compile(pattern) if pattern else None
+        except re.error:  # Nix uses POSIX regular expressions, which python can not always read
+            self.__pattern = None
+
+    def _check(self, value: NixValue) -> bool | None:
+        """The value fits if it is a string, which is not empty or matches the pattern if it has to"""
+
+        if value.kind != "string":
+            return False
+        if value.content is None:  # The string has ${} in it, so only its kind is known
+            return None if self.__non_empty or self.__pattern else True
+        if self.__non_empty and not value.content.strip():
+            return False
+        if self.__pattern:
+            return self.__pattern.fullmatch(value.content) is not None
+        return True
+
+
+class PathValidator(Validator):
+    """For path types, which allow path literals and strings starting with /"""
+
+    def _check(self, value: NixValue) -> bool | None:
+        """The value fits if it is a path, or a string starting with /"""
+
+        if value.kind == "path":
+            return True
+        if value.kind == "string":
+            return None if value.content is None else value.content.startswith("/")
+        return False
+
+
+class EnumValidator(Validator):
+    """For "one of" types, which only allow some values"""
+
+    def __init__(self, values: tuple[NixValue, ...]) -> None:
+        """Stores the values which are allowed
+
+        Args:
+            values: tuple[NixValue, ...] - the values
+        """
+
+        self.__values = values
+
+    def _check(self, value: NixValue) -> bool | None:
+        """The value fits if it is one of the values"""
+
+        if value.kind == "string" and value.content is None:
+            return None
+        return value in self.__values
+
+
+class ListValidator(Validator):
+    """For "list of" types, where every element has to fit the type of the elements"""
+
+    def __init__(self, element: Validator, non_empty: bool = False) -> None:
+        """Stores the validator for the elements
+
+        Args:
+            element: Validator - the validator for the elements
+            non_empty: bool - whether the list must have at least one element
+        """
+
+        self.element = element
+        self.__non_empty = non_empty
+
+    def _check(self, value: NixValue) -> bool | None:
+        """The value fits if it is a list whose elements all fit"""
+
+        if value.kind != "list":
+            return False
+        if value.content is None:
+            return None
+        if self.__non_empty and not value.content:
+            return False
+        results = [self.element.check(element) for element in value.content]
+        if False in results:
+            return False
+        return None if None in results else True
+
+
+class AttrsValidator(Validator):
+    """For "attribute set of" types, the attributes themselves are checked as separate variables"""
+
+    def _check(self, value: NixValue) -> bool | None:
+        """The value fits if it is an attribute set, though only an empty one is known to fit"""
+
+        if value.kind != "set":
+            return False
+        return True if not value.content else None
+
+
+class EitherValidator(Validator):
+    """For types made of alternatives, like "null or string" """
+
+    def __init__(self, alternatives: tuple[Validator, ...]) -> None:
+        """Stores the alternatives
+
+        Args:
+            alternatives: tuple[Validator, ...] - the validators of the alternatives
+        """
+
+        self.__alternatives = alternatives
+
+    def _check(self, value: NixValue) -> bool | None:
+        """The value fits if it fits any of the alternatives"""
+
+        results = [alternative.check(value) for alternative in self.__alternatives]
+        if True in results:
+            return True
+        return None if None in results else False
+
+
+def split_outside_brackets(text: str, separator: str) -> list[str]:
+    """Splits a type string, ignoring separators inside brackets or quotes
+
+    Args:
+        text: str - the type string
+        separator: str - what to split on, e.g. " or "
+
+    Returns:
+        list[str] - the parts
+    """
+
+    parts = []
+    depth = 0
+    in_quotes = False
+    start = 0
+    i = 0
+    while i < len(text):
+        character = text[i]
+        if character == "\\" and in_quotes:
+            i += 2
+            continue
+        if character == '"':
+            in_quotes = not in_quotes
+        elif not in_quotes and character == "(":
+            depth += 1
+        elif not in_quotes and character == ")":
+            depth -= 1
+        elif not in_quotes and depth == 0 and text.startswith(separator, i):
+            parts.append(text[start:i])
+            start = i + len(separator)
+            i = start
+            continue
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def strip_brackets(text: str) -> str:
+    """Removes brackets around the whole of a type string, e.g. "(list of string)"
+
+    Args:
+        text: str - the type string
+
+    Returns:
+        str - the type string without the brackets
+    """
+
+    text = text.strip()
+    while text.startswith("(") and text.endswith(")"):
+        depth = 0
+        for i, character in enumerate(text):
+            depth += {"(": 1, ")": -1}.get(character, 0)
+            if depth == 0 and i < len(text) - 1:  # The first bracket closes before the end
+                return text
+        text = text[1:-1].strip()
+    return text
+
+
+# What each POSIX bracket class matches, written so it can go inside a python bracket expression
+POSIX_CLASSES: dict[str, str] = {
+    "alnum": "a-zA-Z0-9",
+    "alpha": "a-zA-Z",
+    "digit": "0-9",
+    "xdigit": "0-9a-fA-F",
+    "upper": "A-Z",
+    "lower": "a-z",
+    "space": r" \t\n\r\f\v",
+    "blank": r" \t",
+    "punct": re.escape("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~"),
+    "cntrl": r"\x00-\x1f\x7f",
+    "print": r"\x20-\x7e",
+    "graph": r"\x21-\x7e",
+}
+
+
+def translate_posix_pattern(pattern: str) -> str | None:
+    """Translates the bracket classes of a POSIX regular expression (like [[:alnum:]_-]) for python
+
+    Args:
+        pattern: str - the POSIX regular expression, as the types of the options are written
+
+    Returns:
+        str | None - the pattern for python, or None if it has a class which is not known
+    """
+
+    translated = re.sub(r"\[:(\w+):]", lambda match: POSIX_CLASSES.get(match.group(1), match.group(0)), pattern)
+    return None if "[:" in translated else translated
+
+
+@cache
+def compile_type(type_as_string: str) -> Validator:
+    """Compiles a type string from the options.json into a validator
+
+    Args:
+        type_as_string: str - the type string, e.g. "null or (list of string)"
+
+    Returns:
+        Validator - the validator, shared by every option with the same type string
+
+    Note:
+        Each distinct type string is only compiled once, and types which are not understood are given a validator
+        which never says a value is wrong
+    """
+
+    text = strip_brackets(re.sub(r"\s*\(with check: .*\)$|, not containing .*$", "", type_as_string))
+    alternatives = split_outside_brackets(text, " or ")
+    if len(alternatives) > 1:
+        return EitherValidator(tuple(compile_type(alternative) for alternative in alternatives))
+
+    if text.startswith("non-empty "):
+        inside = compile_type(text.removeprefix("non-empty "))
+        if isinstance(inside, ListValidator):
+            return ListValidator(inside.element, True)
+        return StringValidator(True) if isinstance(inside, StringValidator) else inside
+    if match := re.fullmatch(r"list of (.+)", text, re.DOTALL):
+        return ListValidator(compile_type(match.group(1)))
+    if re.fullmatch(r"(lazy )?attribute set( of .+)?", text, re.DOTALL):
+        return AttrsValidator()
+    if match := re.fullmatch(r"one of (.+)|value (.+) \(singular enum\)", text, re.DOTALL):
+        values = re.findall(r'"(?:[^"\\]|\\.)*"|[^,\s]+', match.group(1) or match.group(2))
+        return EnumValidator(tuple(parse_value(value) for value in values))
+    if text == "boolean":
+        return KindValidator(("bool",))
+    if text == "null":
+        return KindValidator(("null",))
+    if text == "floating point number":
+        return KindValidator(("float",))
+    if re.search(r"\binteger\b", text):
+        if match := re.search(r"between (-?\d+) and (-?\d+)", text):
+            return IntValidator(int(match.group(1)), int(match.group(2)))
+        if match := re.search(r"(\d+) bit (unsigned|signed) integer", text):
+            bits = int(match.group(1))
+            if match.group(2) == "unsigned":
+                return IntValidator(0, 2 ** bits - 1)
+            return IntValidator(-2 ** (bits - 1), 2 ** (bits - 1) - 1)
+        if "positive" in text or "meaning >0" in text:
+            return IntValidator(1)
+        if "unsigned" in text or "meaning >=0" in text:
+            return IntValidator(0)
+        return IntValidator()
+    if match := re.fullmatch(r"string matching the pattern (.+)", text, re.DOTALL):
+        if (pattern := translate_posix_pattern(match.group(1))) is None:
+            return UnknownValidator()
+        return StringValidator(pattern=pattern)
+    if re.fullmatch(r"(single-line )?strings?( concatenated with .*)?|(concatenated|separated|.* separated) string",
+                    text, re.IGNORECASE | re.DOTALL):
+        return StringValidator()
+    if text in ("path", "absolute path"):
+        return PathValidator()
+    if text == "package":
+        return KindValidator(("string", "path", "set"), exact=False)
+    if text in ("submodule", "module"):
+        return KindValidator(("set", "path"), exact=False)
+    if text in ("anything", "raw value", "unspecified value", "JSON value", "TOML value", "YAML value"):
+        return AnythingValidator()
+    return UnknownValidator()
@@ -8,7 +8,7 @@ from textual.screen import ModalScreen
 from textual.widgets import Input, Label, Tree, Button, RadioSet
 
 from nix_tree.help_screens import OptionsHelpScreen
-from nix_tree.parsing import Types
+from nix_tree.parsing import BackgroundOptions, ParsingOptions, Types
 
 
 class ModifyScreen(ModalScreen[str]):
@@ -17,14 +17,16 @@ class ModifyScreen(ModalScreen[str]):
         ("escape", "quit_pressed")
     ]
 
-    def __init__(self, node: Tree.NodeSelected) -> None:
+    def __init__(self, node: Tree.NodeSelected, options: ParsingOptions | BackgroundOptions | None = None) -> None:
         """Redefines the init function of a screen - polymorphism - to store required variables
 
         Args:
             node: Tree.NodeSelected - the node that is being modified
+            options: ParsingOptions | BackgroundOptions | None - the options, to check new values against
         """
 
         self.__node = node
+        self.__options = options
         if node.node.data:
             self.__path, self.__value = (list(node.node.data.keys())[0], list(node.node.data.values())[0])
             self.__type: Types = node.node.data.get("type")
@@ -81,6 +83,11 @@ class ModifyScreen(ModalScreen[str]):
                 clean_input: str = re.sub(r"\"", "'", new_data.value)
                 clean_input = re.sub(r"(\[)(\s*)", "[ ", clean_input)
                 clean_input = re.sub(r"(\s*)(])", " ]", clean_input)
+                if self.__fits_option(clean_input) is False:
+                    self.notify("The value does not fit the options type! Not updating", title="error changing option",
+                                severity="error")
+                    self.app.pop_screen()
+                    return
                 self.__node.node.label = self.__path.split(".")[-1] + "=" + clean_input
                 if self.__node.node.data:
                     self.__node.node.data[self.__path] = clean_input
@@ -89,6 +96,21 @@ class ModifyScreen(ModalScreen[str]):
         else:
             self.app.pop_screen()
 
+    def __fits_option(self, value: str) -> bool | None:
+        """Checks a new value against the type of the option the variable sets
+
+        Args:
+            value: str - the new value, in the form the decomposer stores values
+
+        Returns:
+            bool | None - whether the value fits, None if it can not be told (or the variable is not an option)
+        """
+
+        if not self.__options:
+            return None
+        validator = self.__options.get_validator(self.__path.removeprefix("config."))
+        return validator.validate(value) if validator else None
+
     def on_radio_set_changed(self, selected: RadioSet.Changed):
         """Takes the user input from the radio_set widget and performs the modification to the variable alongside
         creating the operations stack message
@@ -124,14 +146,16 @@ class OptionsScreen(ModalScreen[str]):
         ("?", "help", "Show help screen"),
     ]
 
-    def __init__(self, node: Tree.NodeSelected) -> None:
+    def __init__(self, node: Tree.NodeSelected, options: ParsingOptions | BackgroundOptions | None = None) -> None:
         """Redefines the init function of a screen - polymorphism - to store required variables
 
         Args:
             node: Tree.NodeSelected - the node that is being modified
+            options: ParsingOptions | BackgroundOptions | None - the options, to check new values against
         """
 
         self.__node = node
+        self.__options = options
         if node.node.data:
             self.__path, self.__value = (list(node.node.data.keys())[0], list(node.node.data.values())[0])
             self.__type: str = node.node.data.get("type")
@@ -174,7 +198,7 @@ class OptionsScreen(ModalScreen[str]):
                 if changes_made:
                     self.dismiss(changes_made)
 
-            self.app.push_screen(ModifyScreen(self.__node), save_modify_changes)
+            self.app.push_screen(ModifyScreen(self.__node, self.__options), save_modify_changes)
 
     def action_quit_pressed(self) -> None:
         """Quits the screen when one of the quit buttons are pressed"""
@@ -0,0 +1,114 @@
+{ config, pkgs, ... }:
+
+{
+  imports = [ ./hardware-configuration.nix ];
+
+  boot = {
+    loader = {
+      systemd-boot.enable = true;
+      efi.canTouchEfiVariables = true;
+    };
+    supportedFilesystems = [ "zfs" ];
+    zfs.forceImportRoot = false;
+  };
+
+  services = {
+    zfs.autoScrub.enable = true;
+    openssh = {
+      enable = true;
+      settings = {
+        PasswordAuthentication = false;
+        PermitRootLogin = "yes";
+      };
+    };
+    tailscale.enable = true;
+    xserver = {
+      enable = true;
+      displayManager = {
+        lightdm.enable = true;
+        defaultSession = "xfce";
+      };
+      desktopManager.xfce.enable = true;
+      windowManager.bspwm.enable = true;
+    };
+    samba-wsdd.enable = true;
+    samba = {
+      enable = true;
+      securityType = "user";
+      extraConfig = '' workgroup = KTZ server string = testnix netbios name = testnix security = user guest ok = yes guest account = nobody map to guest = bad user load printers = no '';
+      shares.zfstest = {
+        path = "/mnt/zfstest";
+        browseable = "yes";
+        "read only" = "no";
+        "guest ok" = "yes";
+        "create mask" = "0644";
+        "directory mask" = "0755";
+        "force user" = "alex";
+        "force group" = "users";
+      };
+    };
+  };
+
+  time.timeZone = "America/New_York";
+
+  users.users = {
+    alex = {
+      isNormalUser = true;
+      extraGroups = [ "wheel" "docker" ];
+      openssh.authorizedKeys.keyFiles = [ /etc/nixos/ssh/authorized_keys ];
+    };
+    users.root.openssh.authorizedKeys.keyFiles = [ /etc/nixos/ssh/authorized_keys ];
+  };
+
+  environment.systemPackages = with pkgs; [
+    docker-compose
+    htop
+    hddtemp
+    intel-gpu-tools
+    iotop
+    lm_sensors
+    mergerfs
+    mc
+    ncdu
+    nmap
+    nvme-cli
+    sanoid
+    snapraid
+    tdns-cli
+    tmux
+    tree
+    vim
+    wget
+    smartmontools
+    e2fsprogs
+  ];
+
+  networking = {
+    firewall.enable = false;
+    hostName = "testnix";
+    hostId = "e5f2dc02";
+    interfaces.enp1s0.useDHCP = false;
+    defaultGateway = "10.42.0.254";
+    nameservers = [ "10.42.0.253" ];
+  };
+
+  virtualisation.docker = {
+    enable = true;
+    autoPrune = {
+      enable = true;
+      dates = "weekly";
+    };
+  };
+
+  #defaultSession = "xfce+bspwm";
+  nix.settings = {
+    experimental-features = [ "nix-command" "flakes" ];
+    warn-dirty = false;
+  };
+
+  system = {
+    copySystemConfiguration = true;
+    stateVersion = "23.05";
+  };
+
+}
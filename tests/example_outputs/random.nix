@@ -0,0 +1,16 @@
+{ lib, ... }:
+
+{
+    networking.useDHCP = lib.mkDefault.true;
+    nixpkgs.hostPlatform = lib.mkDefault."x86_64-linux";
+    boot.supportedFilesystems = {
+      btrfs = true;
+      zfs = lib.mkForce.false;
+    };
+    services = {
+      i2pd.bandwidth = 32;
+      tigerbeetle.clusterId = 15;
+    };
+  };
+
+}
@@ -0,0 +1,23 @@
+{ config, pkgs, ... }:
+
+{
+    imports = [ ./hardware-configuration.nix ];
+    boot.loader.grub = {
+      enable = true;
+      device = "/dev/sda";
+      useOSProber = true;
+    };
+    networking = {
+      hostName = "nixos";
+      networkmanager.enable = true;
+    };
+    time.timeZone = "Europe/London";
+    i18n.defaultLocale = "en_GB.UTF-8";
+    services.xserver.enable = true;
+    programs.firefox.enable = true;
+    nixpkgs.config.allowUnfree = true;
+    environment.systemPackages = with pkgs; [ vim git ];
+    system.stateVersion = "23.11";
+  };
+
+}
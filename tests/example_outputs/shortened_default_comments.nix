@@ -0,0 +1,38 @@
+{ config, pkgs, ... }:
+
+{
+  imports = [ ./hardware-configuration.nix ];
+
+  boot.loader.grub = {
+    enable = true;
+    # Edit this configuration file to define what should be installed on
+    # your system.  Help is available in the configuration.nix(5) man page
+    # and in the NixOS manual (accessible by running `nixos-help`).
+    device = "/dev/sda";
+    useOSProber = true;
+  };
+
+  networking = {
+    hostName = "nixos";
+    # networking.wireless.enable = true;  # Enables wireless support via wpa_supplicant.
+    networkmanager.enable = true;
+  };
+
+  time.timeZone = "Europe/London";
+
+  # Enable networking
+  i18n.defaultLocale = "en_GB.UTF-8";
+
+  # Set your time zone.
+  services.xserver.enable = true;
+
+  # Enable the X11 windowing system.
+  programs.firefox.enable = true;
+
+  nixpkgs.config.allowUnfree = true;
+
+  environment.systemPackages = with pkgs; [ vim git ];
+
+  system.stateVersion = "23.11";
+
+}
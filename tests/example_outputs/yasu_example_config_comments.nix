@@ -0,0 +1,126 @@
+{ config, pkgs, ... }:
+
+{
+  imports = [ ./hardware-configuration.nix ];
+
+  boot.loader = {
+    systemd-boot.enable = true;
+    efi.canTouchEfiVariables = true;
+  };
+
+  networking = {
+    hostName = "nixos";
+    defaultGateway = "10.11.12.1";
+    nameservers = [ "10.11.12.1" ];
+    firewall.allowedTCPPorts = [ 3389 ];
+  };
+
+  time.timeZone = "Japan";
+
+  virtualisation.virtualbox.host.enable = true;
+
+  hardware = {
+    bluetooth = {
+      enable = true;
+      #audio
+      config.General.Enable = "Source,Sink,Media,Socket";
+    };
+    pulseaudio = {
+      enable = true;
+      extraModules = [ pkgs.pulseaudio-modules-bt ];
+      package = pkgs.pulseaudioFull;
+      support32Bit = true;
+      extraConfig = '' load-module module-bluetooth-policy auto_switch = 2 '';
+    };
+    opengl.driSupport32Bit = true;
+  };
+
+  services = {
+    blueman.enable = true;
+    cron = {
+      enable = true;
+      systemCronJobs = [ "@reboot root ${pkgs.ethtool}/sbin/ethtool -s enp4s0 wol g" ];
+    };
+    openssh = {
+      enable = true;
+      passwordAuthentication = false;
+      challengeResponseAuthentication = false;
+      extraConfig = "UseDNS yes";
+    };
+    vsftpd = {
+      enable = true;
+      localUsers = true;
+      writeEnable = true;
+      extraConfig = '' pasv_enable = YES connect_from_port_20 = YES pasv_min_port = 4242 pasv_max_port = 4243 '';
+    };
+    apcupsd = {
+      enable = true;
+      configText = ''  UPSCABLE smart UPSTYPE apcsmart DEVICE /dev/ttyS0 '';
+    };
+    postfix = {
+      enable = true;
+      setSendmail = true;
+    };
+    xserver = {
+      enable = true;
+      layout = "us";
+      displayManager.gdm.enable = true;
+      desktopManager.gnome3.enable = true;
+      videoDrivers = [ "nvidia" ];
+    };
+    fail2ban.enable = true;
+    netdata.enable = true;
+    xrdp = {
+      enable = true;
+      defaultWindowManager = "${pkgs.icewm}/bin/icewm";
+    };
+    vnstat.enable = true;
+  };
+
+  sound.enable = true;
+
+  programs = {
+    mosh.enable = true;
+    gnupg.agent.enable = true;
+  };
+
+  systemd.targets = {
+    sleep.enable = false;
+    suspend.enable = false;
+    hibernate.enable = false;
+    hybrid-sleep.enable = false;
+  };
+
+  users.extraUsers.yasu = {
+    home = "/home/yasu";
+    isNormalUser = true;
+    uid = 1000;
+    extraGroups = [ "wheel" ];
+  };
+
+  nixpkgs.config.allowUnfree = true;
+
+  powerManagement.enable = true;
+
+  i18n.inputMethod = {
+    enabled = "ibus";
+    ibus.engines = with pkgs.ibus-engines; [ mozc ];
+  };
+
+  fonts = {
+    fonts = with pkgs; [
+      carlito
+      dejavu_fonts
+      ipafont
+      kochi-substitute
+      source-code-pro
+      ttf_bitstream_vera
+    ];
+    fontconfig.defaultFonts = {
+      monospace = [ "DejaVu Sans Mono" "IPAGothic" ];
+      sansSerif = [ "DejaVu Sans" "IPAPGothic" ];
+      serif = [ "DejaVu Serif" "IPAPMincho" ];
+    };
+  };
+
+}
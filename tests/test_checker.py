@@ -0,0 +1,83 @@
+"""Tests checking configuration files against the options with --check"""
+import io
+import json
+
+from nix_tree.checker import check_files, NO_PROBLEMS, PROBLEMS_FOUND, FILES_NOT_CHECKED
+
+
+OPTIONS = {
+    "networking.hostName": {"type": "string"},
+    "networking.firewall.allowedTCPPorts": {"type": "list of 16 bit unsigned integer"},
+    "services.openssh.enable": {"type": "boolean"},
+    "boot.loader.timeout": {"type": "null or signed integer"},
+    "boot.kernel.sysctl": {"type": "attribute set of (sysctl option value)"},
+    "users.users.<name>.isNormalUser": {"type": "boolean"},
+}
+
+
+def write_files(tmp_path, configuration):
+    """Writes the options.json and a configuration file to check
+
+    Returns:
+        tuple[Path, str] - the options.json and the configuration file
+    """
+
+    options_file = tmp_path / "options.json"
+    options_file.write_text(json.dumps(OPTIONS), encoding="utf-8")
+    configuration_file = tmp_path / "configuration.nix"
+    configuration_file.write_text(configuration, encoding="utf-8")
+    return options_file, str(configuration_file)
+
+
+def test_check_reports_unknown_options_and_mismatched_types(tmp_path, monkeypatch):
+    """
+    Checks unknown options and values of the wrong type (including numbers out of the types range) are reported with
+    their lines, and that values which are allowed by the type string (or are inside an option) are not
+    """
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    options_file, configuration_file = write_files(tmp_path, """{ config, pkgs, ... }:
+{
+  imports = [ ./hardware-configuration.nix ];
+  networking.hostName = "nixos";
+  networking.firewall.allowedTCPPorts = [ 22 80 70000 ];
+  services.openssh.enable = "yes";
+  services.openssh.notAnOption = true;
+  boot.loader.timeout = 5;
+  boot.kernel.sysctl."vm.swappiness" = 10;
+  users.users.max.isNormalUser = true;
+}
+""")
+    output = io.StringIO()
+    assert check_files([configuration_file], {"nixos": options_file}, "json", output=output) == PROBLEMS_FOUND
+    problems = json.loads(output.getvalue())["problems"]
+    assert [(problem["line"], problem["path"], problem["kind"]) for problem in problems] == [
+        (5, "networking.firewall.allowedTCPPorts", "type mismatch"),
+        (6, "services.openssh.enable", "type mismatch"),
+        (7, "services.openssh.notAnOption", "unknown option"),
+    ]
+
+    output = io.StringIO()
+    assert check_files([configuration_file], {"nixos": options_file}, output=output) == PROBLEMS_FOUND
+    assert f"{configuration_file}:7: unknown option: services.openssh.notAnOption is not an option" in \
+        output.getvalue()
+
+
+def test_check_exit_codes(tmp_path, monkeypatch):
+    """
+    Checks the exit code is 0 for a file with no problems, and 2 if a file could not be read
+    """
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    options_file, configuration_file = write_files(tmp_path, """{ config, pkgs, ... }:
+{
+  networking.hostName = "nixos";
+}
+""")
+    output = io.StringIO()
+    assert check_files([configuration_file], {"nixos": options_file}, output=output) == NO_PROBLEMS
+    assert output.getvalue() == "0 problem(s) found in 1 file(s)\n"
+    output = io.StringIO()
+    assert check_files([configuration_file, str(tmp_path / "missing.nix")], {"nixos": options_file}, "json",
+                       output=output) == FILES_NOT_CHECKED
+    assert json.loads(output.getvalue())["errors"][0]["file"] == str(tmp_path / "missing.nix")
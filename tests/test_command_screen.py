@@ -0,0 +1,45 @@
+"""Tests running commands inside the app with their output shown as it comes"""
+import asyncio
+import sys
+
+from textual.app import App
+from textual.widgets import Log
+
+from nix_tree.command_screen import CommandScreen
+
+
+async def run_command(command: list[str], cancel: bool = False) -> tuple[list[str], int | None]:
+    """Runs a command on the command screen, cancelling it once it has started if asked to
+
+    Returns:
+        tuple[list[str], int | None] - the lines in the log and what the screen was dismissed with
+    """
+
+    results = []
+    app = App()
+    async with app.run_test() as pilot:
+        screen = CommandScreen(command)
+        await app.push_screen(screen, results.append)
+        await pilot.pause(0.5)
+        if cancel:
+            await pilot.press("escape")
+        await app.workers.wait_for_complete()
+        await pilot.pause(0.1)
+        lines = list(screen.query_one(Log).lines)
+        await pilot.press("escape")
+        await pilot.pause(0.1)
+    return lines, results[0]
+
+
+def test_output_is_streamed_and_commands_can_be_cancelled():
+    """
+    Checks the output and errors of a command are shown with its exit code, and that a cancelled command is stopped
+    """
+
+    lines, return_code = asyncio.run(run_command(
+        [sys.executable, "-c", "import sys; print('building'); print('warning', file=sys.stderr); sys.exit(3)"]))
+    assert set(lines[:2]) == {"building", "warning"}
+    assert lines[-1] == "The command failed with exit code 3" and return_code == 3
+
+    lines, return_code = asyncio.run(run_command([sys.executable, "-c", "import time; time.sleep(30)"], cancel=True))
+    assert lines == ["Cancelled"] and return_code is None
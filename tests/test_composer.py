@@ -0,0 +1,176 @@
+"""Tests that the composer outputs the expected file for each example configuration"""
+import os
+from pathlib import Path
+import shutil
+
+import pytest
+
+from nix_tree.decomposer import Decomposer
+from nix_tree.tree import DecomposerTree
+from nix_tree.composer import Composer, RenderCache, work_out_output_location
+
+
+def compose_example(tmp_path: Path, example_name: str, comments: bool, jobs: int = 1) -> str:
+    """
+    Copies an example configuration into a temporary directory, decomposes it and composes it again
+
+    Args:
+        tmp_path: Path - the temporary directory to work in
+        example_name: str - the file name of the example configuration
+        comments: bool - whether comments should be copied over
+        jobs: int - how many processes to compose with
+
+    Returns:
+        str: The contents of the file the composer wrote
+    """
+
+    configuration = tmp_path / example_name
+    shutil.copy(Path("./tests/example_configurations") / example_name, configuration)
+    tree = DecomposerTree()
+    Decomposer(file_path=configuration, tree=tree)
+    Composer(tree, str(configuration), False, comments, jobs=jobs)
+    return Path(str(configuration) + ".new").read_text(encoding="utf-8")
+
+
+def expected_output(example_name: str, comments: bool) -> str:
+    """
+    Reads the expected output of the composer for an example configuration
+
+    Args:
+        example_name: str - the file name of the example configuration
+        comments: bool - whether the expected output is the one with comments
+
+    Returns:
+        str: The expected output
+    """
+
+    suffix = "_comments" if comments else ""
+    return (Path("./tests/example_outputs") / (Path(example_name).stem + suffix + ".nix")).read_text(encoding="utf-8")
+
+
+def test_compose_without_comments(tmp_path):
+    """
+    Checks the composer output without comments matches the expected output for all the example configs
+    """
+
+    for example in ("yasu_example_config.nix", "shortened_default.nix", "pms_example_config.nix", "random.nix"):
+        assert expected_output(example, False) == compose_example(tmp_path, example, False)
+
+
+def test_compose_with_comments(tmp_path):
+    """
+    Checks the composer output with comments matches the expected output for all the example configs
+    """
+
+    for example in ("yasu_example_config.nix", "shortened_default.nix", "pms_example_config.nix", "random.nix"):
+        assert expected_output(example, True) == compose_example(tmp_path, example, True)
+
+
+def test_compose_in_parallel(tmp_path):
+    """
+    Checks composing the top level sections in parallel gives exactly the same output as composing them in order
+    """
+
+    for example in ("yasu_example_config.nix", "shortened_default.nix", "pms_example_config.nix", "random.nix"):
+        assert expected_output(example, False) == compose_example(tmp_path, example, False, jobs=2)
+        assert expected_output(example, True) == compose_example(tmp_path, example, True, jobs=2)
+
+
+def test_write_over_keeps_mode_and_backups(tmp_path):
+    """
+    Checks writing over a file keeps its mode, rotates the backups and leaves no temporary files behind
+    """
+
+    configuration = tmp_path / "shortened_default.nix"
+    shutil.copy(Path("./tests/example_configurations/shortened_default.nix"), configuration)
+    original = configuration.read_text(encoding="utf-8")
+    configuration.chmod(0o640)
+    for comments in (False, True, False):  # Alternating so every write changes the file
+        tree = DecomposerTree()
+        Decomposer(file_path=Path("./tests/example_configurations/shortened_default.nix"), tree=tree)
+        Composer(tree, str(configuration), True, comments, backups=2)
+
+    assert configuration.read_text(encoding="utf-8") == expected_output("shortened_default.nix", False)
+    assert configuration.stat().st_mode & 0o777 == 0o640
+    # The original file was the oldest backup, so it has been rotated out by the third write
+    for backup in ("shortened_default.nix.bak.1", "shortened_default.nix.bak.2"):
+        assert (tmp_path / backup).read_text(encoding="utf-8") != original
+    assert not (tmp_path / "shortened_default.nix.bak.3").exists()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "shortened_default.nix", "shortened_default.nix.bak.1", "shortened_default.nix.bak.2"
+    ]
+
+
+def test_compose_with_render_cache(tmp_path):
+    """
+    Checks composing the same tree again with a render cache reuses sections, and that a change to a variable is
+    still written after the sections around it were cached
+    """
+
+    configuration = tmp_path / "pms_example_config.nix"
+    shutil.copy(Path("./tests/example_configurations/pms_example_config.nix"), configuration)
+    tree = DecomposerTree()
+    Decomposer(file_path=configuration, tree=tree)
+    render_cache = RenderCache()
+    for comments in (False, True, False, True):
+        Composer(tree, str(configuration), False, comments, render_cache=render_cache)
+        assert Path(str(configuration) + ".new").read_text(encoding="utf-8") == expected_output(
+            "pms_example_config.nix", comments)
+    assert len(render_cache) > 0
+
+    tree.find_variable_node("networking.hostName", tree.get_root()).set_data("'laptop'")
+    Composer(tree, str(configuration), False, True, render_cache=render_cache)
+    expected = expected_output("pms_example_config.nix", True).replace('hostName = "testnix"', 'hostName = "laptop"')
+    assert Path(str(configuration) + ".new").read_text(encoding="utf-8") == expected
+
+
+def test_identical_output_is_not_written(tmp_path):
+    """
+    Checks writing the same output again leaves the file (and its modification time) alone and makes no backup
+    """
+
+    configuration = tmp_path / "shortened_default.nix"
+    shutil.copy(Path("./tests/example_configurations/shortened_default.nix"), configuration)
+    tree = DecomposerTree()
+    Decomposer(file_path=configuration, tree=tree)
+    assert Composer(tree, str(configuration), True, False, backups=1).get_written()
+    os.utime(configuration, (0, 0))
+    assert not Composer(tree, str(configuration), True, False, backups=1).get_written()
+    assert configuration.stat().st_mtime == 0
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["shortened_default.nix", "shortened_default.nix.bak.1"]
+
+
+def test_write_over_follows_symlinks(tmp_path):
+    """
+    Checks writing over a symlinked configuration writes the file it links to, keeping the link
+    """
+
+    real_configuration = tmp_path / "dotfiles" / "configuration.nix"
+    real_configuration.parent.mkdir()
+    shutil.copy(Path("./tests/example_configurations/shortened_default.nix"), real_configuration)
+    link = tmp_path / "configuration.nix"
+    link.symlink_to(real_configuration)
+    tree = DecomposerTree()
+    Decomposer(file_path=link, tree=tree)
+    Composer(tree, str(link), True, False, backups=1)
+
+    assert link.is_symlink()
+    assert real_configuration.read_text(encoding="utf-8") == expected_output("shortened_default.nix", False)
+    assert (tmp_path / "dotfiles" / "configuration.nix.bak.1").exists()
+
+
+@pytest.mark.skipif(os.geteuid() == 0, reason="root can write to read-only directories")
+def test_read_only_directory_is_not_written_to(tmp_path):
+    """
+    Checks a writable file in a read-only directory is written somewhere else, as the temporary file has to be made
+    next to it
+    """
+
+    configuration = tmp_path / "read_only" / "configuration.nix"
+    configuration.parent.mkdir()
+    shutil.copy(Path("./tests/example_configurations/shortened_default.nix"), configuration)
+    configuration.parent.chmod(0o555)
+    try:
+        assert work_out_output_location(str(configuration), True) == os.getcwd() + "/configuration.nix"
+    finally:
+        configuration.parent.chmod(0o755)
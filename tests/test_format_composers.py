@@ -0,0 +1,98 @@
+"""Tests the composers which write the tree out as json or as a flat list of variables"""
+import io
+import json
+from pathlib import Path
+
+from nix_tree.decomposer import Decomposer
+from nix_tree.json_loader import JsonLoader
+from nix_tree.tree import DecomposerTree
+from nix_tree.format_composers import JsonComposer, FlatComposer
+
+
+def decompose_random() -> DecomposerTree:
+    """
+    Decomposes the random example configuration
+
+    Returns:
+        DecomposerTree: The tree of the configuration
+    """
+
+    tree = DecomposerTree()
+    Decomposer(Path("./tests/example_configurations/random.nix"), tree)
+    return tree
+
+
+def test_json_composer():
+    """
+    Checks the json output has the sections as objects and the values converted to json types
+    """
+
+    output = io.StringIO()
+    JsonComposer(decompose_random(), output)
+    assert json.loads(output.getvalue()) == {
+        "networking": {"useDHCP": "lib.mkDefault.true"},
+        "nixpkgs": {"hostPlatform": 'lib.mkDefault."x86_64-linux"'},
+        "boot": {"supportedFilesystems": {"btrfs": True, "zfs": "lib.mkForce.false"}},
+        "services": {"i2pd": {"bandwidth": 32}, "tigerbeetle": {"clusterId": 15}},
+    }
+
+
+def test_flat_composer():
+    """
+    Checks the flat output has one line for every variable with its full path
+    """
+
+    output = io.StringIO()
+    FlatComposer(decompose_random(), output)
+    assert output.getvalue() == (
+        "networking.useDHCP = lib.mkDefault.true;\n"
+        'nixpkgs.hostPlatform = lib.mkDefault."x86_64-linux";\n'
+        "boot.supportedFilesystems.btrfs = true;\n"
+        "boot.supportedFilesystems.zfs = lib.mkForce.false;\n"
+        "services.i2pd.bandwidth = 32;\n"
+        "services.tigerbeetle.clusterId = 15;\n"
+    )
+
+
+def test_json_round_trip(tmp_path):
+    """
+    Checks json loaded into the tree comes back out the same, including quoted keys, mixed and nested lists and
+    strings which have to be escaped, and that lists which json cannot hold are kept whole as Nix
+    """
+
+    values = {
+        "services": {"foo.bar": {"enable": True}},
+        "quoted": 'say "hi"',
+        "escaped": "a\\b\nc\t${d}",
+        "indented": "it''s ${e} 'q'",
+        "mixed": [1, "a", [2], True, "x y"],
+        "fonts": [{"a": 1}],
+    }
+    (tmp_path / "config.json").write_text(json.dumps(values))
+    tree = DecomposerTree()
+    JsonLoader(tmp_path / "config.json", tree)
+    output = io.StringIO()
+    JsonComposer(tree, output)
+    assert json.loads(output.getvalue()) == {**values, "fonts": "[ { a = 1; } ]"}
+
+
+def test_json_values_from_nix(tmp_path):
+    """
+    Checks strings in a Nix file lose their escapes and lists keep every element in the json output
+    """
+
+    (tmp_path / "configuration.nix").write_text(
+        '{ config, pkgs, ... }:\n{\n'
+        '  x = "say \\"hi\\"";\n'
+        '  users.users.a.extraGroups = [ "wheel" 3 ];\n'
+        '  environment.systemPackages = [ pkgs.git "a" ];\n'
+        '}\n')
+    tree = DecomposerTree()
+    Decomposer(tmp_path / "configuration.nix", tree)
+    output = io.StringIO()
+    JsonComposer(tree, output)
+    assert json.loads(output.getvalue()) == {
+        "x": 'say "hi"',
+        "users": {"users": {"a": {"extraGroups": ["wheel", 3]}}},
+        "environment": {"systemPackages": '[ pkgs.git "a" ]'},
+    }
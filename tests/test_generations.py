@@ -0,0 +1,42 @@
+"""Tests listing the home-manager generations only when the profile has changed"""
+import os
+import subprocess
+
+from nix_tree import generations
+from nix_tree.generations import GenerationsCache
+
+
+GENERATIONS = "2024-11-05 10:00 : id 2 -> /nix/store/b-home-manager-generation (current)\n" \
+              "2024-11-04 09:00 : id 1 -> /nix/store/a-home-manager-generation\n"
+
+
+def test_generations_are_cached_until_the_profile_changes(tmp_path, monkeypatch):
+    """
+    Checks home-manager is only run again once a generation has been added to the profile directory, and that the
+    cache is kept between runs
+    """
+
+    runs = []
+
+    def fake_run(command, **kwargs):
+        """Stands in for home-manager, counting how many times it is run"""
+
+        runs.append(command)
+        return subprocess.CompletedProcess(command, 0, stdout=GENERATIONS, stderr="")
+
+    monkeypatch.setattr(generations.subprocess, "run", fake_run)
+    profiles = tmp_path / "profiles"
+    profiles.mkdir()
+    cache_location = tmp_path / "cache" / "home-manager-generations.json"
+
+    listed = GenerationsCache(cache_location, [profiles]).get_generations()
+    assert listed == GENERATIONS.split("\n")[:-1]
+    assert GenerationsCache(cache_location, [profiles]).get_generations() == listed
+    assert len(runs) == 1
+
+    (profiles / "home-manager-3-link").symlink_to(tmp_path)
+    os.utime(profiles, ns=(0, profiles.stat().st_mtime_ns + 1))  # In case the link was made within the same tick
+    GenerationsCache(cache_location, [profiles]).get_generations()
+    assert len(runs) == 2
+    GenerationsCache(cache_location, [tmp_path / "missing"]).get_generations()  # Nothing to tell when it changes
+    assert len(runs) == 3
@@ -0,0 +1,57 @@
+"""Tests loading evaluated configuration from json into the tree"""
+import io
+import json
+
+from nix_tree.json_loader import JsonLoader
+from nix_tree.parsing import Types
+from nix_tree.tree import DecomposerTree, VariableNode
+from nix_tree.composer import Composer
+from nix_tree.format_composers import FlatComposer
+
+
+def test_json_types_are_mapped(tmp_path):
+    """
+    Checks each json type becomes a variable with the matching type and the data in the form the decomposer uses
+    """
+
+    json_file = tmp_path / "services.json"
+    json_file.write_text(json.dumps({
+        "openssh": {"enable": True, "ports": [22, 2222], "settings": {"PermitRootLogin": "no"}},
+        "nginx": {"virtualHosts": {"my site": {"root": "/var/www"}}, "appendConfig": "a\nb"},
+        "cron": {"systemCronJobs": [], "mailto": None},
+    }), encoding="utf-8")
+    tree = DecomposerTree()
+    JsonLoader(json_file, tree, "services")
+
+    expected = {
+        "services.openssh.enable": ("true", Types.BOOL),
+        "services.openssh.ports": ("[ 22 2222 ]", Types.LIST),
+        "services.openssh.settings.PermitRootLogin": ("'no'", Types.STRING),
+        "services.nginx.virtualHosts.'my site'.root": ("'/var/www'", Types.STRING),
+        "services.nginx.appendConfig": ("'a\\nb'", Types.STRING),
+        "services.cron.systemCronJobs": ("[ ]", Types.LIST),
+        "services.cron.mailto": ("null", Types.UNIQUE),
+    }
+    for path, (data, data_type) in expected.items():
+        node = tree.find_variable_node(path, tree.get_root())
+        assert isinstance(node, VariableNode)
+        assert (node.get_data(), node.get_type()) == (data, data_type)
+
+
+def test_loaded_tree_can_be_composed(tmp_path):
+    """
+    Checks the loaded tree can be written out by the composers like a decomposed one
+    """
+
+    json_file = tmp_path / "config.json"
+    json_file.write_text(json.dumps({"networking": {"hostName": "laptop"}, "boot": {"loader": {"timeout": 5}}}),
+                         encoding="utf-8")
+    tree = DecomposerTree()
+    JsonLoader(json_file, tree)
+
+    flat = io.StringIO()
+    FlatComposer(tree, flat)
+    assert flat.getvalue() == 'networking.hostName = "laptop";\nboot.loader.timeout = 5;\n'
+    nix = io.StringIO()
+    Composer(tree, str(json_file), False, False, output=nix)
+    assert 'hostName = "laptop";' in nix.getvalue()
@@ -0,0 +1,104 @@
+"""Tests the ui tree only creating the nodes of a section once it is opened"""
+from pathlib import Path
+
+import pytest
+from textual.widgets import Tree
+
+from nix_tree.decomposer import Decomposer
+from nix_tree.errors import DecompositionCancelled
+from nix_tree.lazy_tree import LazyTree, section_path, ui_children
+from nix_tree.parsing import Types
+from nix_tree.tree import DecomposerTree
+
+
+def labels(nodes) -> list[str]:
+    """Returns the labels of some ui nodes"""
+
+    return [str(node.label) for node in nodes]
+
+
+def test_sections_are_filled_in_when_opened():
+    """
+    Checks only the top level is created at first, and that filling in every section gives the same tree as adding
+    the whole tree at once
+    """
+
+    tree = DecomposerTree()
+    Decomposer(Path("./tests/example_configurations/yasu_example_config.nix"), tree)
+    added = []
+    lazy_tree = LazyTree("test", tree, added.append)
+    full_tree: Tree[dict] = Tree("test")
+    tree.add_to_ui(tree.get_root(), full_tree.root)
+
+    assert labels(lazy_tree.root.children) == labels(full_tree.root.children)
+    section = next(node for node in lazy_tree.root.children if node.allow_expand)
+    assert not lazy_tree.is_filled(section) and not section.children
+
+    variables = 0
+    stack = [(lazy_tree.root, full_tree.root)]
+    while stack:
+        lazy_node, full_node = stack.pop()
+        variables += sum(1 for node in full_node.children if node.data)
+        assert labels(ui_children(lazy_node)) == labels(full_node.children)
+        assert [node.data for node in lazy_node.children] == [node.data for node in full_node.children]
+        stack.extend(zip(lazy_node.children, full_node.children))
+    assert len(added) == variables
+
+
+def test_nodes_are_bound_to_their_paths():
+    """
+    Checks sections and variables are found from their paths without opening anything first, and that removed nodes
+    are no longer found
+    """
+
+    tree = DecomposerTree()
+    Decomposer(Path("./tests/example_configurations/yasu_example_config.nix"), tree)
+    lazy_tree = LazyTree("test", tree)
+
+    enable = lazy_tree.find_variable("services.openssh.enable", "true")
+    assert str(enable.label) == "enable=true"
+    assert lazy_tree.find_variable("services.openssh.enable", "false") is None
+    assert lazy_tree.path_of(enable.parent) == "services.openssh"
+    assert section_path(enable.parent) == "services.openssh"
+    assert lazy_tree.find_section("services.openssh") is enable.parent
+
+    enable.remove()
+    assert lazy_tree.find_variable("services.openssh.enable") is None
+    added = lazy_tree.add_variable(lazy_tree.find_section("services.openssh"), "services.openssh.enable", "false",
+                                   Types.BOOL)
+    assert lazy_tree.find_variable("services.openssh.enable") is added
+    section = lazy_tree.add_section(added.parent, "settings")
+    assert lazy_tree.find_section("services.openssh.settings") is section
+
+
+
+def test_top_level_is_shown_while_loading():
+    """
+    Checks the top level is shown as the file is decomposed, that sections are only filled in once it has finished
+    (including ones opened while it was loading) and that the decomposer can be stopped part way through
+    """
+
+    tree = DecomposerTree()
+    lazy_tree = LazyTree("test", tree, loading=True)
+    shown = []
+    Decomposer(Path("./tests/example_configurations/yasu_example_config.nix"), tree,
+               lambda done, total: shown.append(lazy_tree.show_loaded()))
+    full_tree: Tree[dict] = Tree("test")
+    tree.add_to_ui(tree.get_root(), full_tree.root)
+
+    assert lazy_tree.is_loading() and sum(shown) == len(full_tree.root.children)
+    assert labels(lazy_tree.root.children) == labels(full_tree.root.children)
+    section = next(node for node in lazy_tree.root.children if node.allow_expand)
+    section.expand()
+    assert not ui_children(section)
+    lazy_tree.finish_loading()
+    assert not lazy_tree.is_loading() and lazy_tree.is_filled(section) and section.children
+
+    def cancel(done, total):
+        """Stops the decomposer after a few assignments"""
+
+        if done == 3:
+            raise DecompositionCancelled()
+
+    with pytest.raises(DecompositionCancelled):
+        Decomposer(Path("./tests/example_configurations/yasu_example_config.nix"), DecomposerTree(), cancel)
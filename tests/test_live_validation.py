@@ -0,0 +1,71 @@
+"""Tests checking the variables in the tree against the options as they are edited"""
+import json
+
+from textual.widgets import ListItem, Tree
+
+from nix_tree.live_validation import LiveValidator, tree_variables
+from nix_tree.parsing import ParsingOptions, Types
+from nix_tree.stacks import OperationsStack
+
+
+OPTIONS = {
+    "services.openssh.enable": {"type": "boolean"},
+    "services.openssh.ports": {"type": "list of 16 bit unsigned integer; between 0 and 65535 (both inclusive)"},
+}
+
+
+class CountingOptions(ParsingOptions):
+    """Options which count how many paths are looked up"""
+
+    looked_up = 0
+
+    def look_up_options(self, option_paths):
+        """Counts the paths before looking them up"""
+
+        CountingOptions.looked_up += len(option_paths)
+        return super().look_up_options(option_paths)
+
+
+def test_only_new_paths_are_looked_up(tmp_path):
+    """
+    Checks the problems with changed variables are found, and that a path is only looked up the first time it is
+    checked however many times it is edited
+    """
+
+    options_file = tmp_path / "options.json"
+    options_file.write_text(json.dumps(OPTIONS), encoding="utf-8")
+    validator = LiveValidator(CountingOptions(options_file, tmp_path / "cache"))
+
+    assert validator.check([("services.openssh.enable", "'yes'"), ("services.openssh.ports", "[ 22 ]")]) == {
+        ("services.openssh.enable", "'yes'"): "services.openssh.enable is set to 'yes' but its type is boolean",
+        ("services.openssh.ports", "[ 22 ]"): None,
+    }
+    assert validator.check([("services.openssh.enable", "true"), ("headers", "[ config, pkgs, ... ]")]) == {
+        ("services.openssh.enable", "true"): None,
+        ("headers", "[ config, pkgs, ... ]"): None,
+    }
+    assert validator.check([("services.openssh.notAnOption", "1")])[("services.openssh.notAnOption", "1")] == \
+        "services.openssh.notAnOption is not an option"
+    assert CountingOptions.looked_up == 3
+
+
+def test_variables_are_found_in_the_ui_tree():
+    """
+    Checks every variable in the ui tree is found, including in sections with more than one part of the path in
+    their name, and that the stack tells its subscribers about each operation
+    """
+
+    tree: Tree[dict] = Tree("configuration.nix")
+    loader = tree.root.add("boot.loader")
+    loader.add_leaf("timeout=5", data={"boot.loader.timeout": "5", "type": Types.INT})
+    tree.root.add("services").add("openssh").add_leaf(
+        "enable=true", data={"services.openssh.enable": "true", "type": Types.BOOL})
+
+    assert set(tree_variables(tree.root)) == {("boot.loader.timeout", "5"), ("services.openssh.enable", "true")}
+
+    stack = OperationsStack()
+    seen = []
+    stack.subscribe(lambda item, pushed: seen.append((item.name, pushed)))
+    stack.push(ListItem(name="Added services.openssh.enable=true"))
+    stack.pop()
+    assert seen == [("Added services.openssh.enable=true", True), ("Added services.openssh.enable=true", False)]
@@ -0,0 +1,88 @@
+"""Tests looking options up in several named option sets at once"""
+import json
+
+from nix_tree.option_sets import OptionSets, choose_option_sets
+from nix_tree.parsing import Types
+
+
+NIXOS_OPTIONS = {
+    "networking.hostName": {"type": "string"},
+    "home-manager.useGlobalPkgs": {"type": "boolean"},
+}
+
+HOME_MANAGER_OPTIONS = {
+    "programs.git.enable": {"type": "boolean"},
+    "programs.git.userName": {"type": "null or string"},
+    "home.stateVersion": {"type": "string"},
+}
+
+IN_HOUSE_OPTIONS = {
+    "acme.backups.enable": {"type": "boolean"},
+    "networking.hostName": {"type": "string matching the pattern [a-z]+"},
+}
+
+
+def write_sets(tmp_path):
+    """Writes an options.json for each set
+
+    Returns:
+        dict[str, Path] - the location of each set, by name
+    """
+
+    locations = {}
+    for name, options in (("nixos", NIXOS_OPTIONS), ("home-manager", HOME_MANAGER_OPTIONS),
+                          ("acme", IN_HOUSE_OPTIONS)):
+        locations[name] = tmp_path / f"{name}.json"
+        locations[name].write_text(json.dumps(options), encoding="utf-8")
+    return locations
+
+
+def test_sets_are_layered_and_mounted(tmp_path):
+    """
+    Checks paths are looked up in the layers in order, and that the home-manager options are used for the
+    home-manager.users.<name> subtree of a NixOS configuration with the path leading up to it put back on
+    """
+
+    options = OptionSets(write_sets(tmp_path), ["nixos", "acme"], tmp_path / "cache")
+
+    assert options.check_type("acme.backups.enable") == (Types.BOOL, "boolean")
+    assert options.check_type("networking.hostName") == (Types.STRING, "string")  # The first layer is used
+    assert options.check_type("programs.git.enable") is None
+    assert options.check_type("home-manager.users.max.programs.git.enable") == (Types.BOOL, "boolean")
+    assert options.check_type("home-manager.useGlobalPkgs") == (Types.BOOL, "boolean")
+    assert options.get_children("home-manager.users.max.programs") == ["git"]
+    assert options.get_children("", "ac") == ["acme"]
+    assert options.search("git user", "home-manager.users.max")[0] == "home-manager.users.max.programs.git.userName"
+
+    found = options.look_up_options(["acme.backups.enable", "home-manager.users.max.home.stateVersion",
+                                     "programs.git.enable"])
+    assert found == {
+        "acme.backups.enable": ("acme.backups.enable", Types.BOOL, "boolean"),
+        "home-manager.users.max.home.stateVersion": ("home-manager.users.max.home.stateVersion", Types.STRING,
+                                                     "string"),
+    }
+    assert options.get_validator("home-manager.users.max.programs.git.enable").validate("'yes'") is False
+
+
+def test_sets_are_chosen_from_the_file_name(tmp_path):
+    """
+    Checks a home.nix is checked against the home-manager options, and that in-house sets are added to either
+    """
+
+    locations = write_sets(tmp_path)
+    assert choose_option_sets("/etc/nixos/configuration.nix", locations) == ["nixos", "acme"]
+    assert choose_option_sets("/home/max/.config/home-manager/home.nix", locations) == ["home-manager", "acme"]
+
+    options = OptionSets(locations, choose_option_sets("home.nix", locations), tmp_path / "cache")
+    assert options.check_type("programs.git.enable") == (Types.BOOL, "boolean")
+    assert options.check_type("home-manager.useGlobalPkgs") is None
+
+
+def test_home_manager_falls_back_to_nixos_when_it_is_not_installed(tmp_path):
+    """
+    Checks a home.nix is checked against the NixOS options if the home-manager options file does not exist
+    """
+
+    locations = write_sets(tmp_path)
+    locations["home-manager"].unlink()
+    assert choose_option_sets("/home/max/.config/home-manager/home.nix", locations) == ["nixos", "acme"]
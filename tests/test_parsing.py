@@ -0,0 +1,184 @@
+"""Tests the options index built from the options.json"""
+import json
+import threading
+
+from nix_tree.parsing import BackgroundOptions, ParsingOptions, Types
+
+
+OPTIONS = {
+    "services.openssh.enable": {"type": "boolean", "description": "Whether to enable the OpenSSH daemon."},
+    "services.openssh.ports": {"type": "list of 16 bit unsigned integer; between 0 and 65535 (both inclusive)"},
+    "networking.hostName": {"type": "string", "description": {"_type": "mdDoc", "text": "The name of the machine."}},
+    "boot.loader.timeout": {"type": "null or signed integer"},
+    "services.nginx.package": {"type": "package"},
+}
+
+
+def test_check_type_and_descriptions(tmp_path):
+    """
+    Checks the index gives the same types check_type always has, and reads descriptions when asked for
+    """
+
+    options_file = tmp_path / "options.json"
+    options_file.write_text(json.dumps(OPTIONS), encoding="utf-8")
+    options = ParsingOptions(options_file, tmp_path / "cache")
+
+    assert options.check_type("services.openssh.enable") == (Types.BOOL, "boolean")
+    assert options.check_type("services.openssh.ports")[0] == Types.LIST
+    assert options.check_type("networking.hostName") == (Types.STRING, "string")
+    assert options.check_type("boot.loader.timeout") == (Types.INT, "null or signed integer")
+    assert options.check_type("services.nginx.package") is None
+    assert options.check_type("services.not.an.option") is None
+    assert options.get_description("networking.hostName") == "The name of the machine."
+    assert options.get_description("boot.loader.timeout") is None
+
+
+def test_index_is_only_rebuilt_when_options_change(tmp_path):
+    """
+    Checks the index is reused while the options.json is the same, and a new one is built when it changes
+    """
+
+    options_file = tmp_path / "options.json"
+    options_file.write_text(json.dumps(OPTIONS), encoding="utf-8")
+    cache = tmp_path / "cache"
+    ParsingOptions(options_file, cache)
+    first_index = list(cache.glob("options-*.sqlite"))
+    assert len(first_index) == 1
+    modified_time = first_index[0].stat().st_mtime_ns
+    ParsingOptions(options_file, cache)
+    assert list(cache.glob("options-*.sqlite")) == first_index
+    assert first_index[0].stat().st_mtime_ns == modified_time
+
+    options_file.write_text(json.dumps({"programs.git.enable": {"type": "boolean"}}), encoding="utf-8")
+    options = ParsingOptions(options_file, cache)
+    assert options.check_type("programs.git.enable") == (Types.BOOL, "boolean")
+    assert options.check_type("services.openssh.enable") is None
+
+
+def test_children_for_completion(tmp_path):
+    """
+    Checks the options which can come next in a section are found from what has been typed so far
+    """
+
+    options_file = tmp_path / "options.json"
+    options_file.write_text(json.dumps(OPTIONS), encoding="utf-8")
+    options = ParsingOptions(options_file, tmp_path / "cache")
+
+    assert options.get_children("") == ["boot", "networking", "services"]
+    assert options.get_children("services") == ["nginx", "openssh"]
+    assert options.get_children("services.openssh", "en") == ["enable"]
+    assert options.get_children("services.openssh", "x") == []
+
+
+def test_background_options_wait_until_loaded(tmp_path, monkeypatch):
+    """
+    Checks using the options while they are loaded in another thread waits for them, and that options which fail
+    to load give no types instead of raising
+    """
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    options_file = tmp_path / "options.json"
+    options_file.write_text(json.dumps(OPTIONS), encoding="utf-8")
+    options = BackgroundOptions()
+    assert not options.is_ready()
+    loader = threading.Thread(target=options.load, args=(options_file,))
+    loader.start()
+    assert options.check_type("services.openssh.enable") == (Types.BOOL, "boolean")
+    assert options.is_ready()
+    assert options.get_error() is None
+    loader.join()
+
+    missing_options = BackgroundOptions()
+    missing_options.load(tmp_path / "missing.json")
+    assert isinstance(missing_options.get_error(), FileNotFoundError)
+    assert missing_options.check_type("services.openssh.enable") is None
+    assert missing_options.get_description("networking.hostName") is None
+    assert missing_options.get_children("") == []
+
+    def malformed_options() -> ParsingOptions:
+        """Fails the way a malformed entry in an options.json does"""
+        raise KeyError("type")
+
+    malformed = BackgroundOptions()
+    malformed.load(malformed_options)
+    assert isinstance(malformed.get_error(), KeyError)
+    assert malformed.check_type("services.openssh.enable") is None
+
+
+def test_paths_with_names_find_their_placeholder_option(tmp_path):
+    """
+    Checks paths with names in place of <name> and * are matched to their option, preferring options which are
+    named the same as the path
+    """
+
+    options_file = tmp_path / "options.json"
+    options_file.write_text(json.dumps({
+        "users.users.<name>.extraGroups": {"type": "list of string", "description": "The user's auxiliary groups."},
+        "services.nginx.virtualHosts.<name>.root": {"type": "null or absolute path"},
+        "services.nginx.virtualHosts.<name>.locations.<name>.proxyPass": {"type": "null or string"},
+        "services.nginx.virtualHosts.default.enable": {"type": "boolean"},
+        "networking.firewall.interfaces.<name>.allowedTCPPorts": {"type": "list of 16 bit unsigned integer"},
+        "fileSystems.<name>.options": {"type": "non-empty (list of string)"},
+        "boot.kernel.sysctl.\"net.ipv4.ip_forward\"": {"type": "boolean"},
+        "programs.ssh.knownHosts.<name>.hostNames": {"type": "list of string"},
+        "security.acme.certs.*.domain": {"type": "string"},
+    }), encoding="utf-8")
+    options = ParsingOptions(options_file, tmp_path / "cache")
+
+    assert options.check_type("users.users.max.extraGroups") == (Types.LIST, "list of string")
+    assert options.get_description("users.users.max.extraGroups") == "The user's auxiliary groups."
+    assert options.check_type("services.nginx.virtualHosts.'example.org'.locations.'/'.proxyPass")[0] == Types.STRING
+    assert options.check_type("services.nginx.virtualHosts.default.enable") == (Types.BOOL, "boolean")
+    assert options.find_template("services.nginx.virtualHosts.default.locations.api.proxyPass") == \
+        "services.nginx.virtualHosts.<name>.locations.<name>.proxyPass"
+    assert options.check_type("boot.kernel.sysctl.'net.ipv4.ip_forward'") == (Types.BOOL, "boolean")
+    assert options.check_type("security.acme.certs.example.domain") == (Types.STRING, "string")
+    assert options.check_type("users.users.max.notAnOption") is None
+    assert options.get_children("users.users.max") == ["extraGroups"]
+    assert options.get_children("services.nginx.virtualHosts.'example.org'", "lo") == ["locations"]
+
+
+def test_search_finds_half_remembered_options(tmp_path):
+    """
+    Checks options are found from parts of their names, best matches first, and only in the section searched
+    """
+
+    options_file = tmp_path / "options.json"
+    options_file.write_text(json.dumps({
+        "services.openssh.settings.PasswordAuthentication": {"type": "null or boolean"},
+        "services.openssh.settings.PermitRootLogin": {"type": "string"},
+        "services.openssh.enable": {"type": "boolean"},
+        "services.nginx.enable": {"type": "boolean"},
+        "security.sudo.wheelNeedsPassword": {"type": "boolean"},
+    }), encoding="utf-8")
+    options = ParsingOptions(options_file, tmp_path / "cache")
+
+    assert options.search("opensh passwordauth")[0] == "services.openssh.settings.PasswordAuthentication"
+    assert options.search("nginx enable")[0] == "services.nginx.enable"
+    assert "security.sudo.wheelNeedsPassword" not in options.search("password", "services.openssh")
+    assert options.search("password", "security") == ["security.sudo.wheelNeedsPassword"]
+    assert options.search("zz") == []
+
+
+def test_search_descriptions(tmp_path):
+    """
+    Checks options are found by the words in their descriptions, with rarer words counting for more
+    """
+
+    options_file = tmp_path / "options.json"
+    options_file.write_text(json.dumps({
+        "services.fstrim.enable": {"type": "boolean",
+                                   "description": "Whether to enable periodic SSD TRIM of mounted partitions."},
+        "services.openssh.enable": {"type": "boolean", "description": "Whether to enable the OpenSSH daemon."},
+        "networking.firewall.allowedTCPPortRanges": {
+            "type": "list of attribute set of 16 bit unsigned integer",
+            "description": {"_type": "mdDoc", "text": "A range of TCP ports on which incoming connections are accepted."}
+        },
+        "networking.hostName": {"type": "string"},
+    }), encoding="utf-8")
+    options = ParsingOptions(options_file, tmp_path / "cache")
+
+    assert options.search_descriptions("enable TRIM")[0] == "services.fstrim.enable"
+    assert options.search_descriptions("firewall port range") == ["networking.firewall.allowedTCPPortRanges"]
+    assert options.search_descriptions("enable", "networking") == []
+    assert options.search_descriptions("nothing matches this") == []
@@ -0,0 +1,81 @@
+"""Tests the source spans recorded by the decomposer and the patch composer which uses them"""
+from pathlib import Path
+import shutil
+
+from nix_tree.decomposer import Decomposer
+from nix_tree.tree import DecomposerTree, VariableNode, Node
+from nix_tree.patch_composer import PatchComposer
+
+
+def variable_names(node: Node, names: list[str]) -> list[str]:
+    """
+    Collects the names of all the variables in the tree
+
+    Args:
+        node: Node - the node to start collecting from
+        names: list[str] - the names collected so far
+
+    Returns:
+        list[str]: The names of the variables
+    """
+
+    if isinstance(node, VariableNode):
+        names.append(node.get_name())
+    for child in node.get_connected_nodes():
+        variable_names(child, names)
+    return names
+
+
+def test_spans_found_for_every_variable():
+    """
+    Checks that every variable the decomposer found has a span in the original file for all the example configs
+    """
+
+    for example in ("yasu_example_config.nix", "shortened_default.nix", "pms_example_config.nix", "random.nix"):
+        tree = DecomposerTree()
+        decomposer = Decomposer(Path("./tests/example_configurations") / example, tree)
+        spans = decomposer.get_source_spans()
+        assert spans.is_valid()
+        for name in variable_names(tree.get_root(), []):
+            if name != "headers":
+                assert spans.get_variable_span(name) is not None
+
+
+def test_patch_without_operations(tmp_path):
+    """
+    Checks that patching without any operations leaves the file exactly as it was
+    """
+
+    configuration = tmp_path / "pms_example_config.nix"
+    shutil.copy(Path("./tests/example_configurations/pms_example_config.nix"), configuration)
+    tree = DecomposerTree()
+    decomposer = Decomposer(configuration, tree)
+    PatchComposer(tree, decomposer.get_source_spans(), str(configuration), False, [])
+    assert Path(str(configuration) + ".new").read_text(encoding="utf-8") == configuration.read_text(encoding="utf-8")
+
+
+def test_patch_only_changes_edited_lines(tmp_path):
+    """
+    Checks that a change, a deletion and an addition only change the lines they affect
+    """
+
+    configuration = tmp_path / "shortened_default.nix"
+    shutil.copy(Path("./tests/example_configurations/shortened_default.nix"), configuration)
+    tree = DecomposerTree()
+    decomposer = Decomposer(configuration, tree)
+
+    # Applying the operations to the tree in the same way as the ui does
+    tree.find_variable_node("networking.hostName", tree.get_root()).set_data("'laptop'")
+    tree.find_node_parent("time.timeZone", tree.get_root()).remove_child_variable_node("time.timeZone='Europe/London'")
+    tree.add_branch("services.openssh.enable=true")
+    PatchComposer(tree, decomposer.get_source_spans(), str(configuration), False, [
+        "Change networking.hostName='nixos' -> networking.hostName='laptop'",
+        "Delete time.timeZone='Europe/London' type: Types.STRING",
+        "Added services.openssh.enable=true",
+    ])
+
+    expected = configuration.read_text(encoding="utf-8")
+    expected = expected.replace('networking.hostName = "nixos";', 'networking.hostName = "laptop";')
+    expected = expected.replace('  time.timeZone = "Europe/London";\n', "")
+    expected = expected[:expected.rindex("}")] + "  services.openssh.enable = true;\n}\n"
+    assert Path(str(configuration) + ".new").read_text(encoding="utf-8") == expected
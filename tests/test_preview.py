@@ -0,0 +1,54 @@
+"""Tests composing the edited file in memory and the diff shown before applying changes"""
+from pathlib import Path
+
+from nix_tree.decomposer import Decomposer
+from nix_tree.tree import DecomposerTree
+from nix_tree.preview import compose_to_string, highlight_diff, work_out_diff
+
+
+def test_compose_to_string_matches_composer():
+    """
+    Checks composing in memory gives the same output as the composer writes to a file, and writes no file
+    """
+
+    configuration = Path("./tests/example_configurations/shortened_default.nix")
+    tree = DecomposerTree()
+    decomposer = Decomposer(configuration, tree)
+    expected = Path("./tests/example_outputs/shortened_default_comments.nix").read_text(encoding="utf-8")
+    assert compose_to_string(decomposer, str(configuration), [], True, False) == expected
+    assert not Path(str(configuration) + ".new").exists()
+
+
+def test_diff_of_patched_change():
+    """
+    Checks the diff of a patched change only contains the changed line
+    """
+
+    configuration = Path("./tests/example_configurations/shortened_default.nix")
+    tree = DecomposerTree()
+    decomposer = Decomposer(configuration, tree)
+    tree.find_variable_node("networking.hostName", tree.get_root()).set_data("'laptop'")
+    edited = compose_to_string(decomposer, str(configuration), [
+        "Change networking.hostName='nixos' -> networking.hostName='laptop'"
+    ], False, True)
+    diff = work_out_diff(configuration.read_text(encoding="utf-8"), edited, str(configuration))
+
+    changed_lines = [line for line in diff.splitlines() if line[:1] in "+-" and line[:3] not in ("+++", "---")]
+    assert changed_lines == ['-  networking.hostName = "nixos"; # Define your hostname.',
+                             '+  networking.hostName = "laptop"; # Define your hostname.']
+    assert work_out_diff(edited, edited, str(configuration)) == ""
+
+
+def test_changed_tokens_are_highlighted():
+    """
+    Checks only the tokens which changed within a replaced line are highlighted, not the whole line
+    """
+
+    original = 'networking.hostName = "nixos"; # Define your hostname.\nboot.enable = true;\n'
+    edited = 'networking.hostName = "laptop"; # Define your hostname.\nboot.enable = true;\n'
+    diff = work_out_diff(original, edited, "configuration.nix")
+    highlighted = highlight_diff(diff)
+
+    changed = [highlighted.plain[span.start:span.end] for span in highlighted.spans if "reverse" in str(span.style)]
+    assert changed == ["nixos", "laptop"]
+    assert highlighted.plain == diff
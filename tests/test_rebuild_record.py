@@ -0,0 +1,32 @@
+"""Tests the record of successful rebuilds used to warn about redundant rebuilds"""
+from nix_tree.rebuild_record import RebuildRecord
+
+
+def test_rebuild_is_redundant_until_file_changes(tmp_path):
+    """
+    Checks a rebuild is only redundant if the same command succeeded with the file exactly as it is, and that the
+    record is kept between runs
+    """
+
+    configuration = tmp_path / "configuration.nix"
+    configuration.write_text("{ config, pkgs, ... }:\n\n{\n  networking.hostName = \"nixos\";\n}\n", encoding="utf-8")
+    record_location = tmp_path / "state" / "rebuilds.json"
+    switch = "sudo nixos-rebuild switch".split()
+
+    assert not RebuildRecord(record_location).is_redundant(str(configuration), switch)
+    RebuildRecord(record_location).record(str(configuration), switch)
+    assert RebuildRecord(record_location).is_redundant(str(configuration), switch)
+    assert not RebuildRecord(record_location).is_redundant(str(configuration), "sudo nixos-rebuild boot".split())
+
+    configuration.write_text("{ config, pkgs, ... }:\n\n{\n  networking.hostName = \"laptop\";\n}\n", encoding="utf-8")
+    assert not RebuildRecord(record_location).is_redundant(str(configuration), switch)
+
+
+def test_only_rebuilds_are_recorded():
+    """
+    Checks which commands count as rebuilds
+    """
+
+    assert RebuildRecord.is_rebuild("sudo nixos-rebuild test".split())
+    assert RebuildRecord.is_rebuild("home-manager switch".split())
+    assert not RebuildRecord.is_rebuild("home-manager remove-generations 12".split())
@@ -1,5 +1,6 @@
 """Tests the tree building functions"""
 
+import pickle
 from pathlib import Path
 
 from nix_tree.tree import DecomposerTree, ConnectorNode, VariableNode, Node
@@ -324,3 +325,62 @@ def test_tree_for_random():
     tree = DecomposerTree()
     Decomposer(file_path=Path("./tests/example_configurations/random.nix"), tree=tree)
     assert RANDOM == tree_output(tree.get_root())
+
+
+def test_variables_are_found_by_path_in_the_decomposer_tree():
+    """
+    Checks variables are found from their full path, including ones added after the index was built, and that
+    removed variables are not
+    """
+
+    tree = DecomposerTree()
+    Decomposer(Path("./tests/example_configurations/yasu_example_config.nix"), tree)
+
+    node = tree.find_variable_by_path("networking.hostName")
+    assert node.get_data() == "'nixos'"
+    tree.add_branch("networking.domain='example.org'")
+    assert tree.find_variable_by_path("networking.domain").get_data() == "'example.org'"
+    node.get_parent().remove_child_variable_node("networking.hostName='nixos'")
+    assert tree.find_variable_by_path("networking.hostName") is None
+
+
+def test_sections_are_found_by_path_in_the_decomposer_tree():
+    """
+    Checks sections are found from their full path, including ones added after the index was built, and that
+    removed sections are not
+    """
+
+    tree = DecomposerTree()
+    Decomposer(Path("./tests/example_configurations/yasu_example_config.nix"), tree)
+
+    section = tree.find_section_by_path("services.openssh")
+    assert section.get_name() == "openssh"
+    assert tree.find_section_by_path("") is tree.get_root()
+    tree.add_branch("services.nginx.enable=true")
+    assert tree.find_section_by_path("services.nginx").get_parent() is section.get_parent()
+    added = tree.add_section("services.openssh.settings")
+    assert tree.find_section_by_path("services.openssh.settings") is added
+    section.get_parent().remove_child_section_node("openssh")
+    assert tree.find_section_by_path("services.openssh") is None
+    assert tree.find_section_by_path("services.openssh.settings") is None
+    assert tree.add_section("services.openssh.settings") is None
+
+
+def test_pickling_a_section_leaves_out_the_rest_of_the_tree():
+    """
+    Checks a pickled section does not take the whole tree with it through its parent, and that the children of an
+    unpickled section are linked back to it
+    """
+
+    tree = DecomposerTree()
+    Decomposer(Path("./tests/example_configurations/pms_example_config.nix"), tree)
+
+    sections = [node for node in tree.get_root().get_connected_nodes() if isinstance(node, ConnectorNode)]
+    section = min(sections, key=lambda node: len(pickle.dumps(node)))
+    assert len(pickle.dumps(section)) * 4 < len(pickle.dumps(tree.get_root()))
+
+    copy = pickle.loads(pickle.dumps(section))
+    assert copy.get_parent() is None
+    assert tree_output(copy) == tree_output(section)
+    for child in copy.get_connected_nodes():
+        assert child.get_parent() is copy
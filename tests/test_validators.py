@@ -0,0 +1,59 @@
+"""Tests compiling option type strings into validators and checking values with them"""
+from nix_tree.validators import compile_type, parse_value, NixValue
+
+
+def test_parse_value():
+    """
+    Checks values in the form the decomposer stores them are worked out, unwrapping priority functions
+    """
+
+    assert parse_value("true") == NixValue("bool", True)
+    assert parse_value("lib.mkForce.8080") == NixValue("int", 8080)
+    assert parse_value("'nixos'") == NixValue("string", "nixos")
+    assert parse_value("'${config.networking.hostName}'") == NixValue("string", None)
+    assert parse_value("[ 'wheel' 'docker' ]") == NixValue("list", [NixValue("string", "wheel"),
+                                                                      NixValue("string", "docker")])
+    assert parse_value("pkgs.git").kind == "expression"
+
+
+def test_validators_check_values_exactly():
+    """
+    Checks values are accepted or rejected by the exact type, including ranges, enums and nested types
+    """
+
+    port = compile_type("16 bit unsigned integer; between 0 and 65535 (both inclusive)")
+    assert port.validate("22") is True
+    assert port.validate("70000") is False
+    assert port.validate("'22'") is False
+    assert compile_type("null or signed integer").validate("null") is True
+    assert compile_type('one of "poweroff", "reboot"').validate("'reboot'") is True
+    assert compile_type('one of "poweroff", "reboot"').validate("'halt'") is False
+    assert compile_type("list of non-empty string").validate("[ 'a' '' ]") is False
+    assert compile_type("list of (submodule)").validate("[ { } ]") is not False
+
+
+def test_validators_do_not_reject_what_they_can_not_evaluate():
+    """
+    Checks expressions and type strings which are not understood are never said to be wrong, and validators are
+    reused for the same type string
+    """
+
+    assert compile_type("boolean").validate("config.services.xserver.enable") is None
+    assert compile_type("package").validate("pkgs.git") is None
+    assert compile_type("some type nobody has heard of").validate("5") is None
+    assert compile_type("boolean") is compile_type("boolean")
+
+
+def test_posix_patterns_are_translated():
+    """
+    Checks the POSIX bracket classes in pattern types are understood, using the type of networking.hostName, and
+    that patterns with classes which are not known are never said to be wrong
+    """
+
+    host_name = compile_type("string matching the pattern ^$|^[[:alnum:]]([[:alnum:]_-]{0,61}[[:alnum:]])?$")
+    assert host_name.validate("'nixos'") is True
+    assert host_name.validate("'my-laptop'") is True
+    assert host_name.validate("''") is True
+    assert host_name.validate("'-laptop'") is False
+    assert host_name.validate("'my laptop'") is False
+    assert compile_type("string matching the pattern [[:nonsense:]]+").validate("'x'") is None